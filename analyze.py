@@ -0,0 +1,143 @@
+# analyze.py
+
+import sys
+import json
+import argparse
+import collections
+from typing import Iterable, Iterator
+from board import Board
+from engine import index_to_coord
+from search import MAX_QUEUED_SEARCHES, ENDGAME_EMPTIES, SearchPool, SearchResult
+from generate_book import score_discs
+
+# Batch position analysis. Reads one position per line, "<flat-FEN> <b|w>"
+# (X black, O white, . empty; blank lines and '#' comments are skipped),
+# searches each on one SearchPool worker at a fixed depth, node count or
+# time, and writes one JSON object per input position in input order.
+# Depth- and node-limited searches are deterministic (see search_position),
+# so rerunning a file gives the same records apart from the timings.
+# At most a few searches per worker are in flight, so memory stays flat
+# however long the input is:
+#
+#   python analyze.py games.txt --depth 12 -o games.jsonl
+#   zcat positions.gz | python analyze.py --nodes 2000000 --workers 16
+
+SIDES = {'b': 1, 'x': 1, 'w': -1, 'o': -1}
+
+
+def parse_position(line: str) -> tuple[Board, int]:
+    """(board, player) from a '<flat-FEN> <b|w>' line; ValueError if malformed."""
+    fields = line.split()
+    if len(fields) != 2 or fields[1].lower() not in SIDES:
+        raise ValueError("expected '<64-char flat-FEN> <b|w>'")
+    if set(fields[0]) - set("XO."):
+        raise ValueError("flat-FEN may only contain X, O and .")
+    return Board.from_flat_fen(fields[0]), SIDES[fields[1].lower()]
+
+
+def _coord(mv: int) -> str:
+    return index_to_coord(mv).lower()
+
+
+def _record(line_no: int, b: Board, player: int, result: SearchResult | None,
+            passed: bool) -> dict:
+    rec = {"line": line_no, "fen": b.to_flat_fen(), "side": 'b' if player == 1 else 'w'}
+    if result is None:
+        # game over: the final disc difference
+        diff = b.count(player) - b.count(-player)
+        rec.update(move=None, score=float(diff), depth=0, kind="final",
+                   nodes=0, time=0.0, pv=[])
+        return rec
+    pv = [_coord(mv) for mv in result.pv]
+    score = score_discs(result.score, result.kind)
+    if passed:
+        # searched from the opponent's side after our forced pass
+        score, pv = -score, ["pass"] + pv
+    rec.update(move=pv[0] if pv else None, score=score, depth=result.depth,
+               kind=result.kind, nodes=result.nodes, time=round(result.elapsed, 4), pv=pv)
+    return rec
+
+
+def analyze(lines: Iterable[str], pool: SearchPool, time_limit: float | None = None,
+            max_depth: int | None = None, max_nodes: int | None = None,
+            endgame_empties: int = ENDGAME_EMPTIES,
+            window: int | None = None) -> Iterator[dict]:
+    """
+    Analysis records for the positions in `lines`, in input order. At
+    most `window` (default two per worker) searches are queued at a time.
+    Without a time limit the searches are deterministic.
+    """
+    window = min(window or 2 * pool.workers, MAX_QUEUED_SEARCHES)
+    limits = {"endgame_empties": endgame_empties, "deterministic": time_limit is None}
+    if max_depth is not None:
+        limits["max_depth"] = max_depth
+    if max_nodes is not None:
+        limits["max_nodes"] = max_nodes
+    pending = collections.deque()   # (line_no, board, player, future or None, passed)
+    try:
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                b, player = parse_position(line)
+            except ValueError as exc:
+                pending.append((line_no, None, str(exc), None, False))
+            else:
+                side, passed = player, False
+                if not b.legal_moves(player):
+                    side, passed = -player, True
+                fut = None
+                if b.legal_moves(side):
+                    fut, _ = pool.submit_search(b, side, time_limit, **limits)
+                pending.append((line_no, b, player, fut, passed))
+            while len(pending) >= window or (pending and _ready(pending[0])):
+                yield _finish(pending.popleft())
+        while pending:
+            yield _finish(pending.popleft())
+    finally:
+        for _, _, _, fut, _ in pending:
+            if fut is not None:
+                fut.cancel()
+
+
+def _ready(entry) -> bool:
+    fut = entry[3]
+    return fut is None or fut.done()
+
+
+def _finish(entry) -> dict:
+    line_no, b, player, fut, passed = entry
+    if b is None:
+        return {"line": line_no, "error": player}
+    return _record(line_no, b, player, None if fut is None else fut.result(), passed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse flat-FEN positions to JSON lines.")
+    parser.add_argument("input", nargs="?", default="-", help="position file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output ('-' for stdout)")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--depth", type=int, default=None, help="fixed search depth (default 10)")
+    limit.add_argument("--nodes", type=int, default=None, help="node budget per position")
+    limit.add_argument("--time", type=float, default=None, help="seconds per position")
+    parser.add_argument("--endgame", type=int, default=ENDGAME_EMPTIES,
+                        help="solve exactly from this many empties")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    if args.depth is None and args.nodes is None and args.time is None:
+        args.depth = 10
+
+    src = sys.stdin if args.input == "-" else open(args.input)
+    dst = sys.stdout if args.output == "-" else open(args.output, "w")
+    pool = SearchPool(args.workers)
+    try:
+        for rec in analyze(src, pool, args.time, args.depth, args.nodes, args.endgame):
+            dst.write(json.dumps(rec) + "\n")
+            dst.flush()
+    finally:
+        pool.shutdown()
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
@@ -0,0 +1,182 @@
+# archive_utils.py
+
+import os
+from typing import Iterator
+import numpy as np
+from board import Board
+from position_utils import PositionWriter, positions_from_game, replay
+
+# Game archive: a magic header followed by fixed-size records holding the
+# move list and game metadata. Fixed records make the file a memory-mapped
+# NumPy record array, so selecting games by score or player is a vector
+# comparison over one column and nothing is parsed until a game is replayed.
+
+ARCHIVE_MAGIC = b"OTHGAM01"
+NO_SQUARE = 255          # padding after the last move
+GAME_DTYPE = np.dtype([
+    ('moves',        'u1', (60,)),   # square indices (0 = A8), passes implied
+    ('n_moves',      'u1'),
+    ('black_score',  'u1'),          # final black disc count
+    ('theoretical',  'u1'),          # perfect-play black score, 255 if unknown
+    ('black_player', '<u2'),
+    ('white_player', '<u2'),
+    ('tournament',   '<u2'),
+    ('year',         '<u2'),
+])
+
+WTHOR_HEADER_BYTES = 16
+WTHOR_DTYPE = np.dtype([
+    ('tournament',   '<u2'),
+    ('black_player', '<u2'),
+    ('white_player', '<u2'),
+    ('black_score',  'u1'),
+    ('theoretical',  'u1'),
+    ('moves',        'u1', (60,)),   # 10 * row + column, 1-based; 0 after the end
+])
+
+
+def game_record(moves: list[int], black_score: int | None = None, **meta) -> np.ndarray:
+    """
+    One archive record for `moves`. Without `black_score` the game is
+    replayed to count it; `meta` sets the remaining fields.
+    """
+    if len(moves) > 60:
+        raise ValueError(f"a game has at most 60 moves, got {len(moves)}")
+    rec = np.zeros(1, dtype=GAME_DTYPE)
+    rec['moves'] = NO_SQUARE
+    rec['moves'][0, :len(moves)] = moves
+    rec['n_moves'] = len(moves)
+    if black_score is None:
+        b = Board.start_pos()
+        for _ in replay(moves, b):
+            pass
+        black_score = b.count(1)
+    rec['black_score'] = black_score
+    rec['theoretical'] = meta.pop('theoretical', 255)
+    for field, value in meta.items():
+        rec[field] = value
+    return rec
+
+
+class ArchiveWriter:
+    """Append game records to an archive, writing the header when it is new."""
+    def __init__(self, path: str):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, 'ab')
+        if new:
+            self._f.write(ARCHIVE_MAGIC)
+        self.count = 0
+
+    def write(self, records: np.ndarray) -> None:
+        self._f.write(np.asarray(records, dtype=GAME_DTYPE).tobytes())
+        self.count += len(records)
+
+    def write_game(self, moves: list[int], black_score: int | None = None, **meta) -> None:
+        self.write(game_record(moves, black_score, **meta))
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_archive(path: str) -> np.ndarray:
+    """Memory-map an archive as a read-only record array."""
+    with open(path, 'rb') as f:
+        if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"{path}: not a game archive")
+    n = (os.path.getsize(path) - len(ARCHIVE_MAGIC)) // GAME_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, dtype=GAME_DTYPE)
+    return np.memmap(path, dtype=GAME_DTYPE, mode='r',
+                     offset=len(ARCHIVE_MAGIC), shape=(n,))
+
+
+def select_games(games: np.ndarray, player: int | None = None,
+                 min_score: int | None = None, max_score: int | None = None) -> np.ndarray:
+    """Indices of games played by `player` (either colour) with a black score in range."""
+    keep = np.ones(len(games), dtype=bool)
+    if player is not None:
+        keep &= (games['black_player'] == player) | (games['white_player'] == player)
+    if min_score is not None:
+        keep &= games['black_score'] >= min_score
+    if max_score is not None:
+        keep &= games['black_score'] <= max_score
+    return np.flatnonzero(keep)
+
+
+def game_moves(record) -> list[int]:
+    return [int(m) for m in record['moves'][:record['n_moves']]]
+
+
+def iter_positions(games: np.ndarray, indices=None) -> Iterator[tuple[Board, int, int]]:
+    """
+    Replay the selected games lazily, yielding (board, player, move) before
+    every move. The board is reused and mutated between steps.
+    """
+    for i in (range(len(games)) if indices is None else indices):
+        yield from replay(game_moves(games[i]))
+
+
+def archive_positions(games: np.ndarray, indices=None) -> Iterator[np.ndarray]:
+    """Labelled positions (position_utils format), one array per selected game."""
+    for i in (range(len(games)) if indices is None else indices):
+        yield positions_from_game(game_moves(games[i]))
+
+
+def export_positions(games: np.ndarray, path: str, indices=None) -> int:
+    """Append the labelled positions of the selected games to a position file."""
+    with PositionWriter(path) as w:
+        for positions in archive_positions(games, indices):
+            w.write(positions)
+        return w.count
+
+
+def read_wthor(path: str) -> np.ndarray:
+    """Parse a WTHOR `.wtb` file into archive records."""
+    with open(path, 'rb') as f:
+        header = f.read(WTHOR_HEADER_BYTES)
+        data = f.read()
+    raw = np.frombuffer(data, dtype=WTHOR_DTYPE,
+                        count=len(data) // WTHOR_DTYPE.itemsize)
+    if len(header) < WTHOR_HEADER_BYTES:
+        raise ValueError(f"{path}: truncated WTHOR header")
+    n_games = int.from_bytes(header[4:8], 'little')
+    if header[12] not in (0, 8) or len(raw) < n_games:
+        raise ValueError(f"{path}: not an 8x8 WTHOR game file")
+    raw = raw[:n_games]
+
+    moves = raw['moves'].astype(np.int64)
+    row, col = moves // 10, moves % 10
+    squares = np.where(moves > 0, (row - 1) * 8 + (col - 1), NO_SQUARE)
+    if np.any((moves > 0) & ((row < 1) | (row > 8) | (col < 1) | (col > 8))):
+        raise ValueError(f"{path}: bad move code")
+
+    out = np.zeros(n_games, dtype=GAME_DTYPE)
+    out['moves'] = squares
+    out['n_moves'] = (moves > 0).sum(axis=1)
+    for field in ('black_score', 'theoretical', 'black_player',
+                  'white_player', 'tournament'):
+        out[field] = raw[field]
+    out['year'] = int.from_bytes(header[10:12], 'little')
+    return out
+
+
+def import_wthor(paths: list[str], archive: str) -> int:
+    """Append the games of WTHOR files to `archive`; returns the number added."""
+    with ArchiveWriter(archive) as w:
+        for path in paths:
+            w.write(read_wthor(path))
+        return w.count
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        sys.exit("usage: python archive_utils.py ARCHIVE FILE.wtb [...]")
+    added = import_wthor(sys.argv[2:], sys.argv[1])
+    print(f"Imported {added} games into {sys.argv[1]}")
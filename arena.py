@@ -0,0 +1,364 @@
+# arena.py
+
+import os
+import math
+import time
+import random
+import argparse
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from board import Board
+import eval_utils
+import search
+from search import INF, negamax, iterative_deepening
+from search_jit import DISC_SCORE
+from tt_utils import TranspositionTable
+from order_utils import new_killers, new_history
+from pattern_utils import DEFAULT_PATTERN_FILE, NO_PATTERNS, load_pattern_weights
+from symmetry_utils import canonical
+from archive_utils import ArchiveWriter
+from generate_book import disc_units
+
+# Headless engine-vs-engine matches. Games run one per process on a
+# process pool, each engine searching serially, and every opening is
+# played twice with colours swapped. Finished games go to a binary game
+# archive (archive_utils) with the engines as players 0 and 1, and the
+# match stops as soon as a sequential probability ratio test decides
+# between elo0 and elo1.
+#
+# Engines always search serially, one core per game: a parallel search
+# would start a SearchPool per game process, with its own shared TT.
+
+ARENA_TT_MB = 16
+# Search backends: 'jit' is the compiled search (search.py), 'python' a
+# plain alpha-beta over Board with the same eval, to see what the
+# compiled kernels' speed is worth in games
+BACKENDS = ('jit', 'python')
+
+
+class EngineConfig:
+    """
+    One arena engine: `time` seconds per move or a fixed `depth`, the
+    pattern weight file (None for the square-weight eval), and the search
+    `backend` (see BACKENDS).
+    """
+    def __init__(self, name: str, time: float | None = 0.1, depth: int | None = None,
+                 patterns: str | None = DEFAULT_PATTERN_FILE,
+                 backend: str = 'jit'):
+        if (time is None) == (depth is None):
+            raise ValueError("give exactly one of time and depth")
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        self.name = name
+        self.time = time
+        self.depth = depth
+        self.patterns = patterns
+        self.backend = backend
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "EngineConfig":
+        """Build from 'key=value,...', e.g. 'depth=6,patterns=none,backend=python'."""
+        kw = {}
+        for item in filter(None, spec.split(',')):
+            key, _, value = item.partition('=')
+            if key == 'time':
+                kw['time'], kw['depth'] = float(value), None
+            elif key == 'depth':
+                kw['depth'], kw['time'] = int(value), None
+            elif key == 'patterns':
+                kw['patterns'] = None if value.lower() == 'none' else value
+            elif key == 'backend':
+                kw['backend'] = value
+            else:
+                raise ValueError(f"unknown engine option {key!r}")
+        return cls(name, **kw)
+
+    def __repr__(self) -> str:
+        limit = f"time={self.time}" if self.depth is None else f"depth={self.depth}"
+        return f"{self.name}({limit}, patterns={self.patterns}, backend={self.backend})"
+
+
+# Per-process engine state: each engine keeps its own TT, move-ordering
+# tables (killers, history) and eval weights
+_tables: dict[str, TranspositionTable] = {}
+_ordering: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+_weights: dict[str | None, np.ndarray] = {}
+
+
+def _activate(engine: EngineConfig) -> None:
+    if engine.name not in _tables:
+        _tables[engine.name] = TranspositionTable(ARENA_TT_MB)
+        _ordering[engine.name] = new_killers(), new_history()
+    if engine.patterns not in _weights:
+        _weights[engine.patterns] = (NO_PATTERNS if engine.patterns is None
+                                     else load_pattern_weights(engine.patterns))
+    search.trans_table = _tables[engine.name]
+    search.killers, search.history = _ordering[engine.name]
+    eval_utils.pattern_weights = _weights[engine.patterns]
+
+
+def _fixed_depth_move(board: Board, player: int, depth: int) -> int:
+    best, alpha = None, -INF
+    for mv in board.legal_moves(player):
+        board.apply_move(mv, player)
+        score = -negamax(board, -player, depth - 1, -INF, -alpha, ply=1)
+        board.undo()
+        if best is None or score > alpha:
+            best, alpha = mv, score
+    return best
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def _python_negamax(b: Board, player: int, depth: int, alpha: int, beta: int,
+                    deadline: float) -> int:
+    """Fail-hard alpha-beta over Board, without TT or move ordering."""
+    if time.monotonic() > deadline:
+        raise _OutOfTime
+    moves = b.legal_moves(player)
+    if not moves:
+        if not b.legal_moves(-player):
+            return (b.count(player) - b.count(-player)) * DISC_SCORE
+        return -_python_negamax(b, -player, depth, -beta, -alpha, deadline)
+    if depth == 0:
+        return eval_utils.evaluate(b, player)
+    for mv in moves:
+        b.apply_move(mv, player)
+        try:
+            score = -_python_negamax(b, -player, depth - 1, -beta, -alpha, deadline)
+        finally:
+            b.undo()
+        if score > alpha:
+            alpha = score
+            if alpha >= beta:
+                break
+    return alpha
+
+
+def _python_root(board: Board, player: int, depth: int, deadline: float) -> int:
+    best, alpha = None, -INF
+    for mv in board.legal_moves(player):
+        board.apply_move(mv, player)
+        try:
+            score = -_python_negamax(board, -player, depth - 1, -INF, -alpha, deadline)
+        finally:
+            board.undo()
+        if best is None or score > alpha:
+            best, alpha = mv, score
+    return best
+
+
+def _python_move(engine: EngineConfig, board: Board, player: int) -> int:
+    """The 'python' backend: fixed depth, or iterative deepening to the deadline."""
+    if engine.depth is not None:
+        return _python_root(board, player, engine.depth, math.inf)
+    deadline = time.monotonic() + engine.time
+    best = board.legal_moves(player)[0]
+    try:
+        for depth in range(1, board.empties() + 1):
+            best = _python_root(board, player, depth, deadline)
+    except _OutOfTime:
+        pass
+    return best
+
+
+def engine_move(engine: EngineConfig, board: Board, player: int) -> int:
+    _activate(engine)
+    if engine.backend == 'python':
+        return _python_move(engine, board, player)
+    if engine.depth is not None:
+        return _fixed_depth_move(board, player, engine.depth)
+    return iterative_deepening(board, player, engine.time, mode='serial')
+
+
+def play_game(opening: list[int], black: EngineConfig,
+              white: EngineConfig) -> tuple[list[int], int, int]:
+    """Play out `opening` with the two engines; returns (moves, black discs, white discs)."""
+    b, player = Board.start_pos(), 1
+    moves = list(opening)
+    for mv in moves:
+        if not b.legal_moves(player):
+            player = -player
+        b.apply_move(mv, player)
+        player = -player
+    while True:
+        if not b.legal_moves(player):
+            if not b.legal_moves(-player):
+                return moves, b.count(1), b.count(-1)
+            player = -player
+        mv = engine_move(black if player == 1 else white, b, player)
+        b.apply_move(mv, player)
+        moves.append(mv)
+        player = -player
+
+
+def _play_task(args) -> tuple[int, bool, list[int], int, int]:
+    game, a_black, opening, a, b = args
+    black, white = (a, b) if a_black else (b, a)
+    return (game, a_black) + play_game(opening, black, white)
+
+
+def opening_set(count: int, plies: int = 6, seed: int = 0,
+                max_discs: float = 2.0, depth: int = 4) -> list[list[int]]:
+    """
+    `count` distinct random openings of `plies` moves whose side to move
+    scores within `max_discs` at `depth` with the active eval (see
+    `disc_units`): roughly balanced starts, deduplicated up to symmetry.
+    """
+    max_score = max_discs * disc_units()
+    rng = random.Random(seed)
+    openings, seen = [], set()
+    attempts = 0
+    while len(openings) < count:
+        attempts += 1
+        if attempts > 1000 * count:
+            raise ValueError("could not find enough balanced openings")
+        b, player, moves = Board.start_pos(), 1, []
+        for _ in range(plies):
+            legal = b.legal_moves(player)
+            if not legal:
+                break
+            mv = rng.choice(legal)
+            b.apply_move(mv, player)
+            moves.append(mv)
+            player = -player
+        if len(moves) < plies or not b.legal_moves(player):
+            continue
+        key = canonical(np.uint64(b.black), np.uint64(b.white))[:2]
+        if key in seen:
+            continue
+        if abs(negamax(b, player, depth, -INF, INF)) > max_score:
+            continue
+        seen.add(key)
+        openings.append(moves)
+    return openings
+
+
+def elo_to_score(elo: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    Log-likelihood ratio of elo1 against elo0 for a W/D/L record, with the
+    normal approximation to the trinomial (as used by fishtest). Empty
+    outcome classes count as half a game so one-sided records still move.
+    """
+    if wins + draws + losses == 0:
+        return 0.0
+    wins, draws, losses = (max(c, 0.5) for c in (wins, draws, losses))
+    n = wins + draws + losses
+    score = (wins + 0.5 * draws) / n
+    var = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2
+           + losses * score ** 2) / n
+    s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+    return (s1 - s0) * (2 * score - s0 - s1) * n / (2 * var)
+
+
+def sprt_bounds(alpha: float, beta: float) -> tuple[float, float]:
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+class MatchResult:
+    def __init__(self):
+        self.wins = self.draws = self.losses = 0
+        self.llr = 0.0
+        self.decision: str | None = None   # 'H0', 'H1' or None if undecided
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def add(self, disc_diff: int) -> None:
+        """Count one game by A's final disc difference."""
+        if disc_diff > 0:
+            self.wins += 1
+        elif disc_diff == 0:
+            self.draws += 1
+        else:
+            self.losses += 1
+
+    def __repr__(self) -> str:
+        return (f"+{self.wins} ={self.draws} -{self.losses} "
+                f"LLR {self.llr:.2f} {self.decision or 'undecided'}")
+
+
+def run_match(a: EngineConfig, b: EngineConfig, openings: list[list[int]],
+              log: str | None = None, workers: int | None = None,
+              elo0: float = 0.0, elo1: float = 10.0, alpha: float = 0.05,
+              beta: float = 0.05, verbose: bool = False) -> MatchResult:
+    """
+    Play every opening twice (A as black, then as white) on `workers`
+    processes, logging finished games to the archive `log`, until the
+    openings run out or SPRT(elo0, elo1) accepts a hypothesis about A's
+    Elo over B.
+    """
+    workers = workers or os.cpu_count() or 1
+    lower, upper = sprt_bounds(alpha, beta)
+    tasks = [(2 * i + k, k == 0, opening, a, b)
+             for i, opening in enumerate(openings) for k in range(2)]
+    result = MatchResult()
+    writer = ArchiveWriter(log) if log else None
+    ctx = multiprocessing.get_context('forkserver')
+    executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=ctx)
+    try:
+        queue = iter(tasks)
+        running = set()
+        for task in queue:
+            running.add(executor.submit(_play_task, task))
+            if len(running) >= 2 * workers:
+                break
+        while running:
+            finished, running = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for fut in finished:
+                game, a_black, moves, black_discs, white_discs = fut.result()
+                diff = black_discs - white_discs
+                result.add(diff if a_black else -diff)
+                if writer:
+                    writer.write_game(moves, black_discs, tournament=game // 2,
+                                      black_player=0 if a_black else 1,
+                                      white_player=1 if a_black else 0)
+                result.llr = sprt_llr(result.wins, result.draws, result.losses, elo0, elo1)
+                if result.llr <= lower:
+                    result.decision = 'H0'
+                elif result.llr >= upper:
+                    result.decision = 'H1'
+                if verbose:
+                    print(f"game {result.games}: {result}")
+            if result.decision:
+                break
+            for task in queue:
+                running.add(executor.submit(_play_task, task))
+                if len(running) >= 2 * workers:
+                    break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if writer:
+            writer.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engine-vs-engine match with SPRT.")
+    parser.add_argument("--a", default="time=0.1", help="engine A, e.g. 'time=0.1'")
+    parser.add_argument("--b", default="time=0.1,patterns=none", help="engine B")
+    parser.add_argument("--games", type=int, default=1000, help="maximum games (pairs x 2)")
+    parser.add_argument("--plies", type=int, default=6, help="random opening length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--log", default="arena.bin", help="game archive to append to")
+    args = parser.parse_args()
+
+    a = EngineConfig.parse("A", args.a)
+    b = EngineConfig.parse("B", args.b)
+    print(f"{a} vs {b}")
+    openings = opening_set(args.games // 2, args.plies, args.seed)
+    result = run_match(a, b, openings, args.log, args.workers,
+                       args.elo0, args.elo1, verbose=True)
+    print(f"Final: {result}")
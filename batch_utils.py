@@ -0,0 +1,110 @@
+# batch_utils.py
+
+import numpy as np
+from numba import njit, prange, uint64
+from jit_utils import moves_bb, flips_bb, popcount, ONE
+from eval_utils import static_eval
+from pattern_utils import N_INST, INST_OFFSET, pattern_indices, pattern_phase
+import eval_utils
+
+# Batch versions of the per-position kernels for offline jobs (book
+# building, tuning, analysis). Positions are parallel uint64 arrays of
+# (us, them) bitboards in Board layout, `us` to move; the loops run on all
+# cores with prange.
+
+
+@njit(parallel=True, cache=True)
+def _moves_kernel(us, them, out):
+    for i in prange(us.shape[0]):
+        out[i] = moves_bb(us[i], them[i])
+
+
+@njit(parallel=True, cache=True)
+def _flips_kernel(us, them, squares, out):
+    for i in prange(us.shape[0]):
+        out[i] = flips_bb(us[i], them[i], ONE << uint64(63 - squares[i]))
+
+
+@njit(parallel=True, cache=True)
+def _eval_kernel(us, them, weights, out):
+    for i in prange(us.shape[0]):
+        row = np.zeros(2 * N_INST, dtype=np.int32)
+        if weights.shape[0] > 0:
+            pattern_indices(us[i], them[i], row)
+        out[i] = static_eval(us[i], them[i], row, 0, weights)
+
+
+@njit(parallel=True, cache=True)
+def _features_kernel(us, them, out):
+    for i in prange(us.shape[0]):
+        row = np.zeros(2 * N_INST, dtype=np.int32)
+        pattern_indices(us[i], them[i], row)
+        for k in range(N_INST):
+            out[i, k] = INST_OFFSET[k] + row[k]
+
+
+@njit(parallel=True, cache=True)
+def _phases_kernel(us, them, n_phases, out):
+    for i in prange(us.shape[0]):
+        out[i] = pattern_phase(popcount(us[i] | them[i]), n_phases)
+
+
+def _as_positions(us, them) -> tuple[np.ndarray, np.ndarray]:
+    us = np.ascontiguousarray(us, dtype=np.uint64)
+    them = np.ascontiguousarray(them, dtype=np.uint64)
+    if us.ndim != 1 or us.shape != them.shape:
+        raise ValueError(f"expected two 1-D arrays of equal length, got {us.shape} and {them.shape}")
+    return us, them
+
+
+def batch_moves(us, them) -> np.ndarray:
+    """Legal-move bitboards of `us` for each position."""
+    us, them = _as_positions(us, them)
+    out = np.empty(us.shape[0], dtype=np.uint64)
+    _moves_kernel(us, them, out)
+    return out
+
+
+def batch_flips(us, them, squares) -> np.ndarray:
+    """Bitboards of discs flipped when `us` plays square index `squares[i]` (0 = A8)."""
+    us, them = _as_positions(us, them)
+    squares = np.ascontiguousarray(squares, dtype=np.int64)
+    if squares.shape != us.shape:
+        raise ValueError(f"expected {us.shape[0]} squares, got {squares.shape}")
+    if squares.size and (squares.min() < 0 or squares.max() > 63):
+        raise ValueError("square indices must be in 0..63")
+    out = np.empty(us.shape[0], dtype=np.uint64)
+    _flips_kernel(us, them, squares, out)
+    return out
+
+
+def batch_evaluate(us, them, weights=None) -> np.ndarray:
+    """
+    Static evaluation of each position from `us`'s side, as `evaluate`
+    would score it; `weights` overrides the loaded pattern weights.
+    """
+    us, them = _as_positions(us, them)
+    if weights is None:
+        weights = eval_utils.pattern_weights
+    out = np.empty(us.shape[0], dtype=np.int64)
+    _eval_kernel(us, them, weights, out)
+    return out
+
+
+def batch_pattern_features(us, them) -> np.ndarray:
+    """
+    (n, N_INST) column indices into a pattern weight row for each position,
+    `us` to move: the weights `pattern_score` would sum at ply 0.
+    """
+    us, them = _as_positions(us, them)
+    out = np.empty((us.shape[0], N_INST), dtype=np.int64)
+    _features_kernel(us, them, out)
+    return out
+
+
+def batch_phases(us, them, n_phases: int) -> np.ndarray:
+    """Pattern weight-table phase of each position (see pattern_phase)."""
+    us, them = _as_positions(us, them)
+    out = np.empty(us.shape[0], dtype=np.int64)
+    _phases_kernel(us, them, n_phases, out)
+    return out
@@ -0,0 +1,73 @@
+# benchmark_parallel.py
+
+import os
+import time
+import random
+import search
+from search import SearchPool, _search_root, _PARALLEL_ROOTS
+from search_jit import ST_NODES
+from compare_speed import random_boards
+
+
+def core_counts() -> list[int]:
+    """1, 2, 4, ... up to the number of CPUs (always including it)."""
+    n = os.cpu_count() or 1
+    counts, c = [], 1
+    while c < n:
+        counts.append(c)
+        c *= 2
+    return counts + [n]
+
+
+def run_iteration(fn, pool: SearchPool, board, depth: int) -> tuple[float, int]:
+    """Time one root iteration at `depth` from an empty TT; returns (seconds, nodes)."""
+    moves = board.legal_moves(1)
+    slot = pool.acquire_slot()
+    try:
+        search.trans_table.clear()
+        t0 = time.monotonic()
+        if fn is _search_root:
+            _, _, _, counts = _search_root(board, 1, moves, depth, -search.INF,
+                                           search.INF, pool.stop_flags[slot:slot+1])
+        else:
+            _, _, _, counts = fn(pool, slot, board, 1, moves, depth,
+                                 time.monotonic() + 3600)
+        return time.monotonic() - t0, int(counts[ST_NODES])
+    finally:
+        pool.release_slot(slot)
+
+
+def benchmark(depth: int = 7, count: int = 5, moves: int = 10) -> list[dict]:
+    """
+    Fixed-depth root iterations per parallel mode and worker count.
+    Speedup and node overhead are relative to the serial search of the
+    same positions.
+    """
+    random.seed(depth)
+    positions = [b for b in random_boards(count=count, moves=moves)
+                 if b.legal_moves(1)]
+    rows = []
+    for workers in core_counts():
+        pool = SearchPool(workers)
+        try:
+            serial = [run_iteration(_search_root, pool, b, depth) for b in positions]
+            s_time = sum(t for t, _ in serial)
+            s_nodes = sum(n for _, n in serial)
+            for mode, fn in _PARALLEL_ROOTS.items():
+                runs = [run_iteration(fn, pool, b, depth) for b in positions]
+                p_time = sum(t for t, _ in runs)
+                p_nodes = sum(n for _, n in runs)
+                rows.append({"mode": mode, "workers": workers,
+                             "time_s": p_time, "nodes": p_nodes,
+                             "speedup": s_time / p_time,
+                             "node_overhead": p_nodes / s_nodes})
+        finally:
+            pool.shutdown()
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"{'mode':>6} {'workers':>7} {'time_s':>8} {'nodes':>10} {'speedup':>8} {'overhead':>8}")
+    for r in benchmark():
+        print(f"{r['mode']:>6} {r['workers']:>7} {r['time_s']:>8.3f} {r['nodes']:>10} "
+              f"{r['speedup']:>8.2f} {r['node_overhead']:>8.2f}")
@@ -1,49 +1,258 @@
 # benchmark_search.py
 
+import os
+import sys
+import json
 import time
-import random
-import pandas as pd
+import argparse
+import platform
+import numpy as np
+import numba
 from board import Board
-from search import iterative_deepening
+import eval_utils
+import search
+from moves_utils import get_moves
+from jit_utils import moves_bb
+from eval_utils import evaluate, evaluate_bb
+from batch_utils import batch_moves, batch_evaluate
+from perft_utils import START_PERFT, perft, perft_board
 
+# Benchmark suite with machine-readable output. Every metric is a flat
+# "group.backend.name" key whose suffix says how it is compared against
+# a stored baseline:
+#   *.leaves  - perft counts, must match exactly (a correctness check)
+#   *.nodes   - fixed-depth search tree sizes, lower is better
+#   *.seconds - time to reach a fixed depth, lower is better
+#   *_per_s   - throughput, higher is better
+# Anything else (e.g. the TT hit rate) is reported but not compared.
+# The searches are deterministic iterative deepening to SEARCH_DEPTH
+# (search_position with deterministic=True), serial and on a pool, so
+# node counts move only when search or eval behaviour changes, and the
+# parallel ones not even with the number of workers; times move with the
+# machine too, hence the threshold. The parallel tree is several times
+# the serial one (see _deterministic_root): compare each against its own
+# baseline, not against each other. Times and throughput are only compared
+# against a baseline from the same machine type and worker count; the
+# committed benchmark_baseline.json holds just the counts (--counts-only),
+# and --save-baseline without it keeps a full local baseline.
 
-def generate_positions(count: int = 10, moves: int = 6) -> list[Board]:
-    """
-    Generate `count` random midgame positions by playing `moves` random legal moves.
-    Returns a list of Board instances.
-    """
-    boards = []
-    for _ in range(count):
-        b = Board.start_pos()
-        player = 1
-        for __ in range(moves):
-            mlist = b.legal_moves(player)
-            if not mlist:
-                player *= -1
-                continue
-            mv = random.choice(mlist)
-            b.apply_move(mv, player)
-            player *= -1
-        boards.append(b)
-    return boards
-
-
-def benchmark(time_per_search: float = 0.5, count: int = 10, moves: int = 6) -> pd.DataFrame:
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+BOARD_PERFT_DEPTH = 6
+JIT_PERFT_DEPTH = 9
+SEARCH_DEPTH = 7
+MIN_TIME = 0.5   # seconds per throughput measurement
+
+# Pinned search positions (flat-FEN, side to move), 10 to 30 plies in
+POSITIONS = [
+    ("..........X........XO.....XOO.....OXO....O.X....O..XO...........", 1),
+    (".......X......X..XXXXX.....XXX..OOOOOO....O..X..................", 1),
+    ("..........X..O...OX.OOX..XXXXO..OOOOOO......OX........X........X", 1),
+    ("...XO.O..X.XXO.X..X.XOOO..OOOXX...OOX....O.XO...O....O..........", 1),
+    (".........O...O....OOOO.OOOOOXOOX..OXXOX...O.XXX...OXX.X.....X.X.", 1),
+    (".O...O....OOXO...XOXXO...OOOOOO....OOOOO.XXXOO.O...XX..O..O.XX..", 1),
+]
+
+
+def pinned_positions() -> list[tuple[Board, int]]:
+    return [(Board.from_flat_fen(fen), player) for fen, player in POSITIONS]
+
+
+def _rate(fn, items: int = 1) -> float:
+    """Calls of `fn` (each handling `items` units) per second over MIN_TIME."""
+    fn()   # warm-up, including any JIT compilation
+    calls = 0
+    t0 = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= MIN_TIME:
+            return calls * items / elapsed
+
+
+def bench_perft(results: dict) -> None:
+    b = Board.start_pos()
+    t0 = time.perf_counter()
+    leaves = perft(b, 1, BOARD_PERFT_DEPTH)
+    elapsed = time.perf_counter() - t0
+    results[f"perft.board.d{BOARD_PERFT_DEPTH}.leaves"] = leaves
+    results["perft.board.leaves_per_s"] = leaves / elapsed
+
+    perft_board(b, 1, 1)   # compile
+    t0 = time.perf_counter()
+    leaves = perft_board(b, 1, JIT_PERFT_DEPTH)
+    elapsed = time.perf_counter() - t0
+    results[f"perft.jit.d{JIT_PERFT_DEPTH}.leaves"] = leaves
+    results["perft.jit.leaves_per_s"] = leaves / elapsed
+
+
+def _search_metrics(results: dict, name: str, pool: search.SearchPool | None) -> None:
+    mode = 'serial' if pool is None else 'ybwc'
+    total = search.SearchResult()   # every iteration of every position
+    elapsed = 0.0
+    for b, player in pinned_positions():
+        result = search.search_position(b, player, None, pool, mode,
+                                        max_depth=SEARCH_DEPTH, deterministic=True)
+        for it in result.iterations:
+            total.add(it)
+        elapsed += result.elapsed
+    results[f"search.{name}.d{SEARCH_DEPTH}.nodes"] = total.nodes
+    results[f"search.{name}.d{SEARCH_DEPTH}.seconds"] = elapsed
+    results[f"search.{name}.nodes_per_s"] = total.nodes / elapsed
+    results[f"search.{name}.tt_hit_rate"] = total.tt_hit_rate
+    results[f"search.{name}.cutoff_rate"] = total.cutoff_rate
+    results[f"search.{name}.first_move_cutoff_rate"] = total.first_move_cutoff_rate
+
+
+def bench_search(results: dict, workers: int | None = None) -> None:
+    """Nodes and time to SEARCH_DEPTH over the pinned positions, serial and parallel."""
+    b, player = pinned_positions()[0]
+    search.search_position(b, player, None, mode='serial', max_depth=3)   # compile
+    _search_metrics(results, "serial", None)
+    pool = search.SearchPool(workers)
+    try:
+        _search_metrics(results, "parallel", pool)
+    finally:
+        pool.shutdown()
+
+
+def bench_micro(results: dict) -> None:
+    """Move generation and static eval per backend, in positions per second."""
+    sides = [(b, p) for b, p in pinned_positions() for p in (p, -p)]
+    us = np.array([b.black if p == 1 else b.white for b, p in sides], dtype=np.uint64)
+    them = np.array([b.white if p == 1 else b.black for b, p in sides], dtype=np.uint64)
+    pairs = list(zip(us, them))
+    n = len(sides)
+    # batch kernels amortize their call overhead over many positions
+    big = 4096
+    us_big, them_big = np.resize(us, big), np.resize(them, big)
+
+    results["movegen.board.positions_per_s"] = _rate(
+        lambda: [b.legal_moves(p) for b, p in sides], n)
+    results["movegen.legal_moves_jit.positions_per_s"] = _rate(
+        lambda: [get_moves(b, p) for b, p in sides], n)
+    results["movegen.moves_bb.positions_per_s"] = _rate(
+        lambda: [moves_bb(u, t) for u, t in pairs], n)
+    results["movegen.batch.positions_per_s"] = _rate(
+        lambda: batch_moves(us_big, them_big), big)
+
+    results["eval.evaluate.positions_per_s"] = _rate(
+        lambda: [evaluate(b, p) for b, p in sides], n)
+    results["eval.evaluate_bb.positions_per_s"] = _rate(
+        lambda: [evaluate_bb(u, t) for u, t in pairs], n)
+    results["eval.batch.positions_per_s"] = _rate(
+        lambda: batch_evaluate(us_big, them_big), big)
+
+
+def run_benchmarks(workers: int | None = None) -> dict:
+    """All benchmarks: {'meta': {...}, 'metrics': {name: value}}."""
+    metrics: dict = {}
+    bench_perft(metrics)
+    bench_search(metrics, workers)
+    bench_micro(metrics)
+    meta = {"python": platform.python_version(),
+            "numba": numba.__version__,
+            "machine": platform.machine(),
+            "workers": workers or os.cpu_count(),
+            "eval": "patterns" if eval_utils.pattern_weights.shape[0] else "squares",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {"meta": meta, "metrics": metrics}
+
+
+def known_perft() -> dict:
+    """The published start-position perft counts, as baseline metrics."""
+    return {f"perft.board.d{BOARD_PERFT_DEPTH}.leaves": START_PERFT[BOARD_PERFT_DEPTH],
+            f"perft.jit.d{JIT_PERFT_DEPTH}.leaves": START_PERFT[JIT_PERFT_DEPTH]}
+
+
+def is_timing(name: str) -> bool:
+    return name.endswith(".seconds") or name.endswith("_per_s")
+
+
+def counts_only(metrics: dict) -> dict:
+    """The machine-independent metrics: perft leaves and node counts."""
+    return {k: v for k, v in metrics.items() if k.endswith(".leaves") or k.endswith(".nodes")}
+
+
+def same_machine(meta: dict, base_meta: dict) -> bool:
+    """Whether timings from `meta` can be held against `base_meta`."""
+    return all(meta.get(k) == base_meta.get(k) for k in ("machine", "workers"))
+
+
+def compare(metrics: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            timings: bool = True) -> list[str]:
     """
-    Run `iterative_deepening` on random positions and record elapsed times.
-    Returns a pandas DataFrame with columns: position, elapsed_s.
+    Regressions of `metrics` against `baseline` (both name -> value), as
+    messages; metrics missing from either side are skipped, and so are
+    times and throughput unless `timings`.
     """
-    positions = generate_positions(count=count, moves=moves)
-    results = []
-    for i, b in enumerate(positions):
-        t0 = time.monotonic()
-        _ = iterative_deepening(b, 1, time_limit=time_per_search)
-        elapsed = time.monotonic() - t0
-        results.append({"position": i, "elapsed_s": elapsed})
-    return pd.DataFrame(results)
+    problems = []
+    for name, base in baseline.items():
+        if name not in metrics or (is_timing(name) and not timings):
+            continue
+        value = metrics[name]
+        if name.endswith(".leaves"):
+            if value != base:
+                problems.append(f"{name}: {value} != {base}")
+        elif name.endswith(".nodes") or name.endswith(".seconds"):
+            if value > base * (1 + threshold):
+                problems.append(f"{name}: {value} vs {base} (+{value / base - 1:.0%})")
+        elif name.endswith("_per_s"):
+            if value < base * (1 - threshold):
+                problems.append(f"{name}: {value:.0f} vs {base:.0f} ({value / base - 1:.0%})")
+    return problems
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
 
 
 if __name__ == "__main__":
-    df = benchmark(time_per_search=0.5, count=10, moves=6)
-    print(df.to_string(index=False))
-    print(f"\nAverage time: {df['elapsed_s'].mean():.3f}s")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Perft, search and eval benchmarks.")
+    parser.add_argument("-o", "--output", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown / node growth")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="pool size of the parallel search benchmark")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--counts-only", action="store_true",
+                        help="with --save-baseline, store only the machine-independent counts")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.workers)
+    for name, value in sorted(results["metrics"].items()):
+        print(f"{name:<42} {value:>16,.0f}" if value >= 1000 else f"{name:<42} {value:>16.3f}")
+    if args.output:
+        save_results(results, args.output)
+    problems = compare(results["metrics"], known_perft())
+    if args.save_baseline and not problems:
+        if args.counts_only:
+            results = {"meta": {k: results["meta"][k] for k in ("python", "numba", "eval")},
+                       "metrics": counts_only(results["metrics"])}
+        save_results(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+    elif not args.save_baseline:
+        try:
+            baseline = load_results(args.baseline)
+        except FileNotFoundError:
+            sys.exit(f"no baseline at {args.baseline}; run with --save-baseline")
+        timings = same_machine(results["meta"], baseline["meta"])
+        if not timings and any(is_timing(k) for k in baseline["metrics"]):
+            print("Baseline is from another machine type or worker count: "
+                  "comparing counts only")
+        problems += compare(results["metrics"], baseline["metrics"], args.threshold, timings)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    if not problems and not args.save_baseline:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    sys.exit(1 if problems else 0)
@@ -1,5 +1,30 @@
 # board.py
 
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+# Square index i (0 = A8, row-major) lives at bit (63 - i), so the A-file
+# holds bits 63, 55, ..., 7 and the H-file bits 56, 48, ..., 0.
+NOT_A_FILE = 0x7F7F7F7F7F7F7F7F
+NOT_H_FILE = 0xFEFEFEFEFEFEFEFE
+
+# (shift, wrap mask) per direction; positive shifts are left shifts.
+# Directions: N, NE, E, SE, S, SW, W, NW
+DIRECTIONS = (
+    (8, FULL_MASK),
+    (7, NOT_A_FILE),
+    (-1, NOT_A_FILE),
+    (-9, NOT_A_FILE),
+    (-8, FULL_MASK),
+    (-7, NOT_H_FILE),
+    (1, NOT_H_FILE),
+    (9, NOT_H_FILE),
+)
+
+
+def _shift(bb: int, shift: int, mask: int) -> int:
+    """Shift a bitboard one step in a direction, dropping file wrap-arounds."""
+    return ((bb << shift) if shift > 0 else (bb >> -shift)) & mask
+
+
 class Board:
     """
     Bitboard-based Othello position using two 64-bit ints.
@@ -47,103 +72,78 @@ class Board:
                 out.append('.')
         return ''.join(out)
 
+    def _sides(self, player: int) -> tuple[int, int]:
+        """Return (us, them) bitboards for `player` (1=black, -1=white)."""
+        if player == 1:
+            return self.black, self.white
+        return self.white, self.black
+
     @staticmethod
     def _directional_fill(gen: int, prop: int, shift: int, mask: int) -> int:
-        """Kogge-Stone bitboard flip propagation helper."""
-        flip = prop & mask & (gen << shift if shift > 0 else gen >> -shift)
-        flip |= prop & mask & (flip << shift if shift > 0 else flip >> -shift)
-        flip |= prop & mask & (flip << shift if shift > 0 else flip >> -shift)
-        return flip
+        """Kogge-Stone occluded fill of `gen` through `prop` in one direction."""
+        prop &= mask
+        if shift > 0:
+            gen |= prop & (gen << shift)
+            prop &= prop << shift
+            gen |= prop & (gen << 2 * shift)
+            prop &= prop << 2 * shift
+            gen |= prop & (gen << 4 * shift)
+        else:
+            shift = -shift
+            gen |= prop & (gen >> shift)
+            prop &= prop >> shift
+            gen |= prop & (gen >> 2 * shift)
+            prop &= prop >> 2 * shift
+            gen |= prop & (gen >> 4 * shift)
+        return gen
+
+    def legal_moves_bb(self, player: int) -> int:
+        """Return the legal moves of `player` as a bitboard (bit 63 - index)."""
+        us, them = self._sides(player)
+        empty = ~(us | them) & FULL_MASK
+        moves = 0
+        for shift, mask in DIRECTIONS:
+            run = self._directional_fill(us, them, shift, mask) & them
+            moves |= _shift(run, shift, mask) & empty
+        return moves
 
     def legal_moves(self, player: int) -> list[int]:
-        """Return list of legal move indices (0–63); empty list means pass, via direct 2D scan."""
-        # Build 2D array for current position
-        board_arr = [['.' for _ in range(8)] for _ in range(8)]
-        for idx in range(64):
-            r, c = divmod(idx, 8)
-            mask = 1 << (63 - idx)
-            if self.black & mask:
-                board_arr[r][c] = 'B'
-            elif self.white & mask:
-                board_arr[r][c] = 'W'
-
-        you = 'B' if player == 1 else 'W'
-        opp = 'W' if player == 1 else 'B'
-        directions = [(-1,0),(-1,1),(0,1),(1,1),(1,0),(1,-1),(0,-1),(-1,-1)]
+        """Return list of legal move indices (0–63); empty list means pass."""
+        bb = self.legal_moves_bb(player)
         moves: list[int] = []
-
-        for r in range(8):
-            for c in range(8):
-                if board_arr[r][c] != '.':
-                    continue
-                legal = False
-                for dr, dc in directions:
-                    nr, nc = r + dr, c + dc
-                    found_opp = False
-                    while 0 <= nr < 8 and 0 <= nc < 8 and board_arr[nr][nc] == opp:
-                        found_opp = True
-                        nr += dr; nc += dc
-                    if found_opp and 0 <= nr < 8 and 0 <= nc < 8 and board_arr[nr][nc] == you:
-                        legal = True
-                        break
-                if legal:
-                    moves.append(r * 8 + c)
+        while bb:
+            bit = bb.bit_length() - 1
+            moves.append(63 - bit)
+            bb ^= 1 << bit
         return moves
 
+    def flips(self, move: int, player: int) -> int:
+        """Return the bitboard of discs flipped by `player` playing `move`."""
+        us, them = self._sides(player)
+        sq = 1 << (63 - move)
+        flipped = 0
+        for shift, mask in DIRECTIONS:
+            run = self._directional_fill(sq, them, shift, mask) & them
+            if run and _shift(run, shift, mask) & us:
+                flipped |= run
+        return flipped
+
     def apply_move(self, move: int, player: int) -> None:
         """
-        Apply a move at index 0–63 for `player` (1=black, -1=white). 
-        Flips captured discs by 2D directional scanning and pushes state for undo.
+        Apply a move at index 0–63 for `player` (1=black, -1=white).
+        Flips captured discs with shift-and-mask fills and pushes state for undo.
         """
         # Save state for undo
         self._history.append((self.black, self.white))
 
-        # Build a 2D array representation
-        board_arr = [['.' for _ in range(8)] for _ in range(8)]
-        for idx in range(64):
-            r, c = divmod(idx, 8)
-            mask = 1 << (63 - idx)
-            if self.black & mask:
-                board_arr[r][c] = 'B'
-            elif self.white & mask:
-                board_arr[r][c] = 'W'
-
-        # Place the new disc
-        mr, mc = divmod(move, 8)
-        you = 'B' if player == 1 else 'W'
-        opp = 'W' if player == 1 else 'B'
-        board_arr[mr][mc] = you
-
-        # Directions: N, NE, E, SE, S, SW, W, NW
-        directions = [(-1,0),(-1,1),(0,1),(1,1),(1,0),(1,-1),(0,-1),(-1,-1)]
-        to_flip = []
-        for dr, dc in directions:
-            line = []
-            r, c = mr + dr, mc + dc
-            # walk in this direction
-            while 0 <= r < 8 and 0 <= c < 8 and board_arr[r][c] == opp:
-                line.append((r,c))
-                r += dr; c += dc
-            # if bounded by a friendly disc, flip
-            if 0 <= r < 8 and 0 <= c < 8 and board_arr[r][c] == you:
-                to_flip.extend(line)
-
-        # Apply flips
-        for r, c in to_flip:
-            board_arr[r][c] = you
-
-        # Rebuild bitboards
-        new_black = 0
-        new_white = 0
-        for r in range(8):
-            for c in range(8):
-                idx = r*8 + c
-                mask = 1 << (63 - idx)
-                if board_arr[r][c] == 'B':
-                    new_black |= mask
-                elif board_arr[r][c] == 'W':
-                    new_white |= mask
-        self.black, self.white = new_black, new_white
+        sq = 1 << (63 - move)
+        flipped = self.flips(move, player)
+        if player == 1:
+            self.black |= sq | flipped
+            self.white &= ~flipped
+        else:
+            self.white |= sq | flipped
+            self.black &= ~flipped
 
     def undo(self) -> None:
         """Undo the last move; restores previous bitboards."""
@@ -151,6 +151,14 @@ class Board:
             raise IndexError("No moves to undo")
         self.black, self.white = self._history.pop()
 
+    def count(self, player: int) -> int:
+        """Return the number of discs owned by `player`."""
+        return (self.black if player == 1 else self.white).bit_count()
+
+    def empties(self) -> int:
+        """Return the number of empty squares."""
+        return 64 - (self.black | self.white).bit_count()
+
 # Quick self-test
 if __name__ == '__main__':
     b = Board.start_pos()
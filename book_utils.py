@@ -0,0 +1,189 @@
+# book_utils.py
+
+import os
+import json
+import random
+import struct
+import numpy as np
+from board import Board
+from symmetry_utils import INVERSE, canonical, transform_square
+
+# Binary opening book: an open-addressing hash table of fixed-size
+# records keyed by the canonical (black, white) bitboards, stored after a
+# small header and memory-mapped on open. A lookup hashes the key and
+# reads one or two records, so neither load time nor RAM grows with the
+# book. Each record keeps up to MAX_CANDIDATES moves (in the canonical
+# orientation) with a score and a play count.
+
+BOOK_MAGIC = b"OTHBOOK1"
+DEFAULT_BOOK = "book.bin"
+MAX_CANDIDATES = 4
+NO_MOVE = 255
+BOOK_DTYPE = np.dtype([
+    ('black',  '<u8'),
+    ('white',  '<u8'),
+    ('moves',  'u1', (MAX_CANDIDATES,)),    # NO_MOVE for unused slots
+    ('scores', '<i4', (MAX_CANDIDATES,)),   # search units, side to move
+    ('counts', '<u4', (MAX_CANDIDATES,)),   # games played with the move
+])
+_HEADER = struct.Struct('<II')               # capacity, entries
+_HEADER_BYTES = len(BOOK_MAGIC) + _HEADER.size
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+def _slot(black: int, white: int, capacity: int) -> int:
+    h = ((black * _MIX) ^ (white + (white << 17))) & _MASK64
+    h ^= h >> 29
+    return (h * _MIX & _MASK64) >> 32 & (capacity - 1)
+
+
+def _canonical(black: int, white: int) -> tuple[int, int, int]:
+    b, w, sym = canonical(np.uint64(black), np.uint64(white))
+    return int(b), int(w), int(sym)
+
+
+def side_to_move(board: Board) -> int:
+    """
+    The side to move in a book position: black with an even disc count
+    (no passes yet), unless that side has to pass.
+    """
+    player = 1 if (board.count(1) + board.count(-1)) % 2 == 0 else -1
+    if not board.legal_moves(player):
+        return -player
+    return player
+
+
+class OpeningBook:
+    """
+    Read-only view of a book table; `OpeningBook.open` memory-maps a file
+    and `OpeningBook.from_entries` builds one in memory.
+    """
+    def __init__(self, table: np.ndarray, entries: int):
+        self.table = table
+        self.entries = entries
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_BOOK) -> "OpeningBook":
+        with open(path, 'rb') as f:
+            magic = f.read(len(BOOK_MAGIC))
+            capacity, entries = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != BOOK_MAGIC or capacity & (capacity - 1):
+            raise ValueError(f"{path}: not an opening book")
+        table = np.memmap(path, dtype=BOOK_DTYPE, mode='r',
+                          offset=_HEADER_BYTES, shape=(capacity,))
+        return cls(table, entries)
+
+    @classmethod
+    def from_entries(cls, entries: dict) -> "OpeningBook":
+        """
+        Build a book from {(black, white): [(move, score, count), ...]} in
+        real orientation; symmetric positions are merged by move. Moves
+        that are not legal for the side to move (see `side_to_move`) are
+        dropped, and so are positions left without any.
+        """
+        merged: dict[tuple[int, int], dict[int, list[int]]] = {}
+        for (black, white), cands in entries.items():
+            board = Board(black, white)
+            legal = set(board.legal_moves(side_to_move(board)))
+            cands = [c for c in cands if c[0] in legal]
+            if not cands:
+                continue
+            b, w, sym = _canonical(black, white)
+            slot = merged.setdefault((b, w), {})
+            for mv, score, count in cands:
+                cm = transform_square(mv, sym)
+                if cm in slot:
+                    slot[cm][0] = max(slot[cm][0], score)
+                    slot[cm][1] += count
+                else:
+                    slot[cm] = [score, count]
+
+        capacity = 8
+        while capacity < 2 * len(merged):
+            capacity *= 2
+        table = np.zeros(capacity, dtype=BOOK_DTYPE)
+        table['moves'] = NO_MOVE
+        for (b, w), cands in merged.items():
+            i = _slot(b, w, capacity)
+            while table['black'][i] or table['white'][i]:
+                i = (i + 1) & (capacity - 1)
+            best = sorted(cands.items(), key=lambda kv: (-kv[1][1], -kv[1][0]))
+            best = best[:MAX_CANDIDATES]
+            table['black'][i] = b
+            table['white'][i] = w
+            for k, (mv, (score, count)) in enumerate(best):
+                table['moves'][i, k] = mv
+                table['scores'][i, k] = score
+                table['counts'][i, k] = count
+        return cls(table, len(merged))
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            f.write(BOOK_MAGIC)
+            f.write(_HEADER.pack(len(self.table), self.entries))
+            f.write(np.ascontiguousarray(self.table).tobytes())
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def lookup(self, board: Board) -> list[tuple[int, int, int]]:
+        """Candidate (move, score, count) tuples for `board`, best first; [] if out of book."""
+        if not self.entries:
+            return []
+        b, w, sym = _canonical(board.black, board.white)
+        capacity = len(self.table)
+        i = _slot(b, w, capacity)
+        while True:
+            rec = self.table[i]
+            rb, rw = int(rec['black']), int(rec['white'])
+            if rb == b and rw == w:
+                break
+            if rb == 0 and rw == 0:
+                return []
+            i = (i + 1) & (capacity - 1)
+        inv = int(INVERSE[sym])
+        return [(transform_square(int(mv), inv), int(score), int(count))
+                for mv, score, count in zip(rec['moves'], rec['scores'], rec['counts'])
+                if mv != NO_MOVE]
+
+    def choose(self, board: Board, player: int, rng: random.Random | None = None) -> int | None:
+        """
+        A legal book move for `player`, drawn with probability proportional
+        to its play count (the best-scored move if none has been played).
+        """
+        legal = set(board.legal_moves(player))
+        cands = [c for c in self.lookup(board) if c[0] in legal]
+        if not cands:
+            return None
+        weights = [count for _, _, count in cands]
+        if sum(weights) == 0:
+            return max(cands, key=lambda c: c[1])[0]
+        return (rng or random).choices([mv for mv, _, _ in cands], weights)[0]
+
+
+def book_from_json(path: str) -> OpeningBook:
+    """Convert an old flat-FEN -> move JSON book (one move per position)."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    entries = {}
+    for fen, mv in data.items():
+        b = Board.from_flat_fen(fen)
+        entries[(b.black, b.white)] = [(int(mv), 0, 0)]
+    return OpeningBook.from_entries(entries)
+
+
+def load_book(path: str = DEFAULT_BOOK) -> OpeningBook:
+    """The book at `path`, or an empty book if there is none."""
+    if os.path.exists(path):
+        return OpeningBook.open(path)
+    return OpeningBook.from_entries({})
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        sys.exit("usage: python book_utils.py BOOK.json BOOK.bin")
+    book = book_from_json(sys.argv[1])
+    book.save(sys.argv[2])
+    print(f"Wrote {len(book)} positions to {sys.argv[2]}")
@@ -0,0 +1,14 @@
+# conftest.py
+
+import pytest
+import search
+from tt_utils import NO_MOVE
+
+
+@pytest.fixture(autouse=True)
+def fresh_search_tables():
+    """Start every test from an empty TT and ordering tables."""
+    search.trans_table.clear()
+    search.killers.fill(NO_MOVE)
+    search.history.fill(0)
+    yield
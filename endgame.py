@@ -0,0 +1,173 @@
+# endgame.py
+
+import numpy as np
+from numba import njit, uint64
+from jit_utils import moves_bb, flips_bb, popcount, bit_index, ZERO, ONE
+from search_jit import (INF, STOP_POLL, ST_NODES, ST_TT_PROBES, ST_TT_HITS,
+                        ST_TT_COLLISIONS, final_score)
+from tt_utils import (EXACT, LOWER, UPPER, NO_MOVE, zobrist, tt_probe, tt_store,
+                      tt_depth, tt_flag, tt_value, tt_move)
+
+# Exact solver for the last empties. Scores are final disc differences in
+# the same DISC_SCORE units as the midgame search, so the two share the TT;
+# solved entries carry SOLVED_DEPTH, deeper than any midgame search.
+SOLVED_DEPTH  = 64
+SMALL_EMPTIES = 4    # at or below this, play empties directly with no move generation
+FASTEST_FIRST = 7    # above this, order by opponent mobility; below, by parity only
+
+# The four 4x4 quadrants; an odd number of empties in a region tends to
+# give the last move there to the side to move.
+QUADRANTS = (uint64(0xF0F0F0F000000000), uint64(0x0F0F0F0F00000000),
+             uint64(0x00000000F0F0F0F0), uint64(0x000000000F0F0F0F))
+
+
+@njit(cache=True)
+def odd_regions(empty):
+    """Union of the quadrants holding an odd number of empties."""
+    odd = ZERO
+    for q in QUADRANTS:
+        if popcount(empty & q) & 1:
+            odd |= q
+    return odd
+
+
+@njit(cache=True, nogil=True)
+def solve_small(us, them, alpha, beta, stats):
+    """
+    Exact search of the last SMALL_EMPTIES squares. Moves are found by
+    trying each empty square's flips, odd parity regions first.
+    """
+    stats[ST_NODES] += 1
+    empty = ~(us | them)
+    if empty == ZERO:
+        return final_score(us, them)
+
+    best = -INF
+    odd = odd_regions(empty)
+    for p in range(2):
+        cand = empty & odd if p == 0 else empty & ~odd
+        while cand != ZERO:
+            sq = cand & (~cand + ONE)
+            cand ^= sq
+            flipped = flips_bb(us, them, sq)
+            if flipped == ZERO:
+                continue
+            score = -solve_small(them ^ flipped, us | sq | flipped,
+                                 -beta, -alpha, stats)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        return best
+
+    if best == -INF:
+        if moves_bb(them, us) == ZERO:
+            return final_score(us, them)
+        return -solve_small(them, us, -beta, -alpha, stats)
+    return best
+
+
+@njit(cache=True, nogil=True)
+def solve_bb(us, them, alpha, beta, tt, gen, stats, stop):
+    """
+    Exact endgame search over raw bitboards, from the side to move.
+    A (-1, 1) window gives a win/loss/draw (WLD) answer; (-INF, INF) the
+    exact final disc difference. Stops like `negamax_bb` when `stop[0]` is set.
+    """
+    stats[ST_NODES] += 1
+    if stats[ST_NODES] & STOP_POLL == 0 and stop[0] != 0:
+        return 0
+    empty = ~(us | them)
+    n_empty = popcount(empty)
+    if n_empty <= SMALL_EMPTIES:
+        return solve_small(us, them, alpha, beta, stats)
+
+    key = zobrist(us, them)
+    orig_alpha = alpha
+    stats[ST_TT_PROBES] += 1
+    data = tt_probe(tt, key)
+    tt_mv = NO_MOVE
+    if data != ZERO:
+        stats[ST_TT_HITS] += 1
+        tt_mv = tt_move(data)
+        if tt_depth(data) >= SOLVED_DEPTH:
+            e_flag = tt_flag(data)
+            e_value = tt_value(data)
+            if e_flag == EXACT:
+                return e_value
+            if e_flag == LOWER and e_value > alpha:
+                alpha = e_value
+            elif e_flag == UPPER and e_value < beta:
+                beta = e_value
+            if alpha >= beta:
+                return e_value
+
+    moves = moves_bb(us, them)
+    if moves == ZERO:
+        if moves_bb(them, us) == ZERO:
+            return final_score(us, them)
+        return -solve_bb(them, us, -beta, -alpha, tt, gen, stats, stop)
+
+    # Order: TT move, then fewest opponent replies (fastest-first) with
+    # ties broken by parity; close to the end, parity alone.
+    n = popcount(moves)
+    sqs = np.empty(n, dtype=np.uint64)
+    keys = np.empty(n, dtype=np.int64)
+    odd = odd_regions(empty)
+    for i in range(n):
+        sq = moves & (~moves + ONE)
+        moves ^= sq
+        sqs[i] = sq
+        k = 0 if (sq & odd) != ZERO else 1
+        if n_empty > FASTEST_FIRST:
+            flipped = flips_bb(us, them, sq)
+            k += 4 * popcount(moves_bb(them ^ flipped, us | sq | flipped))
+        if tt_mv != NO_MOVE and bit_index(sq) == tt_mv:
+            k = -1
+        keys[i] = k
+
+    best = -INF
+    best_mv = NO_MOVE
+    for i in range(n):
+        j = i
+        for m in range(i + 1, n):
+            if keys[m] < keys[j]:
+                j = m
+        sq = sqs[j]
+        sqs[j] = sqs[i]
+        keys[j] = keys[i]
+
+        flipped = flips_bb(us, them, sq)
+        child_us = them ^ flipped
+        child_them = us | sq | flipped
+        if i == 0:
+            score = -solve_bb(child_us, child_them, -beta, -alpha,
+                              tt, gen, stats, stop)
+        else:
+            # principal variation search: prove the rest worse with a null window
+            score = -solve_bb(child_us, child_them, -alpha - 1, -alpha,
+                              tt, gen, stats, stop)
+            if alpha < score < beta:
+                score = -solve_bb(child_us, child_them, -beta, -score,
+                                  tt, gen, stats, stop)
+        if stop[0] != 0:
+            return 0
+        if score > best:
+            best = score
+            best_mv = bit_index(sq)
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+    if best <= orig_alpha:
+        flag = UPPER
+        best_mv = NO_MOVE
+    elif best >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    if tt_store(tt, key, SOLVED_DEPTH, flag, best, best_mv, gen):
+        stats[ST_TT_COLLISIONS] += 1
+    return best
@@ -1,16 +1,17 @@
 # engine.py
 
 import time
-import os
-import json
 import numpy as np
 from board import Board
 from moves_utils import get_moves
 from eval_utils import evaluate
-from search import iterative_deepening
+from search import search_position, SearchControl, SearchPool
+from book_utils import DEFAULT_BOOK, OpeningBook, load_book
+from ponder_utils import Ponderer
 
 TOTAL_TIME = 600.0   # 10 minutes per game, in seconds
 SAFETY     = 0.95    # use only 95% of each slice
+PONDER_MIN_SHARE = 0.25   # after a ponder hit, still search this share of the slice
 
 class TimeManager:
     def __init__(self):
@@ -25,12 +26,8 @@ class TimeManager:
         self.remaining = max(0.0, self.remaining - used)
 
 
-def load_opening_book(path: str = "book.json") -> dict[str,int]:
-    if os.path.exists(path):
-        with open(path, 'r') as f:
-            data = json.load(f)
-        return {k: int(v) for k, v in data.items()}
-    return {}
+def load_opening_book(path: str = DEFAULT_BOOK) -> OpeningBook:
+    return load_book(path)
 
 
 def index_to_coord(idx: int) -> str:
@@ -69,21 +66,39 @@ def print_board(board: Board, moves: list[int] | None = None) -> None:
 
 
 def choose_move(board: Board, player: int, ply: int,
-                timer: TimeManager, book: dict[str,int]) -> int:
-    fen = board.to_flat_fen()
-    if fen in book:
-        mv = book[fen]
+                timer: TimeManager, book: OpeningBook,
+                pool: SearchPool | None = None,
+                ponder: Ponderer | None = None,
+                on_iteration=None, control: SearchControl | None = None) -> int:
+    """
+    The bot's move: from the book if possible, else a search within the
+    timer's slice (see search_position for `on_iteration` and `control`).
+    """
+    mv = book.choose(board, player)
+    if mv is not None:
         coord = index_to_coord(mv)
         print(f"[Book] Ply {ply} move {coord}")
         return mv
     think = timer.slice(ply)
+    hint = None
+    hit = ponder.take(board, player) if ponder is not None else None
+    if hit is not None:
+        # the TT is warm from the ponder search: credit the time it ran
+        pondered, seconds = hit
+        hint = pondered.move
+        think = max(think - seconds, think * PONDER_MIN_SHARE)
+        print(f"[Ply {ply}] Ponder hit: {seconds:.1f}s pondered, depth {pondered.depth}")
     print(f"[Ply {ply}] Bot is thinking... allocated {think:.1f}s")
     t0 = time.monotonic()
-    mv = iterative_deepening(board, player, time_limit=think)
+    result = search_position(board, player, time_limit=think, pool=pool, first_move=hint,
+                             on_iteration=on_iteration, control=control)
     used = time.monotonic() - t0
     timer.spend(used)
     print(f"[Ply {ply}] Think {think:.1f}s, used {used:.2f}s, remain {timer.remaining:.2f}s")
-    return mv
+    print(f"[Ply {ply}] Depth {result.depth} ({result.kind}), score {result.score}, "
+          f"{result.nodes:,} nodes ({result.nps:,.0f}/s), TT hits {result.tt_hit_rate:.0%}, "
+          f"cutoffs {result.cutoff_rate:.1%}")
+    return result.move
 
 
 def main():
@@ -93,6 +108,23 @@ def main():
     bot_white = side in ('w', 'both')
 
     book = load_opening_book()
+    pool = SearchPool()
+    ponder = Ponderer(pool) if bot_black != bot_white else None
+    try:
+        play_game(bot_black, bot_white, book, pool, ponder)
+    finally:
+        if ponder is not None:
+            ponder.stop()
+        pool.shutdown()
+
+
+def play_game(bot_black: bool, bot_white: bool,
+              book: OpeningBook, pool: SearchPool,
+              ponder: Ponderer | None = None) -> None:
+    """
+    Play one game on the console. With a `ponder`, the bot searches on
+    the human's time until their input arrives.
+    """
     timer = TimeManager()
     board = Board.start_pos()
     ply = 0
@@ -111,7 +143,7 @@ def main():
 
         if moves:
             if is_bot:
-                mv = choose_move(board, player, ply, timer, book)
+                mv = choose_move(board, player, ply, timer, book, pool, ponder)
                 coord = index_to_coord(mv)
                 print(f"Bot plays {'Black' if player==1 else 'White'}: {coord}")
                 board.apply_move(mv, player)
@@ -119,7 +151,12 @@ def main():
             else:
                 coords = [index_to_coord(m) for m in moves]
                 while True:
+                    # (re)start after a typo too; the same position resumes
+                    if ponder is not None:
+                        ponder.start(board, player)
                     inp = input(f"Your move {coords} > ").strip()
+                    if ponder is not None:
+                        ponder.stop()
                     low = inp.lower()
                     if low == 'stop':
                         print("Game stopped by user.")
@@ -128,15 +165,18 @@ def main():
                         if ply > 0:
                             board.undo()
                             ply -= 1
-                            print("Last move undone. Board is now:")
-                            print_board(board)
-                        else:
-                            print("Nothing to undo.")
+                            print("Last move undone.")
+                            mv = None
+                            break
+                        print("Nothing to undo.")
                         continue
                     if inp.upper() in coords:
                         mv = coord_to_index(inp)
                         break
                     print(f"Invalid input. Enter one of {coords}, 'undo', or 'stop'.")
+                if mv is None:
+                    # the other side is to move again: redo the whole turn
+                    continue
                 print(f"You play {'Black' if player==1 else 'White'}: {inp.upper()}")
                 board.apply_move(mv, player)
                 ply += 1
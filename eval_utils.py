@@ -1,5 +1,7 @@
-from moves_utils import get_moves
-from jit_utils import legal_moves_jit
+from jit_utils import moves_bb, popcount, CORNERS
+from pattern_utils import (load_pattern_weights, pattern_indices, pattern_score,
+                           new_features)
+from numba import njit
 import numpy as np
 
 SQUARE_W = [
@@ -12,28 +14,56 @@ SQUARE_W = [
    -3, -7, -4,  1,  1, -4, -7, -3,
    20, -3, 11,  8,  8, 11, -3, 20,
 ]
+MOBILITY_W = 5
+CORNER_W   = 25
+# Rough worth of one disc in this square-weight eval (a move of mobility); the
+# pattern eval scores in DISC_SCORE units instead
+SQUARE_DISC = 5
+
+
+def weight_classes(weights: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Group squares by weight: (weight values, bitboard of squares per weight)."""
+    values = sorted(set(weights))
+    masks = [sum(1 << (63 - i) for i, w in enumerate(weights) if w == v)
+             for v in values]
+    return np.array(values, dtype=np.int64), np.array(masks, dtype=np.uint64)
 
-def evaluate(board, player):
-    my_bb  = board.black if player == 1 else board.white
-    opp_bb = board.white if player == 1 else board.black
 
-    # positional
+_CLASS_W, _CLASS_MASKS = weight_classes(SQUARE_W)
+
+
+@njit("int64(uint64, uint64)", cache=True)
+def evaluate_bb(us, them):
+    """
+    Static evaluation from the side to move (`us`): positional weights as
+    popcounts per weight class, plus mobility and corner terms.
+    """
     pos = 0
-    for i, w in enumerate(SQUARE_W):
-        mask = 1 << (63 - i)
-        if my_bb & mask:   pos += w
-        elif opp_bb & mask: pos -= w
-
-    # mobility
-    my_m  = int(bin(int(legal_moves_jit(np.uint64(my_bb),  np.uint64(opp_bb)))).count('1'))
-    opp_m = int(bin(int(legal_moves_jit(np.uint64(opp_bb), np.uint64(my_bb)))).count('1'))
-    mob   = (my_m - opp_m) * 5
-
-    # corners
-    corners, corner_score = [0, 7, 56, 63], 0
-    for c in corners:
-        mask = 1 << c
-        if my_bb & mask:      corner_score += 25
-        elif opp_bb & mask:   corner_score -= 25
-
-    return pos + mob + corner_score
\ No newline at end of file
+    for k in range(len(_CLASS_W)):
+        m = _CLASS_MASKS[k]
+        pos += _CLASS_W[k] * (popcount(us & m) - popcount(them & m))
+    mob = (popcount(moves_bb(us, them)) - popcount(moves_bb(them, us))) * MOBILITY_W
+    corners = (popcount(us & CORNERS) - popcount(them & CORNERS)) * CORNER_W
+    return pos + mob + corners
+
+
+# Pattern weights from patterns.bin, memory-mapped at startup. Without the
+# file the search falls back to the weight-class evaluation above.
+pattern_weights = load_pattern_weights()
+
+
+@njit(cache=True)
+def static_eval(us, them, row, ply, weights):
+    """Leaf evaluation: pattern tables when `weights` has phases, else evaluate_bb."""
+    if weights.shape[0] == 0:
+        return evaluate_bb(us, them)
+    return pattern_score(row, ply, popcount(us | them), weights)
+
+
+def evaluate(board, player):
+    my_bb  = np.uint64(board.black if player == 1 else board.white)
+    opp_bb = np.uint64(board.white if player == 1 else board.black)
+    row = new_features(1)[0]
+    if pattern_weights.shape[0]:
+        pattern_indices(my_bb, opp_bb, row)
+    return int(static_eval(my_bb, opp_bb, row, 0, pattern_weights))
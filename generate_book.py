@@ -1,36 +1,200 @@
 # generate_book.py
 
+import os
 import json
+import hashlib
+import argparse
+import concurrent.futures
+import numpy as np
 from board import Board
-from moves_utils import get_moves
-from search import iterative_deepening
+from search import INF, SearchPool, negamax
+import eval_utils
+from search_jit import DISC_SCORE
+from book_utils import DEFAULT_BOOK, MAX_CANDIDATES, OpeningBook
+from symmetry_utils import INVERSE, canonical, transform_square
 
-def build_draft_book(time_per_move=0.1):
+# Book builder: expands the opening tree breadth-first from the start
+# position, scoring every move of every book position with a fixed-depth
+# search on a SearchPool (one task per move, so all cores stay busy).
+# Moves within `drop` discs of the best are expanded further, up to
+# `max_ply`.
+# Each finished position is appended to a JSON-lines checkpoint; a rerun
+# with the same checkpoint replays those results and only searches what
+# is missing. Positions are deduplicated by canonical form, so
+# transpositions and symmetric lines are searched once; the checkpoint
+# stores moves in canonical orientation for the same reason. Its first
+# line records the search depth and evaluation the scores come from, and
+# a checkpoint built with other ones is refused rather than mixed in.
+
+DEFAULT_CHECKPOINT = "book.ckpt"
+DEFAULT_DROP = 4.0   # discs
+
+
+def disc_units() -> int:
+    """Search units per disc of the active evaluation."""
+    return DISC_SCORE if eval_utils.pattern_weights.shape[0] else eval_utils.SQUARE_DISC
+
+
+def score_discs(score: int, kind: str = 'midgame') -> float:
+    """A search score in discs; endgame ('wld', 'exact') scores count DISC_SCORE per disc."""
+    return score / (DISC_SCORE if kind in ('wld', 'exact') else disc_units())
+
+
+def _score_move(args) -> tuple[int, int]:
+    """Pool task: score of `mv` for `player` at `depth`."""
+    black, white, player, mv, depth = args
+    b = Board(black, white)
+    b.apply_move(mv, player)
+    return mv, -negamax(b, -player, depth - 1, -INF, INF, ply=1)
+
+
+def _key(b: Board, player: int) -> tuple[tuple[int, int, int], int]:
+    """Dedup key of a position and the symmetry that maps it there."""
+    cb, cw, sym = canonical(np.uint64(b.black), np.uint64(b.white))
+    return (int(cb), int(cw), player), int(sym)
+
+
+def eval_id() -> str:
+    """Names the active evaluation: 'squares', or the pattern weights' digest."""
+    weights = eval_utils.pattern_weights
+    if not weights.shape[0]:
+        return "squares"
+    return "patterns-" + hashlib.sha1(np.ascontiguousarray(weights).tobytes()).hexdigest()[:12]
+
+
+def _load_checkpoint(path: str, params: dict) -> dict:
     """
-    Plays Black’s first move and White’s reply using a short search,
-    then records both positions→move mappings.
+    Finished positions from a checkpoint, cutting off a torn last line;
+    ValueError if it was built with other `params`.
     """
-    book = {}
-    start = Board.start_pos()
+    done = {}
+    if not os.path.exists(path):
+        return done
+    good = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break   # interrupted mid-write
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if good == 0:
+                if rec.get('params') != params:
+                    raise ValueError(f"{path} was built with {rec.get('params')}, "
+                                     f"not {params}; use another checkpoint")
+                good += len(line)
+                continue
+            key = (rec['black'], rec['white'], rec['player'])
+            done[key] = [tuple(m) for m in rec['moves']]
+            good += len(line)
+    if good < os.path.getsize(path):
+        os.truncate(path, good)
+    return done
 
-    # Black’s 1st move
-    for mv in get_moves(start, 1):
-        fen1 = start.to_flat_fen()
-        book[fen1] = mv
 
-        # White’s reply
-        start.apply_move(mv, 1)
-        reply = iterative_deepening(start, -1, time_limit=time_per_move)
-        fen2 = start.to_flat_fen()
-        book[fen2] = reply
+def _side_to_move(b: Board, player: int) -> int | None:
+    if b.legal_moves(player):
+        return player
+    if b.legal_moves(-player):
+        return -player
+    return None
 
-        start.undo()  # back to start for next Black mv
 
-    return book
+def build_book(max_ply: int = 8, depth: int = 8, drop: float = DEFAULT_DROP,
+               checkpoint: str = DEFAULT_CHECKPOINT,
+               pool: SearchPool | None = None, verbose: bool = False) -> dict:
+    """
+    Build book entries {(black, white): [(move, score, count), ...]} for
+    positions up to `max_ply`. Moves scoring within `drop` discs of the
+    best (see `disc_units`) get count 1, so the book picks evenly among them.
+    """
+    cut = drop * disc_units()
+    params = {"depth": depth, "eval": eval_id()}
+    done = _load_checkpoint(checkpoint, params)
+    own_pool = pool is None
+    if own_pool:
+        pool = SearchPool()
+    entries = {}
+    seen = set()
+    frontier = [(Board.start_pos(), 1)]
+    try:
+        with open(checkpoint, 'a') as ckpt:
+            if ckpt.tell() == 0:
+                ckpt.write(json.dumps({'params': params}) + "\n")
+            for ply in range(max_ply):
+                level = []
+                for b, player in frontier:
+                    player = _side_to_move(b, player)
+                    if player is None:
+                        continue
+                    key, sym = _key(b, player)
+                    if key not in seen:
+                        seen.add(key)
+                        level.append((b, player, key, sym))
+
+                todo = [(b, player, key, sym) for b, player, key, sym in level
+                        if key not in done]
+                futures = {}
+                pending = {}
+                for b, player, key, sym in todo:
+                    moves = b.legal_moves(player)
+                    pending[key] = [player, len(moves), []]
+                    for mv in moves:
+                        fut = pool.submit(_score_move, (b.black, b.white, player, mv, depth))
+                        futures[fut] = (key, sym)
+                for fut in concurrent.futures.as_completed(futures):
+                    key, sym = futures[fut]
+                    mv, score = fut.result()
+                    entry = pending[key]
+                    entry[1] -= 1
+                    entry[2].append((transform_square(mv, sym), score))
+                    if entry[1] == 0:
+                        # position complete: checkpoint it right away
+                        done[key] = sorted(entry[2], key=lambda m: (-m[1], m[0]))
+                        ckpt.write(json.dumps({'black': key[0], 'white': key[1],
+                                               'player': entry[0], 'moves': done[key]}) + "\n")
+                        ckpt.flush()
+                if verbose:
+                    print(f"ply {ply}: {len(level)} positions, {len(todo)} searched")
+
+                frontier = []
+                for b, player, key, sym in level:
+                    inv = int(INVERSE[sym])
+                    scored = [(transform_square(mv, inv), score) for mv, score in done[key]]
+                    best = scored[0][1]
+                    good = [(mv, score) for mv, score in scored if score >= best - cut]
+                    entries[(b.black, b.white)] = [
+                        (mv, score, int(score >= best - cut))
+                        for mv, score in scored[:MAX_CANDIDATES]]
+                    for mv, _ in good:
+                        child = Board(b.black, b.white)
+                        child.apply_move(mv, player)
+                        frontier.append((child, -player))
+    finally:
+        if own_pool:
+            pool.shutdown()
+    return entries
+
 
 if __name__ == "__main__":
-    print("Building draft opening book…")
-    book = build_draft_book(time_per_move=0.1)
-    with open("book.json", "w") as f:
-        json.dump(book, f, indent=2)
-    print(f"Wrote {len(book)} entries to book.json")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the binary opening book.")
+    parser.add_argument("--ply", type=int, default=8, help="book depth in plies")
+    parser.add_argument("--depth", type=int, default=8, help="search depth per move")
+    parser.add_argument("--drop", type=float, default=DEFAULT_DROP,
+                        help="expand moves within this many discs of the best")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("-o", "--output", default=DEFAULT_BOOK)
+    args = parser.parse_args()
+
+    print("Building opening book…")
+    pool = SearchPool(args.workers)
+    try:
+        entries = build_book(args.ply, args.depth, args.drop, args.checkpoint,
+                             pool, verbose=True)
+    finally:
+        pool.shutdown()
+    book = OpeningBook.from_entries(entries)
+    book.save(args.output)
+    print(f"Wrote {len(book)} positions to {args.output}")
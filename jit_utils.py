@@ -1,5 +1,6 @@
 # jit_utils.py
 
+import numpy as np
 from numba import njit, uint64
 
 @njit("uint64(uint64, uint64)", cache=True, fastmath=True)  # type: ignore
@@ -44,4 +45,106 @@ def legal_moves_jit(us, them):
                     moves_bb |= uint64(1) << uint64(idx)  # type: ignore
                 break
 
-    return moves_bb
\ No newline at end of file
+    return moves_bb
+
+# --- Board-convention kernels -------------------------------------------------
+# The kernels below work on raw (us, them) bitboards in the same layout as
+# `Board`: square index i (0 = A8) lives at bit (63 - i).
+
+FULL_MASK  = uint64(0xFFFFFFFFFFFFFFFF)
+NOT_A_FILE = uint64(0x7F7F7F7F7F7F7F7F)
+NOT_H_FILE = uint64(0xFEFEFEFEFEFEFEFE)
+CORNERS    = uint64(0x8100000000000081)
+ZERO       = uint64(0)
+ONE        = uint64(1)
+
+# One entry per shift amount: (shift, mask for left shifts, mask for right shifts)
+SHIFTS  = (uint64(8), uint64(7), uint64(1), uint64(9))
+MASKS_L = (FULL_MASK, NOT_A_FILE, NOT_H_FILE, NOT_H_FILE)
+MASKS_R = (FULL_MASK, NOT_H_FILE, NOT_A_FILE, NOT_A_FILE)
+
+_M1 = uint64(0x5555555555555555)
+_M2 = uint64(0x3333333333333333)
+_M4 = uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = uint64(0x0101010101010101)
+
+
+@njit("int64(uint64)", cache=True)
+def popcount(x):
+    """Number of set bits in `x` (SWAR popcount)."""
+    x = x - ((x >> ONE) & _M1)
+    x = (x & _M2) + ((x >> uint64(2)) & _M2)
+    x = (x + (x >> uint64(4))) & _M4
+    return (x * _H01) >> uint64(56)
+
+
+@njit("uint64(uint64, uint64)", cache=True)
+def moves_bb(us, them):
+    """Legal moves of `us` as a bitboard in Board layout (bit 63 - index)."""
+    empty = ~(us | them)
+    moves = ZERO
+    for k in range(4):
+        s = SHIFTS[k]
+        ml = MASKS_L[k]
+        mr = MASKS_R[k]
+
+        om = them & ml
+        x = om & (us << s)
+        x |= om & (x << s)
+        x |= om & (x << s)
+        x |= om & (x << s)
+        x |= om & (x << s)
+        x |= om & (x << s)
+        moves |= (x << s) & ml & empty
+
+        om = them & mr
+        x = om & (us >> s)
+        x |= om & (x >> s)
+        x |= om & (x >> s)
+        x |= om & (x >> s)
+        x |= om & (x >> s)
+        x |= om & (x >> s)
+        moves |= (x >> s) & mr & empty
+    return moves
+
+
+@njit("uint64(uint64, uint64, uint64)", cache=True)
+def flips_bb(us, them, sq):
+    """Discs of `them` flipped when `us` plays the single-bit square `sq`."""
+    flipped = ZERO
+    for k in range(4):
+        s = SHIFTS[k]
+        ml = MASKS_L[k]
+        mr = MASKS_R[k]
+
+        run = ZERO
+        x = (sq << s) & ml & them
+        while x != ZERO:
+            run |= x
+            x = (x << s) & ml & them
+        if run != ZERO and ((run << s) & ml & us) != ZERO:
+            flipped |= run
+
+        run = ZERO
+        x = (sq >> s) & mr & them
+        while x != ZERO:
+            run |= x
+            x = (x >> s) & mr & them
+        if run != ZERO and ((run >> s) & mr & us) != ZERO:
+            flipped |= run
+    return flipped
+
+
+_DEBRUIJN = uint64(0x03F79D71B4CB0A89)
+_DEBRUIJN_IDX = np.array([
+     0,  1, 48,  2, 57, 49, 28,  3, 61, 58, 50, 42, 38, 29, 17,  4,
+    62, 55, 59, 36, 53, 51, 43, 22, 45, 39, 33, 30, 24, 18, 12,  5,
+    63, 47, 56, 27, 60, 41, 37, 16, 54, 35, 52, 21, 44, 32, 23, 11,
+    46, 26, 40, 15, 34, 20, 31, 10, 25, 14, 19,  9, 13,  8,  7,  6,
+], dtype=np.int64)
+
+
+@njit("int64(uint64)", cache=True)
+def bit_index(sq):
+    """Bit position (0–63) of the single set bit in `sq`."""
+    return _DEBRUIJN_IDX[(sq * _DEBRUIJN) >> uint64(58)]
@@ -0,0 +1,85 @@
+# order_utils.py
+
+import numpy as np
+from numba import njit
+from jit_utils import moves_bb, flips_bb, popcount, bit_index, ZERO, ONE
+from tt_utils import NO_MOVE
+
+# Move ordering for the midgame kernel: TT move, then the two killer moves
+# of the ply, then the rest by history score. At SORT_DEPTH and deeper the
+# rest are sorted by opponent mobility first (fewest replies), history second.
+MAX_PLY    = 128
+SORT_DEPTH = 4
+
+_TT_KEY     = -(1 << 62)
+_KILLER_KEY = -(1 << 61)
+_HIST_LIMIT = (1 << 24) - 1
+
+
+def new_killers() -> np.ndarray:
+    return np.full((MAX_PLY, 2), NO_MOVE, dtype=np.int64)
+
+
+def new_history() -> np.ndarray:
+    return np.zeros(64, dtype=np.int64)
+
+
+@njit(cache=True)
+def order_moves(moves, us, them, depth, ply, tt_mv, killers, history, sqs, keys):
+    """
+    Fill `sqs` with the single-bit moves of `moves` and `keys` with their
+    ordering keys (lower is searched first); returns the number of moves.
+    """
+    n = 0
+    k0 = killers[ply, 0]
+    k1 = killers[ply, 1]
+    while moves != ZERO:
+        sq = moves & (~moves + ONE)
+        moves ^= sq
+        mv = bit_index(sq)
+        if mv == tt_mv:
+            key = _TT_KEY
+        elif mv == k0:
+            key = _KILLER_KEY
+        elif mv == k1:
+            key = _KILLER_KEY + 1
+        elif depth >= SORT_DEPTH:
+            flipped = flips_bb(us, them, sq)
+            replies = popcount(moves_bb(them ^ flipped, us | sq | flipped))
+            key = (replies << 24) - min(history[mv], _HIST_LIMIT)
+        else:
+            key = -history[mv]
+        sqs[n] = sq
+        keys[n] = key
+        n += 1
+    return n
+
+
+@njit(cache=True)
+def pick_move(sqs, keys, i, n):
+    """Selection step: swap the best remaining move into slot `i` and return it."""
+    j = i
+    for m in range(i + 1, n):
+        if keys[m] < keys[j]:
+            j = m
+    sq = sqs[j]
+    key = keys[j]
+    sqs[j] = sqs[i]
+    keys[j] = keys[i]
+    sqs[i] = sq
+    keys[i] = key
+    return sq
+
+
+@njit(cache=True)
+def record_cutoff(killers, history, ply, depth, mv):
+    """Remember a move that caused a beta cutoff."""
+    if killers[ply, 0] != mv:
+        killers[ply, 1] = killers[ply, 0]
+        killers[ply, 0] = mv
+    history[mv] += depth * depth
+
+
+def age_history(history: np.ndarray) -> None:
+    """Halve history scores between searches so old cutoffs fade."""
+    history //= 2
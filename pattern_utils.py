@@ -0,0 +1,189 @@
+# pattern_utils.py
+
+import os
+import struct
+import numpy as np
+from numba import njit, uint64
+from jit_utils import bit_index, ZERO, ONE
+
+# Pattern evaluation: each pattern instance is an ordered list of squares
+# read as a base-3 number (0 empty, 1 reference side, 2 other side) and
+# looked up in a per-phase weight table shared by all symmetric instances.
+#
+# Indices are kept for two reference sides at once: the first N_INST
+# entries of a feature row take the side to move at even plies as the
+# reference, the last N_INST the side to move at odd plies. The search
+# copies a row per ply and updates it from the placed and flipped discs,
+# so undo is just going back to the parent's row.
+
+BASE_PATTERNS = {
+    'edge2x':    [(0, c) for c in range(8)] + [(1, 1), (1, 6)],
+    'corner3x3': [(r, c) for r in range(3) for c in range(3)],
+    'corner2x5': [(r, c) for r in range(2) for c in range(5)],
+    'diag8':     [(i, i) for i in range(8)],
+    'diag7':     [(i, i + 1) for i in range(7)],
+    'diag6':     [(i, i + 2) for i in range(6)],
+    'diag5':     [(i, i + 3) for i in range(5)],
+    'diag4':     [(i, i + 4) for i in range(4)],
+}
+PATTERN_TYPES = list(BASE_PATTERNS)
+
+SYMMETRIES = (
+    lambda r, c: (r, c),         lambda r, c: (r, 7 - c),
+    lambda r, c: (7 - r, c),     lambda r, c: (7 - r, 7 - c),
+    lambda r, c: (c, r),         lambda r, c: (c, 7 - r),
+    lambda r, c: (7 - c, r),     lambda r, c: (7 - c, 7 - r),
+)
+
+MAX_LEN = 10
+POW3 = np.array([3**k for k in range(MAX_LEN + 1)], dtype=np.int64)
+
+WEIGHTS_MAGIC = b"OTHPAT01"
+DEFAULT_PATTERN_FILE = "patterns.bin"
+
+
+def _build_tables():
+    inst_type, inst_squares = [], []
+    for t, base in enumerate(BASE_PATTERNS.values()):
+        seen = set()
+        for sym in SYMMETRIES:
+            squares = [sym(r, c) for r, c in base]
+            key = frozenset(squares)
+            if key not in seen:
+                seen.add(key)
+                inst_type.append(t)
+                inst_squares.append([63 - (8 * r + c) for r, c in squares])
+
+    sizes = [3 ** len(base) for base in BASE_PATTERNS.values()]
+    offsets = np.cumsum([0] + sizes[:-1])
+    n = len(inst_type)
+    bits = np.full((n, MAX_LEN), -1, dtype=np.int64)
+    lens = np.zeros(n, dtype=np.int64)
+    inst_offset = np.zeros(n, dtype=np.int64)
+    per_square = [[] for _ in range(64)]
+    for i, squares in enumerate(inst_squares):
+        bits[i, :len(squares)] = squares
+        lens[i] = len(squares)
+        inst_offset[i] = offsets[inst_type[i]]
+        for k, b in enumerate(squares):
+            per_square[b].append((i, 3 ** k))
+    width = max(len(p) for p in per_square)
+    sq_inst = np.full((64, width), -1, dtype=np.int64)
+    sq_pow = np.zeros((64, width), dtype=np.int64)
+    for b, entries in enumerate(per_square):
+        for j, (i, p) in enumerate(entries):
+            sq_inst[b, j] = i
+            sq_pow[b, j] = p
+    return (np.array(sizes, dtype=np.int64), np.array(inst_type, dtype=np.int64),
+            bits, lens, inst_offset, sq_inst, sq_pow)
+
+
+(TYPE_SIZES, INST_TYPE, INST_BITS, INST_LEN, INST_OFFSET,
+ SQ_INST, SQ_POW) = _build_tables()
+N_INST = len(INST_TYPE)
+N_WEIGHTS = int(TYPE_SIZES.sum())
+NO_PATTERNS = np.zeros((0, N_WEIGHTS), dtype=np.int16)
+
+
+def new_features(max_ply: int) -> np.ndarray:
+    """Per-ply feature rows for the search."""
+    return np.zeros((max_ply, 2 * N_INST), dtype=np.int32)
+
+
+@njit(cache=True)
+def pattern_indices(us, them, row):
+    """Fill `row` with the pattern indices of a position, `us` to move at an even ply."""
+    for i in range(N_INST):
+        a = 0
+        b = 0
+        for k in range(INST_LEN[i]):
+            bit = uint64(INST_BITS[i, k])
+            p = POW3[k]
+            if (us >> bit) & ONE != ZERO:
+                a += p
+                b += 2 * p
+            elif (them >> bit) & ONE != ZERO:
+                a += 2 * p
+                b += p
+        row[i] = a
+        row[N_INST + i] = b
+
+
+@njit(cache=True)
+def pattern_update(row, sq, flipped, ply):
+    """Apply the move `sq` (single bit) with discs `flipped` by the side to move at `ply`."""
+    # state of the mover's discs in the even-reference and odd-reference halves
+    s_even = 1 if ply % 2 == 0 else 2
+    s_odd = 3 - s_even
+    b = bit_index(sq)
+    for j in range(SQ_INST.shape[1]):
+        i = SQ_INST[b, j]
+        if i < 0:
+            break
+        row[i] += s_even * SQ_POW[b, j]
+        row[N_INST + i] += s_odd * SQ_POW[b, j]
+    # flipped discs go from the other state to the mover's: +-1 per digit
+    d_even = 2 * s_even - 3
+    while flipped != ZERO:
+        f = flipped & (~flipped + ONE)
+        flipped ^= f
+        b = bit_index(f)
+        for j in range(SQ_INST.shape[1]):
+            i = SQ_INST[b, j]
+            if i < 0:
+                break
+            row[i] += d_even * SQ_POW[b, j]
+            row[N_INST + i] -= d_even * SQ_POW[b, j]
+
+
+@njit(cache=True)
+def pattern_phase(discs, n_phases):
+    """Weight-table phase for a position with `discs` on the board."""
+    return min((discs - 4) * n_phases // 61, n_phases - 1)
+
+
+@njit(cache=True)
+def pattern_score(row, ply, discs, weights):
+    """Sum of pattern weights for the side to move at `ply` with `discs` on the board."""
+    phase = pattern_phase(discs, weights.shape[0])
+    base = (ply % 2) * N_INST
+    score = 0
+    for i in range(N_INST):
+        score += weights[phase, INST_OFFSET[i] + row[base + i]]
+    return score
+
+
+def save_pattern_weights(path: str, weights: np.ndarray) -> None:
+    """Write (n_phases, N_WEIGHTS) int16 weights in the binary table format."""
+    weights = np.ascontiguousarray(weights, dtype='<i2')
+    if weights.ndim != 2 or weights.shape[1] != N_WEIGHTS:
+        raise ValueError(f"expected (n_phases, {N_WEIGHTS}) weights, got {weights.shape}")
+    with open(path, 'wb') as f:
+        f.write(WEIGHTS_MAGIC)
+        f.write(struct.pack('<II', weights.shape[0], len(TYPE_SIZES)))
+        f.write(np.asarray(TYPE_SIZES, dtype='<u4').tobytes())
+        f.write(weights.tobytes())
+
+
+def load_pattern_weights(path: str = DEFAULT_PATTERN_FILE) -> np.ndarray:
+    """
+    Memory-map a weight file written by `save_pattern_weights`; returns
+    NO_PATTERNS if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return NO_PATTERNS
+    with open(path, 'rb') as f:
+        magic = f.read(len(WEIGHTS_MAGIC))
+        header = f.read(8)
+        if magic != WEIGHTS_MAGIC or len(header) != 8:
+            raise ValueError(f"{path}: not a pattern weight file")
+        n_phases, n_types = struct.unpack('<II', header)
+        sizes = np.frombuffer(f.read(4 * n_types), dtype='<u4')
+    if not np.array_equal(sizes, TYPE_SIZES):
+        raise ValueError(f"{path}: not a pattern weight file for these patterns")
+    offset = len(WEIGHTS_MAGIC) + 8 + 4 * n_types
+    if os.path.getsize(path) != offset + 2 * n_phases * N_WEIGHTS:
+        raise ValueError(f"{path}: truncated or oversized pattern weight file")
+    mm = np.memmap(path, dtype='<i2', mode='r', offset=offset,
+                   shape=(n_phases, N_WEIGHTS))
+    return np.asarray(mm)
@@ -0,0 +1,119 @@
+# ponder_utils.py
+
+import time
+import threading
+from board import Board
+from moves_utils import get_moves
+from search import SearchControl, SearchPool, SearchResult, search_position
+
+# Pondering: while the opponent thinks, a background thread searches the
+# positions the engine may face next, filling the shared TT. In
+# 'predicted' mode a short search guesses the opponent's reply and the
+# position after it is searched until the opponent moves; in 'all' mode
+# every reply is searched in turn with doubling time slices. When the
+# real reply arrives, `take` hands back the matching search (its best
+# move and how long it ran) and the engine's own search starts from a
+# warm TT. The compiled kernels release the GIL, so input handling and
+# the UI stay responsive while a serial ponder search runs.
+
+PONDER_MODES = ('predicted', 'all')
+PREDICT_TIME = 0.2     # seconds spent guessing the opponent's reply
+FIRST_SLICE = 0.25     # seconds per reply in the first round of 'all'
+PONDER_LIMIT = 3600.0  # a single pondered position runs until stopped
+
+
+class Ponderer:
+    """
+    Background pondering for one engine. Call `start` with the position
+    the opponent is to move in, `stop` as soon as they move (or undo, or
+    quit), then `take` with the position the engine now has to play.
+    Starting again on the same position (say after a mistyped move)
+    keeps what was pondered so far.
+    """
+    def __init__(self, pool: SearchPool | None = None, mode: str = 'predicted',
+                 search_mode: str = 'ybwc'):
+        if mode not in PONDER_MODES:
+            raise ValueError(f"unknown ponder mode {mode!r}")
+        self.pool = pool
+        self.mode = mode
+        self.search_mode = search_mode
+        self._thread: threading.Thread | None = None
+        self._control = SearchControl()
+        self._control.stop()
+        self._lock = threading.Lock()
+        self._position: tuple[int, int, int] | None = None   # last `start`
+        # (black, white, player) -> (deepest result, seconds searched)
+        self._results: dict[tuple[int, int, int], tuple[SearchResult, float]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, board: Board, player: int) -> None:
+        """Ponder on the replies of `player` (the opponent) in `board`."""
+        self.stop()
+        position = (board.black, board.white, player)
+        if position != self._position:
+            self._results = {}
+            self._position = position
+        self._control = SearchControl()
+        self._thread = threading.Thread(
+            target=self._run, args=(board.black, board.white, player, self._control),
+            name="ponder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Interrupt pondering and wait for the search to unwind."""
+        self._control.stop()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def take(self, board: Board, player: int) -> tuple[SearchResult, float] | None:
+        """The ponder search of `board` with `player` to move and its duration, if any."""
+        with self._lock:
+            return self._results.get((board.black, board.white, player))
+
+    def _search(self, b: Board, player: int, time_limit: float,
+                control: SearchControl) -> SearchResult:
+        return search_position(b, player, time_limit, self.pool, self.search_mode,
+                               control=control)
+
+    def _record(self, b: Board, player: int, result: SearchResult, seconds: float) -> None:
+        key = (b.black, b.white, player)
+        with self._lock:
+            best, spent = self._results.get(key, (result, 0.0))
+            if result.depth >= best.depth:
+                best = result
+            self._results[key] = (best, spent + seconds)
+
+    def _run(self, black: int, white: int, player: int, control: SearchControl) -> None:
+        board = Board(black, white)
+        replies = get_moves(board, player)
+        if not replies:
+            # the opponent has to pass: ponder our own move
+            replies = [None]
+        elif self.mode == 'predicted':
+            guess = self._search(board, player, PREDICT_TIME, control)
+            if control.stopped:
+                return
+            replies = [guess.move]
+        children = []
+        for mv in replies:
+            child = Board(black, white)
+            if mv is not None:
+                child.apply_move(mv, player)
+            if get_moves(child, -player):
+                children.append(child)
+        time_slice = PONDER_LIMIT if len(children) == 1 else FIRST_SLICE
+        while children and not control.stopped:
+            for child in children:
+                t0 = time.monotonic()
+                result = self._search(child, -player, time_slice, control)
+                self._record(child, -player, result, time.monotonic() - t0)
+                if control.stopped:
+                    return
+            if all(self._results[(c.black, c.white, -player)][0].kind == 'exact'
+                   for c in children):
+                return
+            time_slice *= 2
@@ -0,0 +1,96 @@
+# position_utils.py
+
+import os
+from typing import Iterator
+import numpy as np
+from board import Board
+
+# Labelled position files for offline jobs such as eval tuning: a magic
+# header followed by fixed-size little-endian records, read back in
+# memory-mapped chunks so files far larger than RAM can be streamed.
+
+POSITIONS_MAGIC = b"OTHPOS01"
+POSITION_DTYPE = np.dtype([
+    ('us',     '<u8'),   # side to move, Board layout
+    ('them',   '<u8'),
+    ('result', 'i1'),    # final disc difference from the side to move
+])
+
+
+def replay(moves: list[int], board: Board | None = None) -> Iterator[tuple[Board, int, int]]:
+    """
+    Play `moves` (square indices, passes implied) from `board` or the start
+    position, yielding (board, player, move) before each move is applied.
+    """
+    b = board or Board.start_pos()
+    player = 1
+    for ply, mv in enumerate(moves):
+        if not b.legal_moves(player):
+            player = -player
+        if mv not in b.legal_moves(player):
+            raise ValueError(f"illegal move {mv} at ply {ply}")
+        yield b, player, mv
+        b.apply_move(mv, player)
+        player = -player
+
+
+def positions_from_game(moves: list[int], board: Board | None = None) -> np.ndarray:
+    """
+    Replay `moves` from `board` or the start position; return the position
+    before every move, labelled with the game's final disc difference.
+    """
+    b = board or Board.start_pos()
+    us, them, movers = [], [], []
+    for _, player, _ in replay(moves, b):
+        own, opp = (b.black, b.white) if player == 1 else (b.white, b.black)
+        us.append(own)
+        them.append(opp)
+        movers.append(player)
+    diff = b.count(1) - b.count(-1)
+    out = np.empty(len(movers), dtype=POSITION_DTYPE)
+    out['us'] = us
+    out['them'] = them
+    out['result'] = [diff * p for p in movers]
+    return out
+
+
+class PositionWriter:
+    """Append labelled positions to a file, writing the header when it is new."""
+    def __init__(self, path: str):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, 'ab')
+        if new:
+            self._f.write(POSITIONS_MAGIC)
+        self.count = 0
+
+    def write(self, positions: np.ndarray) -> None:
+        self._f.write(np.asarray(positions, dtype=POSITION_DTYPE).tobytes())
+        self.count += len(positions)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_positions(path: str) -> np.ndarray:
+    """Memory-map a position file as a read-only record array."""
+    with open(path, 'rb') as f:
+        if f.read(len(POSITIONS_MAGIC)) != POSITIONS_MAGIC:
+            raise ValueError(f"{path}: not a position file")
+    n = (os.path.getsize(path) - len(POSITIONS_MAGIC)) // POSITION_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, dtype=POSITION_DTYPE)
+    return np.memmap(path, dtype=POSITION_DTYPE, mode='r',
+                     offset=len(POSITIONS_MAGIC), shape=(n,))
+
+
+def iter_position_batches(path: str, batch_size: int = 1 << 16) -> Iterator[np.ndarray]:
+    """Yield consecutive chunks of at most `batch_size` records."""
+    records = open_positions(path)
+    for start in range(0, len(records), batch_size):
+        yield np.array(records[start:start + batch_size])
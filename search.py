@@ -1,172 +1,828 @@
 # search.py
 
+import os
+import sys
+import json
 import time
+import atexit
+import threading
+import contextlib
 import concurrent.futures
-from typing import NamedTuple
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
 from board import Board
 from moves_utils import get_moves
-from eval_utils import evaluate
-
-INF = 10**9
-
-class TTEntry(NamedTuple):
-    depth: int
-    flag: str   # 'EXACT', 'LOWER', or 'UPPER'
-    value: int
-
-# Transposition table using a dict
-trans_table: dict[tuple[int,int,int], TTEntry] = {}
-
-def tt_lookup(key, depth, alpha, beta):
-    entry = trans_table.get(key)
-    if entry and entry.depth >= depth:
-        if entry.flag == 'EXACT':
-            return entry.value, alpha, beta
-        if entry.flag == 'LOWER':
-            alpha = max(alpha, entry.value)
-        if entry.flag == 'UPPER':
-            beta  = min(beta,  entry.value)
-        if alpha >= beta:
-            return entry.value, alpha, beta
-    return None, alpha, beta
-
-def tt_store(key, depth, value, alpha, beta, orig_alpha):
-    if value <= orig_alpha:
-        flag = 'UPPER'
-    elif value >= beta:
-        flag = 'LOWER'
-    else:
-        flag = 'EXACT'
-    trans_table[key] = TTEntry(depth, flag, value)
+from search_jit import (INF, ST_NODES, ST_TT_PROBES, ST_TT_HITS,
+                        ST_TT_COLLISIONS, ST_CUTOFFS, ST_FIRST_CUTOFFS,
+                        N_STATS, negamax_bb, new_stats)
+from tt_utils import DEFAULT_TT_MB, NO_MOVE, TranspositionTable, zobrist, tt_probe, tt_move
+from jit_utils import popcount
+from symmetry_utils import INVERSE, canonical, transform_bit
+from order_utils import MAX_PLY, new_killers, new_history, age_history
+from pattern_utils import new_features, pattern_indices
+import eval_utils
+from endgame import solve_bb
 
-def is_terminal(b: Board) -> bool:
-    return not get_moves(b, 1) and not get_moves(b, -1)
+MAX_SEARCHES = 64   # concurrent searches a pool can run, one stop flag each
+# Whole searches a client should keep queued on one pool (`submit_search`),
+# leaving stop flags free for other searches on it
+MAX_QUEUED_SEARCHES = MAX_SEARCHES // 2
+ENDGAME_EMPTIES = 20   # solve exactly once this few squares are empty
+ENDGAME_PREPASS = 6    # midgame depth searched first, as the fallback if the solve runs out of time
+CANONICAL_EMPTIES = 50 # symmetric TT keys from here up (the first ten plies)
+DETERMINISTIC_TT_MB = 16  # private table of each deterministic search (and root task)
 
-def final_eval(b: Board) -> int:
-    fen = b.to_flat_fen()
-    return fen.count('X') - fen.count('O')
+# Parallel algorithms for iterations at depth >= 3:
+#   'root' - every root move on the pool with a full window
+#   'ybwc' - Young Brothers Wait: search the PV move first, then the
+#            siblings in parallel with null windows at the established bound
+PARALLEL_MODES = ('root', 'ybwc')
+# 'serial' runs every iteration in the calling process without a pool,
+# for callers that already parallelize at a coarser grain (e.g. the arena)
+SEARCH_MODES = PARALLEL_MODES + ('serial',)
 
-def negamax(b: Board, player: int, depth: int, alpha: int, beta: int) -> int:
-    key = (b.black, b.white, player)
-    orig_alpha = alpha
-    val, alpha, beta = tt_lookup(key, depth, alpha, beta)
-    if val is not None:
-        return val
+# Fixed-size transposition table; resize with `set_tt_size`. The parallel
+# search moves it into shared memory so root workers probe the same table.
+trans_table = TranspositionTable(DEFAULT_TT_MB)
+stats = new_stats()
+# Per-process move-ordering tables
+killers = new_killers()
+history = new_history()
+features = new_features(MAX_PLY)
+# TT keys are symmetry-canonical for positions with at least this many
+# empties (the opening, where symmetric transpositions happen); 65 = never
+canonical_empties = CANONICAL_EMPTIES
+# Shared stop flags; set in pool workers by `_init_worker`
+stop_flags = np.zeros(MAX_SEARCHES, dtype=np.int64)
+# Table swapped in by `_private_tables`, allocated on first use
+_private_tt: TranspositionTable | None = None
+
+def set_tt_size(mb: float, shared: bool = False) -> None:
+    """
+    Replace the transposition table with an empty one of `mb` megabytes.
+    Pools started earlier keep the old table; start them after resizing.
+    """
+    global trans_table
+    trans_table.close()
+    trans_table = TranspositionTable(mb, shared=shared)
 
-    if depth == 0 or is_terminal(b):
-        return player * (final_eval(b) if is_terminal(b) else evaluate(b, player))
+def _shared_tt() -> TranspositionTable:
+    """Return the process TT, moving it into shared memory on first use."""
+    if trans_table.shm is None:
+        set_tt_size(trans_table.size_mb, shared=True)
+    return trans_table
 
-    moves = get_moves(b, player)
-    if not moves:
-        # pass or game end
-        if not get_moves(b, -player):
-            return player * final_eval(b)
-        return -negamax(b, -player, depth, -beta, -alpha)
+# Queue for the iterations of whole searches run on a pool worker
+# (`SearchPool.submit_search`); set in workers of pools made with progress=True
+progress_queue = None
 
-    best_score = -INF
-    for mv in moves:
+def _init_worker(shm_name: str, nbytes: int, flags_name: str, progress=None,
+                 weights: np.ndarray | None = None, canon_empties: int = CANONICAL_EMPTIES) -> None:
+    """
+    Pool initializer: attach the parent's shared TT, take over its eval
+    weights and canonical-key setting, and load the kernels.
+    """
+    global trans_table, stop_flags, _flags_shm, progress_queue, canonical_empties
+    progress_queue = progress
+    if weights is not None:
+        eval_utils.pattern_weights = weights
+    canonical_empties = canon_empties
+    trans_table = TranspositionTable.attach(shm_name, nbytes)
+    _flags_shm = shared_memory.SharedMemory(name=flags_name)
+    stop_flags = np.ndarray(MAX_SEARCHES, dtype=np.int64, buffer=_flags_shm.buf)
+    negamax(Board.start_pos(), 1, 2, -INF, INF)
+    negamax(Board(0xFFFFFFFFFFFFFFF0, 0), 1, 4, -INF, INF)
+
+def _ping(_: int) -> int:
+    return os.getpid()
+
+class SearchPool:
+    """
+    Long-lived pool of pre-warmed root-search workers sharing the process
+    transposition table. Reuse one pool across iterations, moves and games,
+    and call `shutdown` when done.
+
+    Each running search holds a slot in a shared array of stop flags that
+    the workers poll, so a search can be cut short without killing them.
+
+    Besides splitting one search across workers, a pool can run whole
+    serial searches, one per worker (`submit_search`); with progress=True
+    their iterations are posted to the `progress` queue as (tag, Iteration).
+
+    Workers are started with the parent's `eval_utils.pattern_weights` and
+    `canonical_empties` as they are when the pool is made; later changes in
+    the parent do not reach them.
+    """
+    def __init__(self, workers: int | None = None, progress: bool = False):
+        self.workers = workers or os.cpu_count() or 1
+        tt = _shared_tt()
+        self._flags_shm = shared_memory.SharedMemory(create=True, size=MAX_SEARCHES * 8)
+        self.stop_flags = np.ndarray(MAX_SEARCHES, dtype=np.int64,
+                                     buffer=self._flags_shm.buf)
+        self.stop_flags[:] = 0
+        self._free_slots = list(range(MAX_SEARCHES))
+        self._slot_freed = threading.Condition()
+        # forkserver, not fork: the parent may already run threads (timers,
+        # the UI, numba's parallel pool) that a forked child cannot inherit
+        ctx = multiprocessing.get_context('forkserver')
+        self.progress = ctx.Queue() if progress else None
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(tt.shm_name, tt.table.nbytes, self._flags_shm.name, self.progress,
+                      eval_utils.pattern_weights, canonical_empties))
+        # Start every worker now so the first deep iteration pays no startup
+        list(self.executor.map(_ping, range(self.workers)))
+
+    def submit(self, fn, *args) -> concurrent.futures.Future:
+        return self.executor.submit(fn, *args)
+
+    def acquire_slot(self) -> int:
+        """
+        Reserve a cleared stop flag for one search, waiting for one to be
+        released if all MAX_SEARCHES are taken.
+        """
+        with self._slot_freed:
+            self._slot_freed.wait_for(lambda: self._free_slots)
+            slot = self._free_slots.pop()
+        self.stop_flags[slot] = 0
+        return slot
+
+    def release_slot(self, slot: int) -> None:
+        with self._slot_freed:
+            self._free_slots.append(slot)
+            self._slot_freed.notify()
+
+    def submit_search(self, board: Board, player: int, time_limit: float | None,
+                      tag=None, **limits) -> tuple[concurrent.futures.Future, int]:
+        """
+        Run a serial `search_position` on one worker, with its max_depth,
+        max_nodes, endgame_empties or deterministic in `limits`. Returns the future of its
+        SearchResult and the stop slot it holds until it finishes
+        (`stop_search` cuts it short).
+        """
+        slot = self.acquire_slot()
+        fut = self.submit(_whole_search, (board.black, board.white, player,
+                                          time_limit, slot, tag, limits))
+        fut.add_done_callback(lambda _: self.release_slot(slot))
+        return fut, slot
+
+    def stop_search(self, slot: int) -> None:
+        self.stop_flags[slot] = 1
+
+    def shutdown(self) -> None:
+        self.stop_flags[:] = 1
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        del self.stop_flags
+        self._flags_shm.close()
+        self._flags_shm.unlink()
+
+_default_pool: SearchPool | None = None
+
+def get_pool() -> SearchPool:
+    """Return the module-wide pool, starting it on first use."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = SearchPool()
+    return _default_pool
+
+def shutdown_pool() -> None:
+    """Stop the module-wide pool, if one was started."""
+    global _default_pool
+    if _default_pool is not None:
+        _default_pool.shutdown()
+        _default_pool = None
+
+atexit.register(lambda: trans_table.close())
+atexit.register(shutdown_pool)
+
+def _counter_dict(counts: np.ndarray) -> dict[str, int]:
+    return {"nodes": int(counts[ST_NODES]),
+            "tt_probes": int(counts[ST_TT_PROBES]),
+            "tt_hits": int(counts[ST_TT_HITS]),
+            "tt_collisions": int(counts[ST_TT_COLLISIONS]),
+            "cutoffs": int(counts[ST_CUTOFFS]),
+            "first_move_cutoffs": int(counts[ST_FIRST_CUTOFFS])}
+
+def counters() -> dict[str, int]:
+    """Node, TT and cutoff counts accumulated by this process."""
+    return _counter_dict(stats)
+
+class Iteration:
+    """
+    One root search of iterative deepening: `kind` is 'midgame', or 'wld'
+    and 'exact' for the two endgame windows; `aspiration` is 'high' or
+    'low' when the depth-2 aspiration window failed and was re-searched.
+    `counts` are the kernel counters of this iteration over all processes.
+    Iterations cut short by the deadline have completed=False. `pv` is
+    the expected line from `move` on, read back from the TT.
+    """
+    def __init__(self, depth: int, kind: str, move: int, score: int,
+                 completed: bool, seconds: float, elapsed: float,
+                 counts: np.ndarray, aspiration: str | None = None,
+                 pv: list[int] | None = None):
+        self.depth = depth
+        self.kind = kind
+        self.move = move
+        self.score = score
+        self.completed = completed
+        self.seconds = seconds
+        self.elapsed = elapsed
+        self.counts = counts
+        self.aspiration = aspiration
+        self.pv = pv if pv is not None else [move]
+
+    @property
+    def nodes(self) -> int:
+        return int(self.counts[ST_NODES])
+
+    def as_dict(self) -> dict:
+        return {"depth": self.depth, "kind": self.kind, "move": self.move,
+                "score": self.score, "completed": self.completed,
+                "seconds": self.seconds, "elapsed": self.elapsed,
+                "aspiration": self.aspiration, "pv": self.pv,
+                **_counter_dict(self.counts)}
+
+    def __repr__(self) -> str:
+        flag = "" if self.completed else " (aborted)"
+        return (f"depth {self.depth} {self.kind} move {self.move} score {self.score} "
+                f"nodes {self.nodes} {self.seconds:.3f}s{flag}")
+
+class SearchResult:
+    """
+    Outcome of `search_position`: the move and score of the deepest
+    completed iteration, every iteration run, and counter totals.
+    """
+    def __init__(self, move: int | None = None):
+        self.move = move
+        self.score = 0
+        self.depth = 0
+        self.kind = None
+        self.pv: list[int] = []
+        self.elapsed = 0.0
+        self.iterations: list[Iteration] = []
+        self.counts = np.zeros(N_STATS, dtype=np.int64)
+
+    def add(self, it: Iteration) -> None:
+        self.iterations.append(it)
+        self.counts += it.counts
+        self.elapsed = it.elapsed
+        if it.completed:
+            self.move, self.score, self.pv = it.move, it.score, it.pv
+            self.depth, self.kind = it.depth, it.kind
+
+    @property
+    def counters(self) -> dict[str, int]:
+        return _counter_dict(self.counts)
+
+    @property
+    def nodes(self) -> int:
+        return int(self.counts[ST_NODES])
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return int(self.counts[ST_TT_HITS]) / max(1, int(self.counts[ST_TT_PROBES]))
+
+    @property
+    def cutoff_rate(self) -> float:
+        """Beta cutoffs per node."""
+        return int(self.counts[ST_CUTOFFS]) / max(1, self.nodes)
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Share of beta cutoffs caused by the first move tried."""
+        return int(self.counts[ST_FIRST_CUTOFFS]) / max(1, int(self.counts[ST_CUTOFFS]))
+
+    @property
+    def aspiration_fail_highs(self) -> int:
+        return sum(it.aspiration == 'high' for it in self.iterations)
+
+    @property
+    def aspiration_fail_lows(self) -> int:
+        return sum(it.aspiration == 'low' for it in self.iterations)
+
+    def __repr__(self) -> str:
+        return (f"move {self.move} score {self.score} depth {self.depth} ({self.kind}) "
+                f"nodes {self.nodes} in {self.elapsed:.2f}s ({self.nps:,.0f} nps), "
+                f"TT hits {self.tt_hit_rate:.0%}, cutoffs {self.cutoff_rate:.1%} "
+                f"({self.first_move_cutoff_rate:.0%} first move)")
+
+class SearchControl:
+    """
+    Stops `search_position` calls from another thread, e.g. a ponder
+    search when the opponent moves. Once stopped it stays stopped:
+    searches started with it afterwards return at once.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flags: list[np.ndarray] = []
+        self.stopped = False
+
+    def attach(self, flag: np.ndarray) -> None:
+        with self._lock:
+            self._flags.append(flag)
+            if self.stopped:
+                flag.fill(1)
+
+    def detach(self, flag: np.ndarray) -> None:
+        with self._lock:
+            self._flags = [f for f in self._flags if f is not flag]
+
+    def stop(self) -> None:
+        with self._lock:
+            self.stopped = True
+            for flag in self._flags:
+                flag.fill(1)
+
+def tt_best_move(b: Board, player: int) -> int | None:
+    """The best move the TT holds for `player` in `b`, if any."""
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    us, them = np.uint64(us), np.uint64(them)
+    sym = 0
+    if popcount(~(us | them)) >= canonical_empties:
+        us, them, sym = canonical(us, them)
+    key = np.uint64(zobrist(np.uint64(us), np.uint64(them)))
+    data = tt_probe(trans_table.table, key)
+    if data == 0 or tt_move(data) == NO_MOVE:
+        return None
+    bit = int(tt_move(data))
+    if sym:
+        bit = transform_bit(bit, INVERSE[sym])
+    return 63 - bit
+
+def principal_variation(b: Board, player: int, move: int, max_len: int = 16) -> list[int]:
+    """
+    `move` followed by the TT best moves of the positions it leads to, as
+    long as they are legal; passes are skipped.
+    """
+    b = Board(b.black, b.white)
+    line = [move]
+    b.apply_move(move, player)
+    player = -player
+    while len(line) < max_len:
+        moves = get_moves(b, player)
+        if not moves:
+            if not get_moves(b, -player):
+                break
+            player = -player
+            continue
+        mv = tt_best_move(b, player)
+        if mv not in moves:
+            break
+        line.append(mv)
         b.apply_move(mv, player)
-        score = -negamax(b, -player, depth-1, -beta, alpha)
-        b.undo()
+        player = -player
+    return line
+
+def iteration_logger(stream=None):
+    """An `on_iteration` callback writing each iteration as a JSON line to `stream` (stderr)."""
+    def log(it: Iteration) -> None:
+        out = stream if stream is not None else sys.stderr
+        out.write(json.dumps(it.as_dict()) + "\n")
+        out.flush()
+    return log
+
+def _new_search(gen: int | None = None) -> None:
+    """Start a new search generation: age the TT and the ordering tables."""
+    if gen is None:
+        trans_table.new_search()
+    else:
+        trans_table.generation = gen
+    killers.fill(NO_MOVE)
+    age_history(history)
+
+def negamax(b: Board, player: int, depth: int, alpha: int, beta: int,
+            stop: np.ndarray | None = None, ply: int = 0) -> int:
+    """
+    Score of `b` for `player` to move, searched by the compiled kernel, or
+    by the exact endgame solver once `depth` reaches the end of the game.
+    `ply` is the distance of `b` from the search root.
+    The search is abandoned (and its score meaningless) once `stop[0]` is set.
+    """
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    if stop is None:
+        stop = np.zeros(1, dtype=np.int64)
+    if depth >= b.empties():
+        return int(solve_bb(np.uint64(us), np.uint64(them), alpha, beta,
+                            trans_table.table, trans_table.generation, stats, stop))
+    us, them = np.uint64(us), np.uint64(them)
+    weights = eval_utils.pattern_weights
+    if weights.shape[0]:
+        # the kernel's feature rows take the even-ply side to move as reference
+        if ply % 2 == 0:
+            pattern_indices(us, them, features[ply])
+        else:
+            pattern_indices(them, us, features[ply])
+    return int(negamax_bb(us, them, depth, ply, alpha, beta,
+                          trans_table.table, trans_table.generation,
+                          killers, history, features, weights,
+                          canonical_empties, stats, stop))
+
+def _whole_search(args) -> "SearchResult":
+    black, white, player, time_limit, slot, tag, limits = args
+    report = None
+    if progress_queue is not None:
+        report = lambda it: progress_queue.put((tag, it))
+    return search_position(Board(black, white), player, time_limit, mode='serial',
+                           on_iteration=report, stop=stop_flags[slot:slot+1], **limits)
+
+@contextlib.contextmanager
+def _private_tables():
+    """
+    Run the enclosed search on an empty process-private TT and fresh
+    ordering tables, and put the shared ones back afterwards. The tables
+    are module globals, so no other search may run in this process
+    meanwhile.
+    """
+    global trans_table, killers, history, _private_tt
+    if _private_tt is None:
+        _private_tt = TranspositionTable(DETERMINISTIC_TT_MB)
+    _private_tt.clear()
+    saved = trans_table, killers, history
+    trans_table, killers, history = _private_tt, new_killers(), new_history()
+    try:
+        yield
+    finally:
+        trans_table, killers, history = saved
+
+def _root_worker(args):
+    black, white, player, mv, depth, alpha, beta, gen, slot = args
+    if gen != trans_table.generation:
+        _new_search(gen)
+    stop = stop_flags[slot:slot+1]
+    b = Board(black, white)
+    b.apply_move(mv, player)
+    before = stats.copy()
+    score = -negamax(b, -player, depth, -beta, -alpha, stop, ply=1)
+    return mv, score, bool(stop[0]), stats - before
+
+def _search_root(root: Board, player: int, moves: list[int], depth: int,
+                 alpha: int, beta: int, stop: np.ndarray,
+                 node_limit: int | None = None) -> tuple[int, int, bool, np.ndarray]:
+    """
+    Serial root search; returns (best_move, best_score, completed, counts)
+    where `counts` are the kernel counters it added (see `counters`).
+    It is abandoned like a stopped one once the process node counter
+    passes `node_limit`, checked after each root move.
+    """
+    best_move, best_score = moves[0], -INF
+    before = stats.copy()
+    for mv in moves:
+        root.apply_move(mv, player)
+        score = -negamax(root, -player, depth-1, -beta, -alpha, stop, ply=1)
+        root.undo()
+        if stop[0] or (node_limit is not None and stats[ST_NODES] >= node_limit):
+            return best_move, best_score, False, stats - before
         if score > best_score:
             best_score = score
+            best_move = mv
         alpha = max(alpha, score)
         if alpha >= beta:
             break
+    return best_move, best_score, True, stats - before
 
-    tt_store(key, depth, best_score, alpha, beta, orig_alpha)
-    return best_score
+def _time_left(deadline: float) -> float | None:
+    """Seconds to `deadline` as a wait timeout; None when there is none."""
+    if deadline == float('inf'):
+        return None
+    return max(0.0, deadline - time.monotonic())
 
-def _root_worker(args):
-    black, white, player, mv, depth = args
+def _abort(pool: SearchPool, slot: int,
+           futures: list[concurrent.futures.Future]) -> None:
+    """Stop the workers of a search and wait for them to unwind."""
+    pool.stop_flags[slot] = 1
+    for fut in futures:
+        fut.cancel()
+    concurrent.futures.wait(futures)
+
+def _parallel_root(pool: SearchPool, slot: int, root: Board, player: int,
+                   moves: list[int], depth: int, deadline: float,
+                   alpha: int = -INF, beta: int = INF) -> tuple[int, int, bool, np.ndarray]:
+    """Search of every root move on the pool, all with the same window."""
+    best_move, best_score, counts = moves[0], -INF, new_stats()
+    args = [(root.black, root.white, player, mv, depth-1, alpha, beta,
+             trans_table.generation, slot) for mv in moves]
+    futures = [pool.submit(_root_worker, arg) for arg in args]
+    try:
+        for fut in concurrent.futures.as_completed(
+                futures, timeout=_time_left(deadline)):
+            mv, score, aborted, n = fut.result()
+            counts += n
+            if aborted:
+                break
+            if score > best_score:
+                best_score = score
+                best_move = mv
+        else:
+            return best_move, best_score, True, counts
+    except concurrent.futures.TimeoutError:
+        pass
+    _abort(pool, slot, futures)
+    return best_move, best_score, False, counts
+
+def _ybwc_root(pool: SearchPool, slot: int, root: Board, player: int,
+               moves: list[int], depth: int, deadline: float,
+               alpha: int = -INF, beta: int = INF) -> tuple[int, int, bool, np.ndarray]:
+    """
+    Young Brothers Wait at the root: the first (PV) move is searched here
+    with the full window, then its siblings run on the pool with a null
+    window at the established bound. A null-window fail high only bounds
+    the score from below, so such a sibling is re-searched with the
+    window current at that time and only the re-search's score is used
+    (unless the bound alone reaches beta). On a beta cutoff the siblings
+    still running are stopped.
+    """
+    stop = pool.stop_flags[slot:slot+1]
+    best_move, best_score, done, counts = _search_root(
+        root, player, moves[:1], depth, alpha, beta, stop)
+    if not done or len(moves) == 1 or best_score >= beta:
+        return best_move, best_score, done, counts
+    alpha = max(alpha, best_score)
+
+    gen = trans_table.generation
+    def submit(mv: int, a: int, b: int) -> concurrent.futures.Future:
+        return pool.submit(_root_worker, (root.black, root.white, player, mv,
+                                          depth-1, a, b, gen, slot))
+    # future -> (alpha it was issued at, whether it is a re-search)
+    pending = {submit(mv, alpha, alpha+1): (alpha, False) for mv in moves[1:]}
+    futures = list(pending)
+    try:
+        while pending:
+            finished, _ = concurrent.futures.wait(
+                pending, timeout=_time_left(deadline),
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            if not finished:
+                break
+            for fut in finished:
+                issued, research = pending.pop(fut)
+                mv, score, aborted, n = fut.result()
+                counts += n
+                if aborted:
+                    raise concurrent.futures.TimeoutError
+                if alpha >= beta:
+                    continue
+                if research or score >= beta:
+                    if score > alpha:
+                        alpha, best_score, best_move = score, score, mv
+                elif score > issued:
+                    fut = submit(mv, alpha, beta)
+                    pending[fut] = (alpha, True)
+                    futures.append(fut)
+            if alpha >= beta:
+                counts += _cut_siblings(pool, slot, list(pending), deadline)
+                pending = {}
+        else:
+            return best_move, best_score, True, counts
+    except concurrent.futures.TimeoutError:
+        pass
+    _abort(pool, slot, futures)
+    return best_move, best_score, False, counts
+
+def _cut_siblings(pool: SearchPool, slot: int, futures: list[concurrent.futures.Future],
+                  deadline: float) -> np.ndarray:
+    """
+    After a beta cutoff: stop the sibling searches still queued or
+    running, wait for them and re-arm the search's stop flag (unless its
+    deadline passed meanwhile). Returns the counters they added.
+    """
+    pool.stop_search(slot)
+    for fut in futures:
+        fut.cancel()
+    concurrent.futures.wait(futures)
+    pool.stop_flags[slot] = 0 if time.monotonic() < deadline else 1
+    counts = new_stats()
+    for fut in futures:
+        if not fut.cancelled():
+            counts += fut.result()[3]
+    return counts
+
+def _deterministic_worker(args):
+    black, white, player, mv, depth, alpha, beta, slot = args
+    stop = stop_flags[slot:slot+1]
     b = Board(black, white)
-    b.apply_move(mv, player)
-    score = -negamax(b, -player, depth, -INF, INF)
-    return mv, score
+    before = stats.copy()
+    with _private_tables():
+        b.apply_move(mv, player)
+        # internal iterative deepening fills the empty tables for the real search
+        for d in range(1, min(depth, b.empties())):
+            negamax(b, -player, d, -INF, INF, stop, ply=1)
+        score = -negamax(b, -player, depth, -beta, -alpha, stop, ply=1)
+        b.undo()
+        pv = principal_variation(b, player, mv)
+    return mv, score, bool(stop[0]), stats - before, pv
 
-def iterative_deepening(root: Board, player: int, time_limit: float) -> int:
+def _deterministic_root(pool: SearchPool, slot: int, root: Board, player: int,
+                        moves: list[int], depth: int, deadline: float,
+                        alpha: int = -INF, beta: int = INF):
+    """
+    Every root move on the pool with the same window, each searched from
+    empty private tables, and the results merged in `moves` order (ties
+    go to the earlier move). Nothing is cut short on a bound, so the move,
+    score, PV and node count do not depend on the workers or their timing.
+    That costs work: with no bound or ordering shared between root moves,
+    it searches several times the nodes of a serial search (about 6x at
+    depth 7 on the benchmark positions), and pays off only with enough
+    workers. Returns the PV as a fifth element.
+    """
+    best_move, best_score, best_pv, counts = moves[0], -INF, [moves[0]], new_stats()
+    args = [(root.black, root.white, player, mv, depth-1, alpha, beta, slot)
+            for mv in moves]
+    futures = [pool.submit(_deterministic_worker, arg) for arg in args]
+    try:
+        for fut in futures:
+            mv, score, aborted, n, pv = fut.result(timeout=_time_left(deadline))
+            counts += n
+            if aborted:
+                break
+            if score > best_score:
+                best_move, best_score, best_pv = mv, score, pv
+        else:
+            return best_move, best_score, True, counts, best_pv
+    except concurrent.futures.TimeoutError:
+        pass
+    _abort(pool, slot, futures)
+    return best_move, best_score, False, counts, best_pv
+
+_PARALLEL_ROOTS = {'root': _parallel_root, 'ybwc': _ybwc_root}
+
+def search_position(root: Board, player: int, time_limit: float | None,
+                    pool: SearchPool | None = None, mode: str = 'ybwc',
+                    endgame_empties: int = ENDGAME_EMPTIES,
+                    on_iteration=None, control: SearchControl | None = None,
+                    first_move: int | None = None,
+                    stop: np.ndarray | None = None,
+                    max_depth: int | None = None,
+                    max_nodes: int | None = None,
+                    deterministic: bool = False) -> SearchResult:
     """
     Iterative-deepening negamax with alpha-beta, transposition table,
     principal-variation move ordering, aspiration windows, exact endgame,
-    and a strict monotonic deadline.
+    and a strict monotonic deadline. Deep iterations run on `pool`, or on
+    the module-wide pool if none is given, using the PARALLEL_MODES
+    algorithm `mode`; with mode 'serial' they run here and no pool is used.
+
+    With `endgame_empties` or fewer empty squares, the iterations up to
+    ENDGAME_PREPASS are followed directly by an exact solve: win/loss/draw
+    first, then the exact disc difference.
+
+    At the deadline a shared stop flag aborts the kernel in this process
+    and in every worker; the move from the last completed depth is played.
+    Each iteration, finished or aborted, is passed to `on_iteration` (see
+    `iteration_logger`) and kept in the returned SearchResult.
+
+    `control` can stop the search early from another thread, and
+    `first_move` (e.g. the best move of an earlier ponder search) is
+    searched first until an iteration finds a better one. A serial search
+    can be given its one-element `stop` flag, such as a pool slot.
+
+    Besides (or instead of, with time_limit=None) the deadline, the search
+    ends after the iteration at `max_depth`, or once it has visited
+    `max_nodes` nodes: checked after every root move in serial iterations
+    and between iterations otherwise. The endgame solve counts as an
+    iteration at the depth it is started from.
+
+    A `deterministic` search takes a depth or node limit but no time
+    limit, and runs on empty private tables instead of the shared TT, so
+    the same position and limits always give the same move, score, PV and
+    node count. Its parallel iterations use `_deterministic_root` whatever
+    the `mode`, and give the same result for any number of workers.
     """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"unknown search mode {mode!r}")
+    if time_limit is None and max_depth is None and max_nodes is None:
+        raise ValueError("give a time, depth or node limit")
+    if deterministic and time_limit is not None:
+        raise ValueError("a deterministic search takes a depth or node limit, not a time limit")
     start_time = time.monotonic()
-    deadline = start_time + time_limit
+    deadline = float('inf') if time_limit is None else start_time + time_limit
+    node_limit = None if max_nodes is None else int(stats[ST_NODES]) + max_nodes
 
     moves = get_moves(root, player)
     if not moves:
-        return 0
+        return SearchResult()
+    if first_move in moves:
+        moves = [first_move] + [m for m in moves if m != first_move]
+
+    if mode == 'serial':
+        pool, slot = None, None
+        if stop is None:
+            stop = np.zeros(1, dtype=np.int64)
+    else:
+        if pool is None:
+            pool = get_pool()
+        slot = pool.acquire_slot()
+        stop = pool.stop_flags[slot:slot+1]
+    timer = None
+    if time_limit is not None:
+        timer = threading.Timer(time_limit, stop.fill, args=(1,))
+        timer.start()
+    if control is not None:
+        control.attach(stop)
+    tables = _private_tables() if deterministic else contextlib.nullcontext()
+    parallel_root = _deterministic_root if deterministic else _PARALLEL_ROOTS.get(mode)
 
+    result = SearchResult(moves[0])
     best_move = moves[0]
     prev_score = 0
     depth = 1
+    empties = root.empties()
 
-    while True:
-        now = time.monotonic()
-        if now >= deadline:
-            break
+    def run(depth: int, alpha: int, beta: int, parallel: bool):
+        if control is not None and control.stopped:
+            stop.fill(1)   # in case a YBWC cutoff re-armed the flag after the stop
+        if parallel and pool is not None:
+            return parallel_root(pool, slot, root, player, moves, depth,
+                                 deadline, alpha, beta)
+        return _search_root(root, player, moves, depth, alpha, beta, stop, node_limit)
 
-        # PV move ordering: try last best_move first
-        if depth > 1 and best_move in moves:
-            moves = [best_move] + [m for m in moves if m != best_move]
-
-        # Set up aspiration window
-        if depth > 1:
-            delta = 50  # centipawns
-            alpha = prev_score - delta
-            beta  = prev_score + delta
-            alpha = max(-INF, alpha)
-            beta  = min(INF, beta)
-        else:
-            alpha = -INF
-            beta  = INF
+    def record(depth: int, kind: str, t0: float, found, aspiration: str | None = None) -> None:
+        mv, score, done, counts = found[:4]
+        # the deterministic root brings its PV from the workers' private tables
+        pv = found[4] if len(found) > 4 else principal_variation(root, player, mv)
+        now = time.monotonic()
+        it = Iteration(depth, kind, mv, score, done, now - t0, now - start_time,
+                       counts, aspiration, pv)
+        result.add(it)
+        if on_iteration is not None:
+            on_iteration(it)
 
-        current_best = best_move
+    try:
+        with tables:
+            _new_search()
+            while time.monotonic() < deadline:
+                if max_depth is not None and depth > max_depth:
+                    break
+                if max_nodes is not None and result.nodes >= max_nodes:
+                    break
+                # PV move ordering: try last best_move first
+                if depth > 1 and best_move in moves:
+                    moves = [best_move] + [m for m in moves if m != best_move]
 
-        # Shallow: serial search
-        if depth < 3:
-            best_score = -INF
-            for mv in moves:
-                if time.monotonic() >= deadline:
+                if depth >= empties or (depth > ENDGAME_PREPASS and empties <= endgame_empties):
+                    # Exact endgame: WLD window first, then the exact score
+                    for kind, alpha, beta in (('wld', -1, 1), ('exact', -INF, INF)):
+                        t0 = time.monotonic()
+                        found = run(empties, alpha, beta, parallel=True)
+                        record(empties, kind, t0, found)
+                        if not found[2]:
+                            break
+                        best_move = found[0]
+                        moves = [best_move] + [m for m in moves if m != best_move]
                     break
-                root.apply_move(mv, player)
-                score = -negamax(root, -player, depth-1, -beta, -alpha)
-                root.undo()
-                if score > best_score:
-                    best_score = score
-                    current_best = mv
-                alpha = max(alpha, score)
-                # aspiration fail: full re-search
-                if alpha >= beta:
-                    best_score = -negamax(root, player, depth, -INF, INF)
-                    current_best = mv
+
+                t0 = time.monotonic()
+                aspiration = None
+                if depth < 3:
+                    # Shallow: serial search
+                    if depth > 1:
+                        # Aspiration window around the previous score
+                        delta = 50
+                        alpha = max(-INF, prev_score - delta)
+                        beta  = min(INF, prev_score + delta)
+                    else:
+                        alpha, beta = -INF, INF
+                    found = run(depth, alpha, beta, parallel=False)
+                    # aspiration fail: full-window re-search
+                    if found[2] and (found[1] <= alpha or found[1] >= beta):
+                        aspiration = 'low' if found[1] <= alpha else 'high'
+                        counts = found[3]
+                        found = run(depth, -INF, INF, parallel=False)
+                        found = found[:3] + (found[3] + counts,)
+                else:
+                    # Deep: parallel root search
+                    found = run(depth, -INF, INF, parallel=True)
+                record(depth, 'midgame', t0, found, aspiration)
+
+                if not found[2]:
                     break
-            prev_score = best_score
-            best_move = current_best
-            depth += 1
-            continue
+                best_move, prev_score = found[0], found[1]
+                depth += 1
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if control is not None:
+            control.detach(stop)
+        if pool is not None:
+            pool.release_slot(slot)
 
-        # Deep: parallel root search
-        time_left = deadline - time.monotonic()
-        if time_left <= 0:
-            break
-        best_score = -INF
-        args = [(root.black, root.white, player, mv, depth-1) for mv in moves]
-        with concurrent.futures.ProcessPoolExecutor() as ex:
-            futures = {ex.submit(_root_worker, arg): arg[3] for arg in args}
-            try:
-                for fut in concurrent.futures.as_completed(futures, timeout=time_left):
-                    mv, score = fut.result()
-                    if score > best_score:
-                        best_score = score
-                        current_best = mv
-            except concurrent.futures.TimeoutError:
-                break
-        best_move = current_best
-        depth += 1
+    return result
 
-    return best_move
+def iterative_deepening(root: Board, player: int, time_limit: float | None,
+                        pool: SearchPool | None = None, mode: str = 'ybwc',
+                        endgame_empties: int = ENDGAME_EMPTIES,
+                        max_depth: int | None = None, max_nodes: int | None = None,
+                        deterministic: bool = False) -> int:
+    """The move `search_position` picks (0 if `player` has none)."""
+    result = search_position(root, player, time_limit, pool, mode, endgame_empties,
+                             max_depth=max_depth, max_nodes=max_nodes,
+                             deterministic=deterministic)
+    return 0 if result.move is None else result.move
 
 if __name__ == '__main__':
     b = Board.start_pos()
-    print("Best move (1s search):", iterative_deepening(b, 1, 1.0))
\ No newline at end of file
+    print("1s search:", search_position(b, 1, 1.0, on_iteration=print))
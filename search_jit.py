@@ -0,0 +1,144 @@
+# search_jit.py
+
+import numpy as np
+from numba import njit
+from jit_utils import moves_bb, flips_bb, popcount, bit_index, ZERO
+from eval_utils import static_eval
+from pattern_utils import pattern_update
+from symmetry_utils import INVERSE, canonical, transform_bit
+from tt_utils import (EXACT, LOWER, UPPER, NO_MOVE, zobrist, tt_probe, tt_store,
+                      tt_depth, tt_flag, tt_value, tt_move)
+from order_utils import MAX_PLY, order_moves, pick_move, record_cutoff
+
+INF = 10**9
+DISC_SCORE = 1000   # final disc difference is worth more than any heuristic score
+STOP_POLL  = 1023   # poll the stop flag when nodes & STOP_POLL == 0
+
+# stats[] slots
+ST_NODES         = 0
+ST_TT_PROBES     = 1
+ST_TT_HITS       = 2
+ST_TT_COLLISIONS = 3
+ST_CUTOFFS       = 4   # beta cutoffs in the midgame kernel
+ST_FIRST_CUTOFFS = 5   # ... of which on the first move searched
+N_STATS          = 6
+
+
+def new_stats() -> np.ndarray:
+    return np.zeros(N_STATS, dtype=np.int64)
+
+
+@njit(cache=True)
+def final_score(us, them):
+    """Exact game result from the side to move, scaled by DISC_SCORE."""
+    return (popcount(us) - popcount(them)) * DISC_SCORE
+
+
+@njit(cache=True, nogil=True)
+def negamax_bb(us, them, depth, ply, alpha, beta, tt, gen, killers, history,
+               feat, weights, canon_empties, stats, stop):
+    """
+    Negamax with alpha-beta and transposition table over raw bitboards.
+    Scores are from the point of view of `us`, the side to move. `ply` is
+    the distance from the root, indexing the `killers` table; `killers` and
+    `history` are updated on beta cutoffs (see order_utils).
+
+    With pattern `weights`, `feat[ply]` must hold the pattern indices of
+    this position; children get theirs incrementally in `feat[ply + 1]`.
+
+    Positions with at least `canon_empties` empty squares are hashed in
+    their canonical orientation (see symmetry_utils), so symmetric
+    transpositions share one TT entry; the stored move is mapped to match.
+
+    `stop` is a one-element array polled every STOP_POLL nodes; once it is
+    non-zero the search unwinds without storing anything and returns 0.
+    """
+    stats[ST_NODES] += 1
+    if stats[ST_NODES] & STOP_POLL == 0 and stop[0] != 0:
+        return 0
+    sym = 0
+    if popcount(~(us | them)) >= canon_empties:
+        cu, ct, sym = canonical(us, them)
+        key = zobrist(cu, ct)
+    else:
+        key = zobrist(us, them)
+    orig_alpha = alpha
+
+    stats[ST_TT_PROBES] += 1
+    data = tt_probe(tt, key)
+    tt_mv = NO_MOVE
+    if data != ZERO:
+        stats[ST_TT_HITS] += 1
+        tt_mv = tt_move(data)
+        if sym != 0 and tt_mv != NO_MOVE:
+            tt_mv = transform_bit(tt_mv, INVERSE[sym])
+        if tt_depth(data) >= depth:
+            e_flag = tt_flag(data)
+            e_value = tt_value(data)
+            if e_flag == EXACT:
+                return e_value
+            if e_flag == LOWER and e_value > alpha:
+                alpha = e_value
+            elif e_flag == UPPER and e_value < beta:
+                beta = e_value
+            if alpha >= beta:
+                return e_value
+
+    use_patterns = weights.shape[0] > 0
+    moves = moves_bb(us, them)
+    if moves == ZERO:
+        if moves_bb(them, us) == ZERO:
+            return final_score(us, them)
+        # pass: same depth, other side to move
+        if use_patterns:
+            feat[ply + 1] = feat[ply]
+        return -negamax_bb(them, us, depth, ply + 1, -beta, -alpha, tt, gen,
+                           killers, history, feat, weights, canon_empties,
+                           stats, stop)
+
+    if depth == 0:
+        return static_eval(us, them, feat[ply], ply, weights)
+
+    n_moves = popcount(moves)
+    sqs = np.empty(n_moves, dtype=np.uint64)
+    keys = np.empty(n_moves, dtype=np.int64)
+    n = order_moves(moves, us, them, depth, min(ply, MAX_PLY - 1), tt_mv,
+                    killers, history, sqs, keys)
+
+    best = -INF
+    best_mv = NO_MOVE
+    for i in range(n):
+        sq = pick_move(sqs, keys, i, n)
+        flipped = flips_bb(us, them, sq)
+        if use_patterns:
+            feat[ply + 1] = feat[ply]
+            pattern_update(feat[ply + 1], sq, flipped, ply)
+        score = -negamax_bb(them ^ flipped, us | sq | flipped, depth - 1,
+                            ply + 1, -beta, -alpha, tt, gen, killers, history,
+                            feat, weights, canon_empties, stats, stop)
+        if stop[0] != 0:
+            return 0
+        if score > best:
+            best = score
+            best_mv = bit_index(sq)
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            stats[ST_CUTOFFS] += 1
+            if i == 0:
+                stats[ST_FIRST_CUTOFFS] += 1
+            record_cutoff(killers, history, min(ply, MAX_PLY - 1), depth, best_mv)
+            break
+
+    if best <= orig_alpha:
+        flag = UPPER
+        best_mv = NO_MOVE   # fail-low: no move is known to be best
+    elif best >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    if sym != 0 and best_mv != NO_MOVE:
+        best_mv = transform_bit(best_mv, sym)
+    if tt_store(tt, key, depth, flag, best, best_mv, gen):
+        stats[ST_TT_COLLISIONS] += 1
+    return best
@@ -0,0 +1,327 @@
+# server.py
+
+import re
+import sys
+import asyncio
+import argparse
+import threading
+from board import Board
+from engine import TOTAL_TIME, TimeManager
+from search import MAX_QUEUED_SEARCHES, SearchPool, Iteration, SearchResult
+from generate_book import score_discs
+from book_utils import OpeningBook, load_book
+
+# Resident engine server. Clients talk a line protocol over stdin/stdout
+# or a local TCP socket; every command names the game it is about, so one
+# connection can drive many games and several connections can share the
+# engine. Searches run one per worker on a single SearchPool (so at most
+# `workers`, and never more than MAX_QUEUED_SEARCHES, think at once; more
+# wait their turn) and report back through the pool's progress queue. Each
+# game has its own TimeManager clock, charged with the search time of its
+# moves.
+#
+#   ping <n>                       -> pong <n>
+#   new <game> [<seconds>]         -> ok      start position, black to move
+#   setboard <game> <fen> <b|w>    -> ok      flat-FEN (X black, O white, . empty)
+#   move <game> <square|pass>      -> ok      play a move for the side to move
+#   go <game> [<seconds>]          -> info <game> depth <d> score <discs> nodes <n> time <s> pv <...>
+#                                     ...
+#                                     bestmove <game> <square|pass> score <discs> depth <d>
+#   stop <game>                    -> the running go answers at once
+#   info <game>                    -> status <game> <b|w> ply <n> clock <s> <idle|searching>
+#   free <game>                    -> ok
+#   quit                           -> bye     (on stdin it also stops the server)
+#
+# Anything malformed gets "error <message>". `go` without seconds uses the
+# game clock's slice; book moves are answered without a search.
+#
+# Squares use standard Othello coordinates: files a-h left to right and
+# ranks 1-8 from the top, so black's opening moves are d3, c4, f5 and e6.
+# (The console's A1-H8 labels number the ranks from the bottom instead.)
+# A flat-FEN lists the squares a1 b1 ... h1 a2 ... h8.
+
+DEFAULT_PORT = 7270
+SQUARE = re.compile(r"[a-h][1-8]")
+
+
+def square_name(mv: int) -> str:
+    """Protocol name of square index `mv` (0 is a1, the top-left corner)."""
+    return f"{'abcdefgh'[mv % 8]}{mv // 8 + 1}"
+
+
+def parse_square(name: str) -> int:
+    """Square index of a protocol square name; the inverse of `square_name`."""
+    return (int(name[1]) - 1) * 8 + 'abcdefgh'.index(name[0].lower())
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Game:
+    """One game on the server: position, side to move, clock and running search."""
+    def __init__(self, name: str, total_time: float = TOTAL_TIME):
+        self.name = name
+        self.board = Board.start_pos()
+        self.player = 1
+        self.ply = 0
+        self.timer = TimeManager()
+        self.timer.remaining = total_time
+        self.search: asyncio.Task | None = None
+        self.slot: int | None = None   # stop slot, once a worker runs the search
+        self.stopped = False           # stop arrived while the search was queued
+        self.search_id = 0
+        self.out = None   # writer of the connection that started the search
+
+    def status(self) -> str:
+        side = 'b' if self.player == 1 else 'w'
+        state = "searching" if self.search is not None else "idle"
+        return (f"status {self.name} {side} ply {self.ply} "
+                f"clock {self.timer.remaining:.2f} {state}")
+
+
+class EngineServer:
+    """
+    Protocol state shared by all connections. `handle` runs one command
+    line and writes the replies with `out(line)`; searches finish later
+    and write their `info`/`bestmove` lines to the connection that asked.
+    """
+    def __init__(self, pool: SearchPool, book: OpeningBook | None = None):
+        if pool.progress is None:
+            raise ValueError("the server needs a SearchPool(progress=True)")
+        self.pool = pool
+        self.book = book if book is not None else OpeningBook.from_entries({})
+        self.games: dict[str, Game] = {}
+        self.slots = asyncio.Semaphore(min(pool.workers, MAX_QUEUED_SEARCHES))
+        self.loop = asyncio.get_running_loop()
+        self._pump = threading.Thread(target=self._pump_progress, name="progress",
+                                      daemon=True)
+        self._pump.start()
+
+    async def close(self) -> None:
+        for game in list(self.games.values()):
+            await self._cancel(game)
+        self.pool.progress.put((None, None))
+        await self.loop.run_in_executor(None, self._pump.join)
+
+    # --- progress from the workers ------------------------------------------
+
+    def _pump_progress(self) -> None:
+        while True:
+            tag, it = self.pool.progress.get()
+            if tag is None:
+                return
+            self.loop.call_soon_threadsafe(self._on_iteration, tag, it)
+
+    def _on_iteration(self, tag: tuple[str, int], it: Iteration) -> None:
+        name, search_id = tag
+        game = self.games.get(name)
+        if game is None or game.search_id != search_id or not it.completed:
+            return
+        pv = " ".join(square_name(mv) for mv in it.pv)
+        game.out(f"info {name} depth {it.depth} score {score_discs(it.score, it.kind):.2f} "
+                 f"nodes {it.nodes} time {it.elapsed:.2f} pv {pv}")
+
+    # --- commands ------------------------------------------------------------
+
+    async def handle(self, line: str, out) -> bool:
+        """Run one command; False once the client said quit."""
+        words = line.split()
+        if not words:
+            return True
+        cmd, args = words[0].lower(), words[1:]
+        try:
+            if cmd == 'quit':
+                out("bye")
+                return False
+            if cmd == 'ping':
+                out(" ".join(["pong"] + args))
+                return True
+            handler = getattr(self, f"_cmd_{cmd}", None)
+            if handler is None:
+                raise ProtocolError(f"unknown command {cmd}")
+            if not args:
+                raise ProtocolError(f"{cmd} needs a game name")
+            await handler(args[0], args[1:], out)
+        except ProtocolError as exc:
+            out(f"error {exc}")
+        return True
+
+    def _game(self, name: str) -> Game:
+        game = self.games.get(name)
+        if game is None:
+            raise ProtocolError(f"no game {name}")
+        return game
+
+    async def _cancel(self, game: Game) -> None:
+        """Abandon the game's search without answering it."""
+        if game.search is None:
+            return
+        game.search_id += 1   # silences its info and bestmove lines
+        if game.slot is None:
+            game.search.cancel()
+        else:
+            self.pool.stop_search(game.slot)
+        await asyncio.gather(game.search, return_exceptions=True)
+
+    async def _cmd_new(self, name: str, args: list[str], out) -> None:
+        if name in self.games:
+            await self._cancel(self.games[name])
+        try:
+            total = float(args[0]) if args else TOTAL_TIME
+        except ValueError:
+            raise ProtocolError(f"bad time {args[0]}")
+        self.games[name] = Game(name, total)
+        out("ok")
+
+    async def _cmd_free(self, name: str, args: list[str], out) -> None:
+        game = self._game(name)
+        await self._cancel(game)
+        del self.games[name]
+        out("ok")
+
+    async def _cmd_setboard(self, name: str, args: list[str], out) -> None:
+        game = self._game(name)
+        if len(args) != 2 or len(args[0]) != 64 or args[1] not in ('b', 'w'):
+            raise ProtocolError("usage: setboard <game> <64-char fen> <b|w>")
+        if set(args[0].upper()) - set("XO."):
+            raise ProtocolError("fen may only contain X, O and .")
+        await self._cancel(game)
+        game.board = Board.from_flat_fen(args[0].upper())
+        game.player = 1 if args[1] == 'b' else -1
+        game.ply = 60 - game.board.empties()
+        out("ok")
+
+    async def _cmd_move(self, name: str, args: list[str], out) -> None:
+        game = self._game(name)
+        if game.search is not None:
+            raise ProtocolError(f"{name} is searching")
+        if len(args) != 1:
+            raise ProtocolError("usage: move <game> <square|pass>")
+        legal = game.board.legal_moves(game.player)
+        if args[0].lower() == 'pass':
+            if legal:
+                raise ProtocolError("pass with legal moves")
+        else:
+            if not SQUARE.fullmatch(args[0].lower()):
+                raise ProtocolError(f"bad square {args[0]}")
+            mv = parse_square(args[0])
+            if mv not in legal:
+                raise ProtocolError(f"illegal move {args[0]}")
+            game.board.apply_move(mv, game.player)
+            game.ply += 1
+        game.player = -game.player
+        out("ok")
+
+    async def _cmd_info(self, name: str, args: list[str], out) -> None:
+        out(self._game(name).status())
+
+    async def _cmd_stop(self, name: str, args: list[str], out) -> None:
+        game = self._game(name)
+        if game.search is None:
+            return
+        if game.slot is None:
+            game.stopped = True
+        else:
+            self.pool.stop_search(game.slot)
+
+    async def _cmd_go(self, name: str, args: list[str], out) -> None:
+        game = self._game(name)
+        if game.search is not None:
+            raise ProtocolError(f"{name} is already searching")
+        try:
+            think = float(args[0]) if args else game.timer.slice(game.ply)
+        except ValueError:
+            raise ProtocolError(f"bad time {args[0]}")
+        if not game.board.legal_moves(game.player):
+            out(f"bestmove {name} pass score 0.00 depth 0")
+            return
+        mv = self.book.choose(game.board, game.player)
+        if mv is not None:
+            out(f"bestmove {name} {square_name(mv)} score 0.00 depth 0 book")
+            return
+        game.search_id += 1
+        game.out = out
+        game.stopped = False
+        game.search = asyncio.create_task(self._search(game, think))
+
+    async def _search(self, game: Game, think: float) -> None:
+        search_id = game.search_id
+        try:
+            async with self.slots:
+                if game.stopped:
+                    think = 0.0   # answers with the first legal move
+                fut, game.slot = self.pool.submit_search(
+                    game.board, game.player, think, (game.name, search_id))
+                result: SearchResult = await asyncio.wrap_future(fut)
+            if game.search_id != search_id:
+                return
+            game.timer.spend(result.elapsed)
+            move = "pass" if result.move is None else square_name(result.move)
+            game.out(f"bestmove {game.name} {move} "
+                     f"score {score_discs(result.score, result.kind):.2f} "
+                     f"depth {result.depth}")
+        finally:
+            game.search = None
+            game.slot = None
+
+    # --- transports ------------------------------------------------------------
+
+    async def serve_connection(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter) -> None:
+        def out(line: str) -> None:
+            if not writer.is_closing():
+                writer.write(line.encode() + b"\n")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw or not await self.handle(raw.decode(errors='replace'), out):
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_stdin(self) -> None:
+        reader = asyncio.StreamReader()
+        await self.loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader),
+                                          sys.stdin)
+        def out(line: str) -> None:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+        while True:
+            raw = await reader.readline()
+            if not raw or not await self.handle(raw.decode(errors='replace'), out):
+                return
+
+
+async def main(port: int | None, use_stdin: bool, workers: int | None) -> None:
+    pool = SearchPool(workers, progress=True)
+    try:
+        server = EngineServer(pool, load_book())
+        tcp = None
+        if port is not None:
+            tcp = await asyncio.start_server(server.serve_connection, '127.0.0.1', port)
+            print(f"# listening on 127.0.0.1:{port}", file=sys.stderr)
+        try:
+            if use_stdin:
+                await server.serve_stdin()
+            elif tcp is not None:
+                await tcp.serve_forever()
+        finally:
+            if tcp is not None:
+                tcp.close()
+            await server.close()
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Line-protocol engine server.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="local TCP port (0 for stdin only)")
+    parser.add_argument("--no-stdin", action="store_true", help="serve the socket only")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent searches")
+    args = parser.parse_args()
+    asyncio.run(main(args.port or None, not args.no_stdin, args.workers))
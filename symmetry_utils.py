@@ -0,0 +1,107 @@
+# symmetry_utils.py
+
+import numpy as np
+from numba import njit, uint64
+from board import Board
+from jit_utils import ONE, bit_index
+
+# The 8 symmetries of the board, numbered like pattern_utils.SYMMETRIES:
+# bit 2 transposes (r, c) -> (c, r), then bit 0 mirrors the column and
+# bit 1 the row. Each step is a handful of delta swaps on the bitboard;
+# in Board layout (square i at bit 63 - i) rows are bytes and columns bit
+# positions within a byte, so the same swaps work on square coordinates.
+
+N_SYMMETRIES = 8
+INVERSE = np.array([0, 1, 2, 3, 4, 6, 5, 7], dtype=np.int64)   # sym -> its inverse
+
+_K1 = uint64(0x5555555555555555)
+_K2 = uint64(0x3333333333333333)
+_K4 = uint64(0x0F0F0F0F0F0F0F0F)
+_B1 = uint64(0x00FF00FF00FF00FF)
+_B2 = uint64(0x0000FFFF0000FFFF)
+_T1 = uint64(0x5500550055005500)
+_T2 = uint64(0x3333000033330000)
+_T4 = uint64(0x0F0F0F0F00000000)
+
+
+@njit("uint64(uint64)", cache=True)
+def mirror_columns(x):
+    """Mirror the board left-right (column c -> 7 - c)."""
+    x = ((x >> ONE) & _K1) | ((x & _K1) << ONE)
+    x = ((x >> uint64(2)) & _K2) | ((x & _K2) << uint64(2))
+    return ((x >> uint64(4)) & _K4) | ((x & _K4) << uint64(4))
+
+
+@njit("uint64(uint64)", cache=True)
+def mirror_rows(x):
+    """Mirror the board top-bottom (row r -> 7 - r): a byte swap."""
+    x = ((x >> uint64(8)) & _B1) | ((x & _B1) << uint64(8))
+    x = ((x >> uint64(16)) & _B2) | ((x & _B2) << uint64(16))
+    return (x >> uint64(32)) | (x << uint64(32))
+
+
+@njit("uint64(uint64)", cache=True)
+def transpose(x):
+    """Reflect the board in its main diagonal ((r, c) -> (c, r))."""
+    t = _T4 & (x ^ (x << uint64(28)))
+    x ^= t ^ (t >> uint64(28))
+    t = _T2 & (x ^ (x << uint64(14)))
+    x ^= t ^ (t >> uint64(14))
+    t = _T1 & (x ^ (x << uint64(7)))
+    x ^= t ^ (t >> uint64(7))
+    return x
+
+
+@njit("uint64(uint64, int64)", cache=True)
+def transform(x, sym):
+    """Apply symmetry `sym` (0–7) to bitboard `x`."""
+    if sym & 4:
+        x = transpose(x)
+    if sym & 1:
+        x = mirror_columns(x)
+    if sym & 2:
+        x = mirror_rows(x)
+    return x
+
+
+@njit(cache=True)
+def canonical(us, them):
+    """
+    (us, them, sym): the smallest (us, them) over all 8 symmetries and the
+    symmetry that produces it.
+    """
+    best_us = us
+    best_them = them
+    best_sym = 0
+    for sym in range(1, N_SYMMETRIES):
+        u = transform(us, sym)
+        t = transform(them, sym)
+        if u < best_us or (u == best_us and t < best_them):
+            best_us = u
+            best_them = t
+            best_sym = sym
+    return best_us, best_them, best_sym
+
+
+@njit("int64(int64, int64)", cache=True)
+def transform_bit(bit, sym):
+    """Bit position of the square at `bit` after symmetry `sym`."""
+    return bit_index(transform(ONE << uint64(bit), sym))
+
+
+def transform_square(idx: int, sym: int) -> int:
+    """Square index (0 = A8) of `idx` after symmetry `sym`."""
+    r, c = divmod(idx, 8)
+    if sym & 4:
+        r, c = c, r
+    if sym & 1:
+        c = 7 - c
+    if sym & 2:
+        r = 7 - r
+    return 8 * r + c
+
+
+def canonical_board(board: Board) -> tuple[Board, int]:
+    """(canonical Board, sym) for a Board, black taken as the first side."""
+    b, w, sym = canonical(np.uint64(board.black), np.uint64(board.white))
+    return Board(int(b), int(w)), int(sym)
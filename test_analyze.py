@@ -0,0 +1,70 @@
+# test_analyze.py
+
+import itertools
+import pytest
+from board import Board
+from engine import coord_to_index
+from search import SearchPool
+from analyze import analyze, parse_position
+from test_search import random_position
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SearchPool(workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def line_of(b: Board, player: int) -> str:
+    return f"{b.to_flat_fen()} {'b' if player == 1 else 'w'}"
+
+
+def test_parse_position():
+    b, player = random_position(5, 9)
+    got, side = parse_position(line_of(b, player))
+    assert (got.black, got.white, side) == (b.black, b.white, player)
+    for bad in ["", "X" * 64, "X" * 63 + " b", "X" * 64 + " q", "Z" * 64 + " b"]:
+        with pytest.raises(ValueError):
+            parse_position(bad)
+
+
+def test_records_in_input_order(pool):
+    positions = [random_position(s, 6 + 3 * s) for s in range(8)]
+    lines = ["# header", ""] + [line_of(b, p) for b, p in positions] + ["junk"]
+    recs = list(analyze(lines, pool, max_depth=4, endgame_empties=0))
+    assert [r["line"] for r in recs] == list(range(3, 3 + len(positions) + 1))
+    assert recs[-1]["error"]
+    for rec, (b, player) in zip(recs, positions):
+        assert rec["depth"] == 4 and rec["kind"] == "midgame"
+        assert len(rec["pv"]) >= 1 and rec["pv"][0] == rec["move"]
+        assert rec["nodes"] > 0
+        assert rec["fen"] == b.to_flat_fen()
+        assert coord_to_index(rec["move"]) in b.legal_moves(player)
+    again = list(analyze(lines, pool, max_depth=4, endgame_empties=0))
+    strip = lambda r: {k: v for k, v in r.items() if k != "time"}
+    assert [strip(r) for r in again] == [strip(r) for r in recs]
+
+
+def test_pass_and_game_over(pool):
+    # white cannot move, black can: white passes
+    b = Board.from_flat_fen("XO" + "." * 62)
+    over = Board(0xFF, 0)   # white is wiped out
+    recs = list(analyze([line_of(b, -1), line_of(over, -1)], pool, max_depth=3))
+    assert recs[0]["move"] == "pass" and recs[0]["pv"][:2] == ["pass", "c8"]
+    assert recs[1]["move"] is None and recs[1]["kind"] == "final"
+    assert recs[1]["score"] == -8
+
+
+def test_input_is_read_lazily(pool):
+    b, player = random_position(1, 10)
+    read = itertools.count()
+    def source():
+        while True:
+            next(read)
+            yield line_of(b, player)
+    out = analyze(source(), pool, max_depth=2, window=3)
+    first = list(itertools.islice(out, 5))
+    out.close()
+    assert len(first) == 5
+    assert next(read) <= 5 + 3
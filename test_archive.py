@@ -0,0 +1,73 @@
+# test_archive.py
+
+import numpy as np
+import pytest
+from archive_utils import (ArchiveWriter, WTHOR_DTYPE, archive_positions,
+                           export_positions, game_moves, import_wthor, iter_positions,
+                           open_archive, read_wthor, select_games)
+from board import Board
+from test_tune import random_game
+
+
+def write_wthor(path, games, year=2001):
+    raw = np.zeros(len(games), dtype=WTHOR_DTYPE)
+    for i, moves in enumerate(games):
+        raw['moves'][i, :len(moves)] = [10 * (m // 8 + 1) + m % 8 + 1 for m in moves]
+        raw['black_player'][i] = i % 3
+        raw['white_player'][i] = 10 + i
+        raw['black_score'][i] = 30 + i
+    header = bytes([20, 1, 1, 1]) + len(games).to_bytes(4, 'little') \
+        + b"\0\0" + year.to_bytes(2, 'little') + bytes([8, 0, 22, 0])
+    with open(path, 'wb') as f:
+        f.write(header + raw.tobytes())
+
+
+def test_wthor_import_roundtrip(tmp_path):
+    games = [random_game(seed) for seed in range(5)]
+    wtb = str(tmp_path / "games.wtb")
+    write_wthor(wtb, games)
+    records = read_wthor(wtb)
+    assert [game_moves(r) for r in records] == games
+    assert set(records['year']) == {2001}
+
+    archive = str(tmp_path / "games.bin")
+    assert import_wthor([wtb, wtb], archive) == 10
+    stored = open_archive(archive)
+    assert len(stored) == 10
+    assert game_moves(stored[7]) == games[2]
+
+
+def test_select_and_replay(tmp_path):
+    archive = str(tmp_path / "games.bin")
+    games = [random_game(seed) for seed in range(6)]
+    with ArchiveWriter(archive) as w:
+        for i, moves in enumerate(games):
+            w.write_game(moves, black_player=i % 2, white_player=5)
+    stored = open_archive(archive)
+
+    assert list(select_games(stored, player=1)) == [1, 3, 5]
+    assert len(select_games(stored, player=5)) == 6
+    score = int(stored['black_score'][0])
+    assert 0 in select_games(stored, min_score=score, max_score=score)
+
+    assert [mv for _, _, mv in iter_positions(stored, [2])] == games[2]
+    positions = list(archive_positions(stored, [0, 1]))
+    assert [len(p) for p in positions] == [len(games[0]), len(games[1])]
+    path = str(tmp_path / "positions.bin")
+    assert export_positions(stored, path, [0, 1]) == sum(map(len, positions))
+
+    b = Board.start_pos()
+    for mv, (_, player, _) in zip(games[0], iter_positions(stored, [0])):
+        b.apply_move(mv, player)
+    assert stored['black_score'][0] == b.count(1)
+
+
+def test_rejects_bad_files(tmp_path):
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"nope")
+    with pytest.raises(ValueError):
+        open_archive(str(bad))
+    wtb = tmp_path / "bad.wtb"
+    wtb.write_bytes(bytes(12) + bytes([10]) + bytes(3))
+    with pytest.raises(ValueError):
+        read_wthor(str(wtb))
@@ -0,0 +1,115 @@
+# test_arena.py
+
+import time
+import pytest
+import eval_utils
+from archive_utils import game_moves, open_archive
+from board import Board
+from search import INF, negamax
+from generate_book import disc_units
+from arena import (EngineConfig, MatchResult, opening_set, run_match,
+                   sprt_bounds, sprt_llr)
+
+
+def test_sprt_llr_direction():
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert lower < 0 < upper
+    assert sprt_llr(0, 0, 0, 0, 10) == 0.0
+    strong = sprt_llr(600, 200, 200, 0, 10)
+    weak = sprt_llr(200, 200, 600, 0, 10)
+    assert strong > upper and weak < lower
+    assert sprt_llr(300, 400, 300, 0, 10) < 0   # even score favours elo0
+    assert sprt_llr(40, 0, 0, 0, 10) > sprt_llr(20, 0, 0, 0, 10) > 0
+
+
+def test_engine_config_parse():
+    e = EngineConfig.parse("A", "depth=3,patterns=none")
+    assert e.depth == 3 and e.time is None and e.patterns is None
+    e = EngineConfig.parse("B", "time=0.05,backend=python")
+    assert e.time == 0.05 and e.backend == 'python'
+    for bad in ("speed=9", "mode=ybwc", "backend=gpu"):
+        with pytest.raises(ValueError):
+            EngineConfig.parse("C", bad)
+    with pytest.raises(ValueError):
+        EngineConfig("D", time=None, depth=None)
+
+
+def test_openings_are_distinct():
+    openings = opening_set(6, plies=4, seed=1)
+    assert len(openings) == 6
+    assert all(len(o) == 4 for o in openings)
+    assert len({tuple(o) for o in openings}) == 6
+
+
+def _opening_discs(opening):
+    b, player = Board.start_pos(), 1
+    for mv in opening:
+        b.apply_move(mv, player)
+        player = -player
+    return negamax(b, player, 4, -INF, INF) / disc_units()
+
+
+def test_unbalanced_openings_are_rejected():
+    # seed 3 draws an opening worth 3.8 discs to the side to move first
+    first = opening_set(1, plies=6, seed=3, max_discs=64)[0]
+    assert abs(_opening_discs(first)) > 2
+    openings = opening_set(3, plies=6, seed=3)
+    assert first not in openings
+    assert all(abs(_opening_discs(o)) <= 2 for o in openings)
+
+
+def test_match_logs_paired_games(tmp_path):
+    log = str(tmp_path / "arena.bin")
+    a = EngineConfig("A", time=None, depth=3, patterns=None)
+    b = EngineConfig("B", time=None, depth=1, patterns=None)
+    openings = opening_set(3, plies=4, seed=2)
+    result = run_match(a, b, openings, log, workers=1, alpha=1e-9, beta=1e-9)
+    assert result.games == 6 and result.decision is None
+    games = open_archive(log)
+    assert len(games) == 6
+    for g in games:
+        assert {int(g['black_player']), int(g['white_player'])} == {0, 1}
+        assert game_moves(g)[:4] in openings
+    assert result.wins + result.draws + result.losses == 6
+
+    # a wide-open hypothesis pair is decided before the openings run out
+    early = run_match(a, b, openings, workers=1, elo0=-1000, elo1=1000)
+    assert early.decision is not None and early.games < 6
+
+
+@pytest.mark.parametrize("engine", [EngineConfig("P", time=None, depth=2, patterns=None,
+                                                  backend='python'),
+                                    EngineConfig("Q", time=0.05, patterns=None,
+                                                  backend='python')])
+def test_python_backend_plays_legal_moves(engine):
+    from arena import engine_move
+    from test_search import random_position
+    b, player = random_position(4, 20)
+    t0 = time.monotonic()
+    assert engine_move(engine, b, player) in b.legal_moves(player)
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_match_result_counts():
+    r = MatchResult()
+    for diff in (8, 0, -44):
+        r.add(diff)
+    assert (r.wins, r.draws, r.losses) == (1, 1, 1)
+
+
+def test_engines_keep_their_own_ordering_tables(monkeypatch):
+    import search
+    from arena import _activate
+    for name in ('trans_table', 'killers', 'history'):
+        monkeypatch.setattr(search, name, getattr(search, name))
+    monkeypatch.setattr(eval_utils, 'pattern_weights', eval_utils.pattern_weights)
+    a = EngineConfig("KA", time=None, depth=2, patterns=None)
+    b = EngineConfig("KB", time=None, depth=2, patterns=None)
+    _activate(a)
+    tables_a = search.trans_table, search.killers, search.history
+    _activate(b)
+    assert all(x is not y for x, y in zip(tables_a, (search.trans_table, search.killers,
+                                                      search.history)))
+    _activate(a)
+    assert all(x is y for x, y in zip(tables_a, (search.trans_table, search.killers,
+                                                  search.history)))
@@ -0,0 +1,57 @@
+# test_batch.py
+
+import numpy as np
+import pytest
+from batch_utils import batch_moves, batch_flips, batch_evaluate
+from eval_utils import evaluate
+from pattern_utils import N_WEIGHTS, new_features, pattern_indices, pattern_score
+from test_search import random_position
+
+
+def positions(n):
+    boards = [random_position(seed, seed % 50) for seed in range(n)]
+    us = np.array([b.black if p == 1 else b.white for b, p in boards], dtype=np.uint64)
+    them = np.array([b.white if p == 1 else b.black for b, p in boards], dtype=np.uint64)
+    return boards, us, them
+
+
+def test_batch_moves_and_evaluate_match_single():
+    boards, us, them = positions(200)
+    moves = batch_moves(us, them)
+    scores = batch_evaluate(us, them)
+    for k, (b, p) in enumerate(boards):
+        assert int(moves[k]) == b.legal_moves_bb(p)
+        assert scores[k] == evaluate(b, p)
+
+
+def test_batch_flips_match_board():
+    boards, us, them = positions(100)
+    rows, squares = [], []
+    for k, (b, p) in enumerate(boards):
+        moves = b.legal_moves(p)
+        if moves:
+            rows.append(k)
+            squares.append(moves[-1])
+    flipped = batch_flips(us[rows], them[rows], squares)
+    for f, k, sq in zip(flipped, rows, squares):
+        b, p = boards[k]
+        assert int(f) == b.flips(sq, p)
+
+
+def test_batch_evaluate_with_pattern_weights():
+    _, us, them = positions(50)
+    weights = np.random.default_rng(3).integers(-50, 50, (2, N_WEIGHTS)).astype(np.int16)
+    scores = batch_evaluate(us, them, weights)
+    for k in range(len(us)):
+        row = new_features(1)[0]
+        pattern_indices(us[k], them[k], row)
+        discs = bin(int(us[k] | them[k])).count('1')
+        assert scores[k] == pattern_score(row, 0, discs, weights)
+
+
+def test_batch_rejects_mismatched_arrays():
+    with pytest.raises(ValueError):
+        batch_moves(np.zeros(3, dtype=np.uint64), np.zeros(2, dtype=np.uint64))
+    with pytest.raises(ValueError):
+        batch_flips(np.zeros(1, dtype=np.uint64), np.zeros(1, dtype=np.uint64), [64])
+    assert batch_evaluate([], []).shape == (0,)
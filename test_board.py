@@ -0,0 +1,91 @@
+# test_board.py
+
+import random
+import pytest
+from board import Board
+
+DIRS = [(-1,0),(-1,1),(0,1),(1,1),(1,0),(1,-1),(0,-1),(-1,-1)]
+
+
+def scan_array(b: Board) -> list[list[str]]:
+    """2D array view of the board, as the original scanner built it."""
+    arr = [['.' for _ in range(8)] for _ in range(8)]
+    for idx in range(64):
+        r, c = divmod(idx, 8)
+        mask = 1 << (63 - idx)
+        if b.black & mask:
+            arr[r][c] = 'B'
+        elif b.white & mask:
+            arr[r][c] = 'W'
+    return arr
+
+
+def scan_flips(arr, move: int, player: int) -> list[tuple[int, int]]:
+    """Reference 2D directional scan for the discs flipped by `move`."""
+    you = 'B' if player == 1 else 'W'
+    opp = 'W' if player == 1 else 'B'
+    mr, mc = divmod(move, 8)
+    to_flip = []
+    for dr, dc in DIRS:
+        line = []
+        r, c = mr + dr, mc + dc
+        while 0 <= r < 8 and 0 <= c < 8 and arr[r][c] == opp:
+            line.append((r, c))
+            r += dr; c += dc
+        if 0 <= r < 8 and 0 <= c < 8 and arr[r][c] == you:
+            to_flip.extend(line)
+    return to_flip
+
+
+def scan_moves(b: Board, player: int) -> list[int]:
+    arr = scan_array(b)
+    return [idx for idx in range(64)
+            if arr[idx // 8][idx % 8] == '.' and scan_flips(arr, idx, player)]
+
+
+def scan_apply(b: Board, move: int, player: int) -> tuple[int, int]:
+    arr = scan_array(b)
+    you = 'B' if player == 1 else 'W'
+    flips = scan_flips(arr, move, player)
+    arr[move // 8][move % 8] = you
+    for r, c in flips:
+        arr[r][c] = you
+    black = white = 0
+    for idx in range(64):
+        mask = 1 << (63 - idx)
+        if arr[idx // 8][idx % 8] == 'B':
+            black |= mask
+        elif arr[idx // 8][idx % 8] == 'W':
+            white |= mask
+    return black, white
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_games_match_scanner(seed):
+    rng = random.Random(seed)
+    b = Board.start_pos()
+    player = 1
+    while True:
+        moves = b.legal_moves(player)
+        assert moves == scan_moves(b, player)
+        if not moves:
+            if not b.legal_moves(-player):
+                break
+            player = -player
+            continue
+        mv = rng.choice(moves)
+        expected = scan_apply(b, mv, player)
+        b.apply_move(mv, player)
+        assert (b.black, b.white) == expected
+        player = -player
+    assert b.count(1) + b.count(-1) + b.empties() == 64
+
+
+def test_undo_restores_position():
+    b = Board.start_pos()
+    before = (b.black, b.white)
+    b.apply_move(b.legal_moves(1)[0], 1)
+    b.undo()
+    assert (b.black, b.white) == before
+    with pytest.raises(IndexError):
+        b.undo()
@@ -0,0 +1,69 @@
+# test_book.py
+
+import os
+import json
+import random
+from board import Board
+from book_utils import DEFAULT_BOOK, NO_MOVE, OpeningBook, book_from_json, side_to_move
+from moves_utils import get_moves
+from test_search import random_position
+
+
+def test_binary_book_roundtrip(tmp_path):
+    entries = {}
+    for seed in range(300):
+        b, player = random_position(seed, seed % 12)
+        moves = get_moves(b, player)
+        if moves:
+            entries[(b.black, b.white)] = [(m, 10 * k, k) for k, m in enumerate(moves)]
+    path = str(tmp_path / "book.bin")
+    OpeningBook.from_entries(entries).save(path)
+    book = OpeningBook.open(path)
+    assert 0 < len(book) <= len(entries)
+
+    rng = random.Random(0)
+    for seed in range(300):
+        b, player = random_position(seed, seed % 12)
+        cands = book.lookup(b)
+        moves = get_moves(b, player)
+        if not moves:
+            continue
+        assert {mv for mv, _, _ in cands} <= set(moves)
+        assert book.choose(b, player, rng) in moves
+    # an unplayed candidate (count 0) is never drawn
+    start = Board.start_pos()
+    first = get_moves(start, 1)
+    book = OpeningBook.from_entries({(start.black, start.white):
+                                     [(first[0], 0, 0), (first[1], 0, 5)]})
+    assert {book.choose(start, 1, rng) for _ in range(20)} == {first[1]}
+    assert book.lookup(Board(0, 1)) == []
+
+
+def test_json_book_import(tmp_path):
+    start = Board.start_pos()
+    path = tmp_path / "book.json"
+    path.write_text(json.dumps({start.to_flat_fen(): get_moves(start, 1)[2]}))
+    book = book_from_json(str(path))
+    assert len(book) == 1
+    assert book.choose(start, 1) in get_moves(start, 1)
+
+
+def test_illegal_candidates_are_dropped():
+    start = Board.start_pos()
+    first = get_moves(start, 1)
+    white_reply = get_moves(start, -1)[0]   # legal for white, not for black to move
+    book = OpeningBook.from_entries({(start.black, start.white):
+                                     [(first[0], 0, 1), (white_reply, 0, 9)],
+                                     (0xFF, 0): [(0, 0, 1)]})
+    assert len(book) == 1
+    assert [mv for mv, _, _ in book.lookup(start)] == [first[0]]
+
+
+def test_shipped_book_is_legal():
+    book = OpeningBook.open(os.path.join(os.path.dirname(__file__), DEFAULT_BOOK))
+    assert len(book) > 100
+    for rec in book.table:
+        if rec['black'] or rec['white']:
+            b = Board(int(rec['black']), int(rec['white']))
+            moves = {int(mv) for mv in rec['moves'] if mv != NO_MOVE}
+            assert moves and moves <= set(b.legal_moves(side_to_move(b)))
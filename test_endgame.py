@@ -0,0 +1,49 @@
+# test_endgame.py
+
+import numpy as np
+import pytest
+from endgame import solve_bb
+from search import iterative_deepening
+from search_jit import INF, negamax_bb, new_stats
+from tt_utils import TranspositionTable
+from order_utils import MAX_PLY, new_killers, new_history
+from pattern_utils import NO_PATTERNS, new_features
+from test_search import random_position
+
+
+def solve(b, player, alpha=-INF, beta=INF):
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    return solve_bb(np.uint64(us), np.uint64(them), alpha, beta,
+                    TranspositionTable(4).table, 0, new_stats(),
+                    np.zeros(1, dtype=np.int64))
+
+
+def full_negamax(b, player):
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    return negamax_bb(np.uint64(us), np.uint64(them), 64, 0, -INF, INF,
+                      TranspositionTable(4).table, 0, new_killers(), new_history(),
+                      new_features(MAX_PLY), NO_PATTERNS, 65,
+                      new_stats(), np.zeros(1, dtype=np.int64))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_solver_matches_full_width_search(seed):
+    b, player = random_position(seed, 50)
+    exact = solve(b, player)
+    assert exact == full_negamax(b, player)
+    wld = solve(b, player, -1, 1)
+    assert (wld > 0) == (exact > 0) and (wld < 0) == (exact < 0)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_endgame_move_is_optimal(seed):
+    b, player = random_position(100 + seed, 48)
+    if not b.legal_moves(player):
+        player = -player
+    scores = {}
+    for mv in b.legal_moves(player):
+        b.apply_move(mv, player)
+        scores[mv] = -solve(b, -player)
+        b.undo()
+    mv = iterative_deepening(b, player, 5.0)
+    assert scores[mv] == max(scores.values())
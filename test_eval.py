@@ -0,0 +1,42 @@
+# test_eval.py
+
+import numpy as np
+import pytest
+from board import Board
+from eval_utils import SQUARE_W, evaluate, evaluate_bb
+from jit_utils import legal_moves_jit
+from test_search import random_position
+
+
+def reference_evaluate(board, player):
+    """The original per-square evaluation loop."""
+    my_bb  = board.black if player == 1 else board.white
+    opp_bb = board.white if player == 1 else board.black
+    pos = 0
+    for i, w in enumerate(SQUARE_W):
+        mask = 1 << (63 - i)
+        if my_bb & mask:   pos += w
+        elif opp_bb & mask: pos -= w
+    my_m  = int(bin(int(legal_moves_jit(np.uint64(my_bb),  np.uint64(opp_bb)))).count('1'))
+    opp_m = int(bin(int(legal_moves_jit(np.uint64(opp_bb), np.uint64(my_bb)))).count('1'))
+    mob   = (my_m - opp_m) * 5
+    corners, corner_score = [0, 7, 56, 63], 0
+    for c in corners:
+        mask = 1 << c
+        if my_bb & mask:      corner_score += 25
+        elif opp_bb & mask:   corner_score -= 25
+    return pos + mob + corner_score
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("player", [1, -1])
+def test_evaluate_matches_reference(seed, player):
+    b, _ = random_position(seed, 4 * seed + 2)
+    assert evaluate(b, player) == reference_evaluate(b, player)
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    assert evaluate_bb(np.uint64(us), np.uint64(them)) == reference_evaluate(b, player)
+
+
+def test_evaluate_is_antisymmetric():
+    b = Board.from_flat_fen("XO" + "." * 62)
+    assert evaluate(b, 1) == -evaluate(b, -1)
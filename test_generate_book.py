@@ -0,0 +1,88 @@
+# test_generate_book.py
+
+import json
+import pytest
+from board import Board
+from book_utils import OpeningBook
+from generate_book import build_book
+from search import SearchPool
+from search_jit import DISC_SCORE
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = SearchPool(1)
+    yield p
+    p.shutdown()
+
+
+def test_build_dedupes_and_resumes(tmp_path, pool):
+    ckpt = str(tmp_path / "book.ckpt")
+    entries = build_book(max_ply=3, depth=2, drop=10**9, checkpoint=ckpt, pool=pool)
+    with open(ckpt) as f:
+        lines = f.readlines()
+    # a header, then ply 0: start; ply 1: the 4 first moves are one position up to symmetry
+    assert json.loads(lines[0])["params"]["depth"] == 2
+    assert len(lines) == 1 + len(entries)
+    assert len(lines) < 1 + 4 + 12
+
+    book = OpeningBook.from_entries(entries)
+    start = Board.start_pos()
+    for mv in start.legal_moves(1):
+        b = Board(start.black, start.white)
+        b.apply_move(mv, 1)
+        assert book.choose(b, -1) in b.legal_moves(-1)
+
+    # drop the last records and a torn line: the rerun searches only those
+    with open(ckpt, 'w') as f:
+        f.writelines(lines[:2])
+        f.write('{"black": 1')
+    again = build_book(max_ply=3, depth=2, drop=10**9, checkpoint=ckpt, pool=pool)
+    assert {k: [m for m, _, _ in v] for k, v in again.items()} == \
+        {k: [m for m, _, _ in v] for k, v in entries.items()}
+    with open(ckpt) as f:
+        records = [json.loads(line) for line in f if line.endswith("}\n")]
+    assert len(records) == len(lines)
+
+
+def test_resume_refuses_other_parameters(tmp_path, pool):
+    ckpt = str(tmp_path / "book.ckpt")
+    build_book(max_ply=2, depth=2, checkpoint=ckpt, pool=pool)
+    with pytest.raises(ValueError):
+        build_book(max_ply=2, depth=3, checkpoint=ckpt, pool=pool)
+    with open(ckpt, 'w') as f:   # an old checkpoint without a header
+        f.write('{"black": 1, "white": 2, "player": 1, "moves": []}\n')
+    with pytest.raises(ValueError):
+        build_book(max_ply=2, depth=2, checkpoint=ckpt, pool=pool)
+
+
+def test_drop_limits_expansion(tmp_path, pool):
+    wide = build_book(max_ply=3, depth=2, drop=10**9,
+                      checkpoint=str(tmp_path / "a.ckpt"), pool=pool)
+    narrow = build_book(max_ply=3, depth=2, drop=0,
+                        checkpoint=str(tmp_path / "b.ckpt"), pool=pool)
+    assert len(narrow) < len(wide)
+
+
+def test_default_drop_prunes_square_eval(tmp_path, monkeypatch):
+    import eval_utils
+    from pattern_utils import NO_PATTERNS
+    monkeypatch.setattr(eval_utils, "pattern_weights", NO_PATTERNS)
+    own = SearchPool(1)   # workers take the square-weight eval from here
+    try:
+        wide = build_book(max_ply=4, depth=2, drop=10**9,
+                          checkpoint=str(tmp_path / "a.ckpt"), pool=own)
+        default = build_book(max_ply=4, depth=2,
+                             checkpoint=str(tmp_path / "b.ckpt"), pool=own)
+    finally:
+        own.shutdown()
+    assert len(default) < len(wide)
+
+
+def test_score_discs_keeps_endgame_scores_exact(monkeypatch):
+    import eval_utils
+    from pattern_utils import NO_PATTERNS
+    from generate_book import score_discs
+    monkeypatch.setattr(eval_utils, "pattern_weights", NO_PATTERNS)
+    assert score_discs(3 * eval_utils.SQUARE_DISC) == 3
+    assert score_discs(-3 * DISC_SCORE, 'exact') == -3
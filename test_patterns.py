@@ -0,0 +1,113 @@
+# test_patterns.py
+
+import random
+import numpy as np
+import pytest
+from board import Board
+from jit_utils import flips_bb
+from order_utils import MAX_PLY, new_killers, new_history
+from pattern_utils import (N_INST, N_WEIGHTS, NO_PATTERNS, TYPE_SIZES, INST_OFFSET,
+                           new_features, pattern_indices, pattern_update,
+                           pattern_score, save_pattern_weights,
+                           load_pattern_weights)
+from search_jit import INF, negamax_bb, new_stats
+from tt_utils import TranspositionTable
+from test_search import random_position
+
+
+def test_instance_counts():
+    assert N_INST == 34
+    assert N_WEIGHTS == int(TYPE_SIZES.sum())
+    assert INST_OFFSET.max() < N_WEIGHTS
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_incremental_update_matches_extraction(seed):
+    rng = random.Random(seed)
+    b, player = Board.start_pos(), 1
+    rows = new_features(2)
+    pattern_indices(np.uint64(b.black), np.uint64(b.white), rows[0])
+    ply = 0
+    for _ in range(60):
+        moves = b.legal_moves(player)
+        if not moves:
+            if not b.legal_moves(-player):
+                break
+            player, ply = -player, ply + 1
+            continue
+        us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+        mv = rng.choice(moves)
+        sq = np.uint64(1 << (63 - mv))
+        flipped = flips_bb(np.uint64(us), np.uint64(them), sq)
+        pattern_update(rows[0], sq, flipped, ply)
+        b.apply_move(mv, player)
+        player, ply = -player, ply + 1
+
+        # reference side for the first half is black at even plies
+        pattern_indices(np.uint64(b.black), np.uint64(b.white), rows[1])
+        np.testing.assert_array_equal(rows[0], rows[1])
+
+
+def test_weights_roundtrip(tmp_path):
+    weights = np.random.default_rng(0).integers(-100, 100, (4, N_WEIGHTS)).astype(np.int16)
+    path = str(tmp_path / "patterns.bin")
+    save_pattern_weights(path, weights)
+    np.testing.assert_array_equal(load_pattern_weights(path), weights)
+    assert load_pattern_weights(str(tmp_path / "missing.bin")) is NO_PATTERNS
+    with pytest.raises(ValueError):
+        save_pattern_weights(path, weights[:, :10])
+    with open(path, 'rb') as f:
+        data = f.read()
+    for cut in (4, 12, 20, len(data) - 2):
+        with open(path, 'wb') as f:
+            f.write(data[:cut])
+        with pytest.raises(ValueError):
+            load_pattern_weights(path)
+
+
+def test_pattern_score_is_side_relative():
+    weights = np.random.default_rng(1).integers(-50, 50, (3, N_WEIGHTS)).astype(np.int16)
+    b, _ = random_position(0, 9)
+    discs = b.count(1) + b.count(-1)
+    row = new_features(1)[0]
+    pattern_indices(np.uint64(b.white), np.uint64(b.black), row)
+    swapped = new_features(1)[0]
+    pattern_indices(np.uint64(b.black), np.uint64(b.white), swapped)
+    # white at ply 0 scores the same as white at ply 1 from black's row
+    assert pattern_score(row, 0, discs, weights) == pattern_score(swapped, 1, discs, weights)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_search_with_patterns_matches_reference(seed):
+    weights = np.random.default_rng(2).integers(-50, 50, (2, N_WEIGHTS)).astype(np.int16)
+    b, player = random_position(seed, 8 + 10 * seed)
+    feat = new_features(MAX_PLY)
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    us, them = np.uint64(us), np.uint64(them)
+    pattern_indices(us, them, feat[0])
+    got = negamax_bb(us, them, 3, 0, -INF, INF, TranspositionTable(1).table, 0,
+                     new_killers(), new_history(), feat, weights, 65, new_stats(),
+                     np.zeros(1, dtype=np.int64))
+    assert got == reference_pattern_negamax(b, player, 3, weights)
+
+
+def reference_pattern_negamax(b, player, depth, weights, ply=0):
+    moves = b.legal_moves(player)
+    if not moves and not b.legal_moves(-player):
+        return 1000 * (b.count(player) - b.count(-player))
+    if not moves:
+        return -reference_pattern_negamax(b, -player, depth, weights, ply + 1)
+    if depth == 0:
+        us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+        row = new_features(1)[0]
+        if ply % 2 == 0:
+            pattern_indices(np.uint64(us), np.uint64(them), row)
+        else:
+            pattern_indices(np.uint64(them), np.uint64(us), row)
+        return int(pattern_score(row, ply, bin(us | them).count('1'), weights))
+    best = -INF
+    for mv in moves:
+        b.apply_move(mv, player)
+        best = max(best, -reference_pattern_negamax(b, -player, depth - 1, weights, ply + 1))
+        b.undo()
+    return best
@@ -0,0 +1,70 @@
+# test_perft.py
+
+import numpy as np
+import pytest
+from board import Board
+from perft_utils import START_PERFT, perft, perft_bb, perft_board
+from benchmark_search import (POSITIONS, compare, counts_only, known_perft,
+                              pinned_positions, same_machine)
+from test_search import random_position
+
+
+@pytest.mark.parametrize("depth", range(6))
+def test_board_perft_from_start(depth):
+    assert perft(Board.start_pos(), 1, depth) == START_PERFT[depth]
+
+
+def test_jit_perft_from_start():
+    b = Board.start_pos()
+    assert [perft_board(b, 1, d) for d in range(9)] == list(START_PERFT[:9])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_backends_agree(seed):
+    # deep enough into the game that passes and game ends show up
+    b, player = random_position(seed, 44 + 3 * seed)
+    for depth in range(1, 5):
+        assert perft_board(b, player, depth) == perft(b, player, depth)
+
+
+def test_pass_counts_as_a_move():
+    # white has no move here, black has one
+    b = Board.from_flat_fen("XO" + "." * 62)
+    assert not b.legal_moves(-1)
+    assert perft(b, -1, 1) == 1
+    assert perft(b, -1, 2) == 1
+    us, them = np.uint64(b.white), np.uint64(b.black)
+    assert perft_bb(us, them, 2) == perft(b, -1, 2)
+
+
+def test_pinned_positions_are_playable():
+    assert len(pinned_positions()) == len(POSITIONS)
+    for b, player in pinned_positions():
+        assert b.legal_moves(player)
+
+
+def test_compare_flags_regressions():
+    base = {"perft.jit.d9.leaves": 100, "search.serial.d7.nodes": 1000,
+            "search.serial.d7.seconds": 2.0, "search.serial.nodes_per_s": 1e6,
+            "eval.batch.positions_per_s": 1e7}
+    same = dict(base)
+    assert compare(same, base, 0.1) == []
+    worse = {"perft.jit.d9.leaves": 101, "search.serial.d7.nodes": 1200,
+             "search.serial.d7.seconds": 2.5, "search.serial.nodes_per_s": 0.8e6,
+             "eval.batch.positions_per_s": 0.95e7}
+    problems = compare(worse, base, 0.1)
+    assert [p.split(":")[0] for p in problems] == [
+        "perft.jit.d9.leaves", "search.serial.d7.nodes", "search.serial.d7.seconds",
+        "search.serial.nodes_per_s"]
+    better = {"search.serial.d7.nodes": 500, "search.serial.d7.seconds": 1.0,
+              "search.serial.nodes_per_s": 5e6}
+    assert compare(better, base, 0.1) == []
+    assert compare({"perft.jit.d9.leaves": START_PERFT[9]}, known_perft()) == []
+    # timings from another machine are not held against this one
+    assert [p.split(":")[0] for p in compare(worse, base, 0.1, timings=False)] == [
+        "perft.jit.d9.leaves", "search.serial.d7.nodes"]
+    assert set(counts_only(worse)) == {"perft.jit.d9.leaves", "search.serial.d7.nodes"}
+    here = {"machine": "x86_64", "workers": 8, "python": "3.11.7"}
+    assert same_machine(here, dict(here, python="3.12.0"))
+    assert not same_machine(here, dict(here, workers=4))
+    assert not same_machine(here, {"python": "3.11.7"})
@@ -0,0 +1,137 @@
+# test_ponder.py
+
+import time
+import threading
+import pytest
+from board import Board
+from search import SearchControl, search_position
+from ponder_utils import Ponderer
+from test_search import random_position
+
+
+def test_control_stops_a_running_search():
+    b, player = random_position(2, 14)
+    control = SearchControl()
+    out = []
+    t = threading.Thread(target=lambda: out.append(
+        search_position(b, player, 60.0, mode='serial', control=control)))
+    t.start()
+    time.sleep(0.3)
+    t0 = time.monotonic()
+    control.stop()
+    t.join(5.0)
+    assert not t.is_alive() and time.monotonic() - t0 < 1.0
+    assert out[0].move in b.legal_moves(player) and out[0].depth > 0
+    # a stopped control aborts later searches at once
+    assert search_position(b, player, 60.0, mode='serial', control=control).depth == 0
+
+
+def test_first_move_is_searched_first(monkeypatch):
+    import search
+    b, player = random_position(4, 12)
+    last = b.legal_moves(player)[-1]
+    orders = []
+    root = search._search_root
+    def spy(root_board, side, moves, *args):
+        orders.append(list(moves))
+        return root(root_board, side, moves, *args)
+    monkeypatch.setattr(search, "_search_root", spy)
+    search_position(b, player, 0.2, mode='serial', first_move=last)
+    assert orders[0][0] == last
+    assert sorted(orders[0]) == sorted(b.legal_moves(player))
+
+
+@pytest.mark.parametrize("mode", ["predicted", "all"])
+def test_ponder_searches_replies(mode):
+    b, player = random_position(6, 16)
+    ponder = Ponderer(mode=mode, search_mode='serial')
+    ponder.start(b, player)
+    time.sleep(1.2)
+    t0 = time.monotonic()
+    ponder.stop()
+    assert time.monotonic() - t0 < 1.0 and not ponder.running
+    hits = []
+    for mv in b.legal_moves(player):
+        child = Board(b.black, b.white)
+        child.apply_move(mv, player)
+        hit = ponder.take(child, -player)
+        if hit is not None:
+            result, seconds = hit
+            assert result.move in child.legal_moves(-player)
+            assert seconds > 0
+            hits.append(mv)
+    if mode == 'predicted':
+        assert len(hits) == 1
+    else:
+        assert len(hits) > 1
+    assert ponder.take(b, player) is None
+
+
+def test_ponder_hit_reuses_the_warm_table():
+    b, player = random_position(6, 16)
+    ponder = Ponderer(search_mode='serial')
+    ponder.start(b, player)
+    time.sleep(1.5)
+    ponder.stop()
+    (key, (pondered, _)), = ponder._results.items()
+    child = Board(key[0], key[1])
+    result = search_position(child, key[2], 0.2, mode='serial', first_move=pondered.move)
+    # the short search gets at least as deep as the long ponder search
+    assert result.depth >= pondered.depth
+
+
+def test_restart_discards_old_results():
+    b, player = random_position(6, 16)
+    ponder = Ponderer(search_mode='serial')
+    ponder.start(b, player)
+    time.sleep(0.5)
+    ponder.start(*random_position(7, 20))
+    ponder.stop()
+    for black, white, side in ponder._results:
+        assert Board(black, white).empties() == random_position(7, 20)[0].empties() - 1
+
+
+def test_restart_on_same_position_keeps_results():
+    b, player = random_position(6, 16)
+    ponder = Ponderer(search_mode='serial')
+    ponder.start(b, player)
+    time.sleep(0.6)
+    ponder.stop()
+    (key, (first, spent)), = ponder._results.items()
+    ponder.start(b, player)
+    time.sleep(0.3)
+    ponder.stop()
+    result, total = ponder._results[key]
+    assert total > spent and result.depth >= first.depth
+
+
+def test_console_resumes_pondering_after_bad_input(monkeypatch):
+    import engine
+    from book_utils import OpeningBook
+    calls = []
+    class FakePonderer:
+        def start(self, board, player):
+            calls.append("start")
+        def stop(self):
+            calls.append("stop")
+    answers = iter(["zz", "undo", "stop"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(answers))
+    engine.play_game(False, True, OpeningBook.from_entries({}), None, FakePonderer())
+    assert calls == ["start", "stop"] * 3
+
+
+def test_console_ponders_for_the_side_to_move_after_undo(monkeypatch):
+    import engine
+    from board import Board
+    from book_utils import OpeningBook
+    sides = []
+    class FakePonderer:
+        def start(self, board, player):
+            sides.append(player)
+        def stop(self):
+            pass
+    first = engine.index_to_coord(Board.start_pos().legal_moves(1)[0])
+    answers = iter([first, "zz", "undo", first, "stop"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(answers))
+    engine.play_game(False, False, OpeningBook.from_entries({}), None, FakePonderer())
+    assert sides == [1, -1, -1, 1, -1]
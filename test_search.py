@@ -0,0 +1,336 @@
+# test_search.py
+
+import time
+import random
+import numpy as np
+import pytest
+from board import Board
+from eval_utils import evaluate
+from search import iterative_deepening, search_position
+from search_jit import INF, DISC_SCORE, ST_NODES, negamax_bb, new_stats
+from tt_utils import TranspositionTable
+from order_utils import MAX_PLY, new_killers, new_history
+from pattern_utils import NO_PATTERNS, new_features
+
+
+def reference_negamax(b: Board, player: int, depth: int) -> int:
+    """Plain fixed-depth negamax over Board, no pruning or TT."""
+    moves = b.legal_moves(player)
+    if not moves:
+        if not b.legal_moves(-player):
+            return (b.count(player) - b.count(-player)) * DISC_SCORE
+        return -reference_negamax(b, -player, depth)
+    if depth == 0:
+        return evaluate(b, player)
+    best = -INF
+    for mv in moves:
+        b.apply_move(mv, player)
+        best = max(best, -reference_negamax(b, -player, depth - 1))
+        b.undo()
+    return best
+
+
+def random_position(seed: int, plies: int) -> tuple[Board, int]:
+    rng = random.Random(seed)
+    b = Board.start_pos()
+    player = 1
+    for _ in range(plies):
+        moves = b.legal_moves(player)
+        if not moves:
+            player = -player
+            continue
+        b.apply_move(rng.choice(moves), player)
+        player = -player
+    return b, player
+
+
+@pytest.mark.parametrize("canon_empties", [0, 65])
+@pytest.mark.parametrize("seed", range(6))
+def test_kernel_matches_reference(seed, canon_empties):
+    b, player = random_position(seed, 10 + 8 * seed)
+    us, them = (b.black, b.white) if player == 1 else (b.white, b.black)
+    got = negamax_bb(np.uint64(us), np.uint64(them), 3, 0, -INF, INF,
+                     TranspositionTable(1).table, 0, new_killers(), new_history(),
+                     new_features(MAX_PLY), NO_PATTERNS, canon_empties,
+                     new_stats(), np.zeros(1, dtype=np.int64))
+    assert got == reference_negamax(b, player, 3)
+
+
+def test_kernel_handles_more_than_32_moves():
+    b = Board(0x8866042ca00004, 0x66004a405e400a)
+    assert len(b.legal_moves(1)) == 35
+    got = negamax_bb(np.uint64(b.black), np.uint64(b.white), 2, 0, -INF, INF,
+                     TranspositionTable(1).table, 0, new_killers(), new_history(),
+                     new_features(MAX_PLY), NO_PATTERNS, 65,
+                     new_stats(), np.zeros(1, dtype=np.int64))
+    assert got == reference_negamax(b, 1, 2)
+
+
+def test_ordering_cuts_on_first_move():
+    import search
+    b, player = random_position(11, 14)
+    before = search.counters()
+    for depth in range(1, 7):
+        search.negamax(b, player, depth, -INF, INF)
+    after = search.counters()
+    cutoffs = after["cutoffs"] - before["cutoffs"]
+    first = after["first_move_cutoffs"] - before["first_move_cutoffs"]
+    assert cutoffs > 0 and first / cutoffs > 0.8
+
+
+def test_iterative_deepening_returns_legal_move():
+    b, player = random_position(42, 20)
+    assert iterative_deepening(b, player, 0.2) in b.legal_moves(player)
+
+
+@pytest.mark.parametrize("budget", [0.3, 1.0])
+def test_search_stays_within_budget(budget):
+    b, player = random_position(3, 16)
+    iterative_deepening(b, player, 0.05)   # start the pool outside the timing
+    t0 = time.monotonic()
+    mv = iterative_deepening(b, player, budget)
+    assert time.monotonic() - t0 < budget + 0.1
+    assert mv in b.legal_moves(player)
+
+
+@pytest.mark.parametrize("mode", ["root", "ybwc"])
+def test_parallel_modes_match_serial_score(mode):
+    import search
+    pool = search.get_pool()
+    b, player = random_position(5, 14)
+    moves = b.legal_moves(player)
+    slot = pool.acquire_slot()
+    try:
+        search.trans_table.clear()
+        _, serial, done, _ = search._search_root(
+            b, player, moves, 5, -INF, INF, pool.stop_flags[slot:slot+1])
+        assert done
+        search.trans_table.clear()
+        mv, score, done, counts = search._PARALLEL_ROOTS[mode](
+            pool, slot, b, player, moves, 5, time.monotonic() + 60)
+        assert done and counts[ST_NODES] > 0
+        assert score == serial
+        assert mv in moves
+    finally:
+        pool.release_slot(slot)
+
+
+def test_serial_mode_runs_without_pool(monkeypatch):
+    import search
+    def no_pool():
+        raise AssertionError("serial search started a pool")
+    monkeypatch.setattr(search, "get_pool", no_pool)
+    b, player = random_position(8, 20)
+    t0 = time.monotonic()
+    mv = iterative_deepening(b, player, 0.3, mode='serial')
+    assert mv in b.legal_moves(player)
+    assert time.monotonic() - t0 < 0.6
+
+
+def test_pool_workers_persist_across_searches():
+    from search import SearchPool
+    pool = SearchPool(workers=2)
+    try:
+        pids = set(pool.executor._processes)
+        b, player = random_position(7, 12)
+        iterative_deepening(b, player, 0.3, pool=pool)
+        iterative_deepening(b, player, 0.3, pool=pool)
+        assert set(pool.executor._processes) == pids
+    finally:
+        pool.shutdown()
+
+
+def test_acquire_slot_waits_for_a_free_one():
+    import threading
+    from search import MAX_SEARCHES, get_pool
+    pool = get_pool()
+    held = [pool.acquire_slot() for _ in range(MAX_SEARCHES)]
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire_slot()))
+    t.start()
+    t.join(0.2)
+    assert t.is_alive() and not got
+    pool.release_slot(held.pop())
+    t.join(5.0)
+    assert got and got[0] not in held
+    for slot in held + got:
+        pool.release_slot(slot)
+
+
+def _worker_settings(_):
+    import search, eval_utils
+    weights = eval_utils.pattern_weights
+    return search.canonical_empties, weights.shape, int(weights.astype(np.int64).sum())
+
+
+def test_pool_workers_take_parent_eval_settings(monkeypatch):
+    import search, eval_utils
+    from search import SearchPool
+    from pattern_utils import N_WEIGHTS
+    weights = np.random.default_rng(2).integers(-50, 50, (3, N_WEIGHTS)).astype(np.int16)
+    monkeypatch.setattr(eval_utils, "pattern_weights", weights)
+    monkeypatch.setattr(search, "canonical_empties", 65)
+    pool = SearchPool(workers=1)
+    try:
+        got = pool.submit(_worker_settings, 0).result()
+    finally:
+        pool.shutdown()
+    assert got == (65, weights.shape, int(weights.astype(np.int64).sum()))
+
+
+@pytest.mark.parametrize("mode", ["serial", "ybwc"])
+def test_search_result_aggregates_iterations(mode):
+    b, player = random_position(9, 16)
+    seen = []
+    result = search_position(b, player, 0.5, mode=mode, on_iteration=seen.append)
+    assert seen == result.iterations
+    assert [it.depth for it in seen] == list(range(1, len(seen) + 1))
+    done = [it for it in seen if it.completed]
+    assert result.move == done[-1].move and result.depth == done[-1].depth
+    assert result.move in b.legal_moves(player)
+    # worker counters are summed into the iterations and the total
+    assert all(it.nodes > 0 for it in done)
+    assert result.nodes == sum(it.nodes for it in seen)
+    assert 0 < result.tt_hit_rate < 1
+    assert 0 < result.cutoff_rate < 1
+    assert result.aspiration_fail_highs + result.aspiration_fail_lows <= 1
+    assert result.nps > 0
+
+
+def test_iteration_logger_writes_json_lines():
+    import io, json
+    from search import iteration_logger
+    b, player = random_position(3, 50)   # 10 empties: an exact solve
+    out = io.StringIO()
+    result = search_position(b, player, 2.0, mode='serial', on_iteration=iteration_logger(out))
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [rec["kind"] for rec in lines][-2:] == ["wld", "exact"]
+    assert lines[-1]["completed"] and lines[-1]["score"] == result.score
+    assert result.kind == "exact"
+    assert sum(rec["nodes"] for rec in lines) == result.nodes
+
+
+def test_depth_and_node_limits():
+    b, player = random_position(12, 18)
+    result = search_position(b, player, None, mode='serial', max_depth=5)
+    assert result.depth == 5 and len(result.iterations) == 5
+    result = search_position(b, player, None, mode='serial', max_nodes=20000)
+    assert result.iterations[-1].completed is False
+    # the budget is checked after each root move, so the overshoot is one subtree
+    assert 20000 <= result.nodes < 20000 + result.iterations[-1].nodes
+    with pytest.raises(ValueError):
+        search_position(b, player, None)
+
+
+# (seed, plies) -> best move, score and node count of a deterministic
+# depth-6 search with the square-weight eval; moves only with search changes
+PINNED = {(20, 12): (19, 38, 4881), (21, 24): (53, -109, 11411),
+          (22, 36): (48, -11, 6852), (23, 48): (0, 96, 1836)}
+
+
+@pytest.mark.parametrize("position", sorted(PINNED))
+def test_deterministic_search_pins_best_move(position, monkeypatch):
+    import eval_utils
+    monkeypatch.setattr(eval_utils, "pattern_weights", NO_PATTERNS)
+    b, player = random_position(*position)
+    search_position(b, player, 0.1, mode='serial')   # leave the shared tables warm
+    result = search_position(b, player, None, mode='serial', max_depth=6, deterministic=True)
+    assert (result.move, result.score, result.nodes) == PINNED[position]
+
+
+def test_deterministic_parallel_search_ignores_worker_count():
+    from search import SearchPool, get_pool
+    b, player = random_position(12, 18)
+    runs = []
+    pool = SearchPool(workers=1)
+    try:
+        for p in (pool, get_pool(), get_pool()):
+            for limits in ({"max_depth": 6}, {"max_nodes": 50000}):
+                r = search_position(b, player, None, p, deterministic=True, **limits)
+                runs.append((r.move, r.score, r.depth, r.pv, r.nodes))
+    finally:
+        pool.shutdown()
+    assert runs[:2] == runs[2:4] == runs[4:]
+    with pytest.raises(ValueError):
+        search_position(b, player, 1.0, mode='serial', deterministic=True)
+
+
+class OrderedPool:
+    """
+    Stand-in for SearchPool that answers `_root_worker` tasks from a table
+    of true root-move scores, completing them strictly in `order` (a list
+    of (move, 'null' or 'full') keys), each once it has been submitted.
+    Tasks count as running from submission, so only `stop_search` ends
+    those left out of `order`.
+    """
+    def __init__(self, true_scores: dict, order: list):
+        import threading
+        from search import MAX_SEARCHES
+        self.stop_flags = np.zeros(MAX_SEARCHES, dtype=np.int64)
+        self.stopped = []
+        self.true = true_scores
+        self.order = order
+        self.submitted = {}
+        self.cond = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, fn, args):
+        import concurrent.futures
+        mv, alpha, beta = args[3], args[5], args[6]
+        fut = concurrent.futures.Future()
+        fut.set_running_or_notify_cancel()
+        with self.cond:
+            self.submitted[(mv, 'null' if beta == alpha + 1 else 'full')] = (fut, alpha, beta)
+            self.cond.notify_all()
+        return fut
+
+    def stop_search(self, slot):
+        self.stopped.append(slot)
+        self.stop_flags[slot] = 1
+        with self.cond:
+            for (mv, _), (fut, _, _) in self.submitted.items():
+                if not fut.done():
+                    fut.set_result((mv, 0, True, new_stats()))
+
+    def _run(self):
+        for key in self.order:
+            with self.cond:
+                if not self.cond.wait_for(lambda: key in self.submitted, timeout=5):
+                    return
+                fut, alpha, beta = self.submitted[key]
+                true = self.true[key[0]]
+                # fail-hard bounds outside the window, the true score inside it
+                score = alpha if true <= alpha else beta if true >= beta else true
+                if not fut.done():
+                    fut.set_result((key[0], score, False, new_stats()))
+            time.sleep(0.05)
+
+
+def _ybwc_with(monkeypatch, pool, pv_score, alpha, beta):
+    import search
+    b = Board.start_pos()
+    moves = b.legal_moves(1)[:3]
+    monkeypatch.setattr(search, "_search_root", lambda root, player, mvs, *args:
+                        (mvs[0], pv_score, True, new_stats()))
+    found = search._ybwc_root(pool, 0, b, 1, moves, 4, float('inf'), alpha, beta)
+    return moves, found
+
+
+def test_ybwc_researches_late_fail_highs(monkeypatch):
+    b = Board.start_pos()
+    m0, m1, m2 = b.legal_moves(1)[:3]
+    # m2's null-window fail high arrives after m1's re-search raised alpha
+    pool = OrderedPool({m1: 50, m2: 60},
+                       [(m1, 'null'), (m1, 'full'), (m2, 'null'), (m2, 'full')])
+    moves, (mv, score, done, _) = _ybwc_with(monkeypatch, pool, 40, -INF, INF)
+    assert (mv, score, done) == (m2, 60, True)
+
+
+def test_ybwc_cutoff_stops_siblings(monkeypatch):
+    b = Board.start_pos()
+    m0, m1, m2 = b.legal_moves(1)[:3]
+    # m2 never finishes: the cutoff on m1 has to stop it
+    pool = OrderedPool({m1: 50, m2: 60}, [(m1, 'null'), (m1, 'full')])
+    moves, (mv, score, done, _) = _ybwc_with(monkeypatch, pool, 40, 0, 45)
+    assert (mv, score, done) == (m1, 45, True)
+    assert pool.stopped == [0] and pool.stop_flags[0] == 0
@@ -0,0 +1,150 @@
+# test_server.py
+
+import time
+import asyncio
+import pytest
+from board import Board
+from search import SearchPool
+from server import EngineServer, parse_square, square_name
+from test_search import random_position
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SearchPool(workers=2, progress=True)
+    yield pool
+    pool.shutdown()
+
+
+class Client:
+    """Collects the lines the server writes for one connection."""
+    def __init__(self, server: EngineServer):
+        self.server = server
+        self.lines: list[str] = []
+
+    async def send(self, line: str) -> list[str]:
+        start = len(self.lines)
+        await self.server.handle(line, self.lines.append)
+        return self.lines[start:]
+
+    async def wait_for(self, prefix: str, timeout: float = 10.0) -> str:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for line in self.lines:
+                if line.startswith(prefix):
+                    self.lines.remove(line)
+                    return line
+            await asyncio.sleep(0.01)
+        raise AssertionError(f"no {prefix!r} in {self.lines}")
+
+
+def run_with_server(pool, body):
+    async def main():
+        server = EngineServer(pool)
+        try:
+            await body(server)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+def test_squares_are_standard_coordinates():
+    assert square_name(0) == "a1" and square_name(7) == "h1" and square_name(63) == "h8"
+    assert sorted(square_name(mv) for mv in Board.start_pos().legal_moves(1)) == \
+        ["c4", "d3", "e6", "f5"]
+    assert all(parse_square(square_name(mv)) == mv for mv in range(64))
+
+
+def test_commands(pool):
+    async def body(server):
+        c = Client(server)
+        assert await c.send("ping 7") == ["pong 7"]
+        assert await c.send("new g1 120") == ["ok"]
+        assert await c.send("info g1") == ["status g1 b ply 0 clock 120.00 idle"]
+        assert await c.send("move g1 d3") == ["ok"]
+        assert await c.send("info g1") == ["status g1 w ply 1 clock 120.00 idle"]
+        assert (await c.send("move g1 a1"))[0].startswith("error illegal")
+        assert (await c.send("move g1 pass"))[0].startswith("error pass")
+        for bad in ("k6", "j8", "b7x", "c0", "c"):
+            assert (await c.send(f"move g1 {bad}"))[0] == f"error bad square {bad}"
+        assert (await c.send("move g2 c3"))[0] == "error no game g2"
+        assert (await c.send("fly g1"))[0].startswith("error unknown")
+        b, player = random_position(3, 20)
+        side = 'b' if player == 1 else 'w'
+        assert await c.send(f"setboard g1 {b.to_flat_fen()} {side}") == ["ok"]
+        assert (await c.send("info g1"))[0].startswith(f"status g1 {side} ply 20")
+        junk = b.to_flat_fen()[:-1] + "Z"
+        assert (await c.send(f"setboard g1 {junk} {side}"))[0].startswith("error fen")
+        assert await c.send("free g1") == ["ok"]
+        assert await c.send("quit") == ["bye"]
+    run_with_server(pool, body)
+
+
+def test_go_reports_and_charges_the_clock(pool):
+    async def body(server):
+        c = Client(server)
+        await c.send("new g 100")
+        await c.send("move g d3")
+        assert await c.send("go g 0.5") == []
+        best = await c.wait_for("bestmove g")
+        mv = best.split()[2]
+        b = Board.start_pos()
+        b.apply_move(parse_square("d3"), 1)
+        assert parse_square(mv) in b.legal_moves(-1)
+        infos = [line for line in c.lines if line.startswith("info g depth")]
+        assert infos and infos[-1].split(" pv ")[1].split()[0] == mv
+        status = (await c.send("info g"))[0].split()
+        assert 99.0 < float(status[6]) < 100.0 and status[7] == "idle"
+    run_with_server(pool, body)
+
+
+def test_many_games_share_the_workers(pool):
+    async def body(server):
+        clients = [Client(server) for _ in range(5)]
+        for i, c in enumerate(clients):
+            b, player = random_position(i, 12)
+            side = 'b' if player == 1 else 'w'
+            await c.send(f"new g{i}")
+            await c.send(f"setboard g{i} {b.to_flat_fen()} {side}")
+            await c.send(f"go g{i} 0.3")
+        for i, c in enumerate(clients):
+            await c.wait_for(f"bestmove g{i}")
+            assert all(line.split()[1] == f"g{i}" for line in c.lines if line.startswith("info"))
+    run_with_server(pool, body)
+
+
+def test_stop_answers_at_once(pool):
+    async def body(server):
+        c = Client(server)
+        await c.send("new g")
+        await c.send("move g d3")
+        await c.send("go g 30")
+        await asyncio.sleep(0.5)
+        t0 = time.monotonic()
+        await c.send("stop g")
+        await c.wait_for("bestmove g", timeout=3.0)
+        assert time.monotonic() - t0 < 2.0
+    run_with_server(pool, body)
+
+
+def test_socket_transport(pool):
+    async def body(server):
+        tcp = await asyncio.start_server(server.serve_connection, '127.0.0.1', 0)
+        port = tcp.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            writer.write(b"ping 1\nnew s\ngo s 0.2\n")
+            await writer.drain()
+            assert await reader.readline() == b"pong 1\n"
+            assert await reader.readline() == b"ok\n"
+            while True:
+                line = (await asyncio.wait_for(reader.readline(), 10)).decode()
+                if line.startswith("bestmove"):
+                    break
+                assert line.startswith("info s")
+            writer.write(b"quit\n")
+            assert await reader.readline() == b"bye\n"
+        finally:
+            writer.close()
+            tcp.close()
+    run_with_server(pool, body)
@@ -0,0 +1,56 @@
+# test_symmetry.py
+
+import random
+import numpy as np
+import pytest
+from board import Board
+from book_utils import OpeningBook
+from pattern_utils import SYMMETRIES
+from symmetry_utils import (INVERSE, N_SYMMETRIES, canonical, canonical_board,
+                            transform, transform_bit, transform_square)
+from test_search import random_position
+
+
+def reference_transform(bb, sym):
+    out = 0
+    for idx in range(64):
+        if bb >> (63 - idx) & 1:
+            r, c = SYMMETRIES[sym](*divmod(idx, 8))
+            out |= 1 << (63 - (8 * r + c))
+    return out
+
+
+@pytest.mark.parametrize("sym", range(N_SYMMETRIES))
+def test_transform_matches_reference(sym):
+    rng = random.Random(sym)
+    for _ in range(50):
+        bb = rng.getrandbits(64)
+        assert int(transform(np.uint64(bb), sym)) == reference_transform(bb, sym)
+        assert int(transform(transform(np.uint64(bb), sym), INVERSE[sym])) == bb
+    for idx in range(64):
+        assert transform_bit(63 - idx, sym) == 63 - transform_square(idx, sym)
+
+
+def test_canonical_is_shared_by_all_orientations():
+    b, _ = random_position(4, 12)
+    expected = canonical(np.uint64(b.black), np.uint64(b.white))
+    for sym in range(N_SYMMETRIES):
+        black = transform(np.uint64(b.black), sym)
+        white = transform(np.uint64(b.white), sym)
+        cb, cw, s = canonical(black, white)
+        assert (cb, cw) == expected[:2]
+        assert transform(black, s) == cb
+
+
+def test_book_answers_symmetric_positions():
+    b, player = random_position(7, 3)
+    mv = b.legal_moves(player)[-1]
+    book = OpeningBook.from_entries({(b.black, b.white): [(mv, 0, 1)]})
+    assert len(book) == 1
+    for sym in range(N_SYMMETRIES):
+        t = Board(reference_transform(b.black, sym), reference_transform(b.white, sym))
+        got = book.choose(t, player)
+        assert got == transform_square(mv, sym)
+        assert got in t.legal_moves(player)
+    canon, _ = canonical_board(b)
+    assert book.lookup(canon)
@@ -0,0 +1,72 @@
+# test_tt.py
+
+import numpy as np
+from tt_utils import (TranspositionTable, EXACT, LOWER, NO_MOVE, BUCKET_WORDS,
+                      zobrist, tt_probe, tt_store, tt_value, tt_depth, tt_flag,
+                      tt_move, tt_gen)
+
+
+def test_size_is_capped():
+    tt = TranspositionTable(1)
+    assert tt.table.nbytes <= 2**20
+    assert len(tt.table) // BUCKET_WORDS & (len(tt.table) // BUCKET_WORDS - 1) == 0
+
+
+def test_store_and_probe_roundtrip():
+    tt = TranspositionTable(1)
+    key = zobrist(np.uint64(0x0000000810000000), np.uint64(0x0000001008000000))
+    assert tt_probe(tt.table, key) == 0
+    tt_store(tt.table, key, 7, LOWER, -12345, 19, 3)
+    data = tt_probe(tt.table, key)
+    assert (tt_depth(data), tt_flag(data), tt_value(data),
+            tt_move(data), tt_gen(data)) == (7, LOWER, -12345, 19, 3)
+
+
+def test_depth_preferred_and_always_replace_slots():
+    tt = TranspositionTable(1)
+    n_buckets = len(tt.table) // BUCKET_WORDS
+    deep, shallow, other = (np.uint64(5), np.uint64(5 + n_buckets),
+                            np.uint64(5 + 2 * n_buckets))
+    tt_store(tt.table, deep, 10, EXACT, 1, NO_MOVE, 0)
+    tt_store(tt.table, shallow, 2, EXACT, 2, NO_MOVE, 0)
+    assert tt_value(tt_probe(tt.table, deep)) == 1
+    assert tt_value(tt_probe(tt.table, shallow)) == 2
+    # a second shallow entry evicts the always-replace slot, not the deep one
+    assert tt_store(tt.table, other, 1, EXACT, 3, NO_MOVE, 0)
+    assert tt_probe(tt.table, shallow) == 0
+    assert tt_value(tt_probe(tt.table, deep)) == 1
+    # entries from an older search lose depth priority
+    tt_store(tt.table, shallow, 1, EXACT, 4, NO_MOVE, 1)
+    assert tt_probe(tt.table, deep) == 0
+    assert tt_value(tt_probe(tt.table, shallow)) == 4
+
+
+def _store_in_child(name, nbytes, key):
+    tt = TranspositionTable.attach(name, nbytes)
+    tt_store(tt.table, key, 4, EXACT, 99, 12, 0)
+    tt.close()
+
+
+def test_shared_table_visible_across_processes():
+    import multiprocessing
+    tt = TranspositionTable(1, shared=True)
+    try:
+        key = np.uint64(0x1234567890ABCDEF)
+        ctx = multiprocessing.get_context('forkserver')
+        p = ctx.Process(target=_store_in_child,
+                        args=(tt.shm_name, tt.table.nbytes, key))
+        p.start()
+        p.join()
+        assert tt_value(tt_probe(tt.table, key)) == 99
+        assert tt_move(tt_probe(tt.table, key)) == 12
+    finally:
+        tt.close()
+
+
+def test_torn_entry_reads_as_miss():
+    tt = TranspositionTable(1)
+    key = np.uint64(77)
+    tt_store(tt.table, key, 4, EXACT, 5, NO_MOVE, 0)
+    i = int(key) % (len(tt.table) // BUCKET_WORDS) * BUCKET_WORDS
+    tt.table[i + 1] ^= np.uint64(1 << 33)   # data word from a different write
+    assert tt_probe(tt.table, key) == 0
@@ -0,0 +1,71 @@
+# test_tune.py
+
+import random
+import numpy as np
+import pytest
+from batch_utils import batch_evaluate
+from board import Board
+from pattern_utils import load_pattern_weights, save_pattern_weights
+from position_utils import (PositionWriter, iter_position_batches,
+                            open_positions, positions_from_game)
+from tune_eval import fit_patterns, to_table
+
+
+def random_game(seed):
+    rng = random.Random(seed)
+    b, player, moves = Board.start_pos(), 1, []
+    while True:
+        legal = b.legal_moves(player)
+        if not legal:
+            if not b.legal_moves(-player):
+                return moves
+            player = -player
+            continue
+        mv = rng.choice(legal)
+        moves.append(mv)
+        b.apply_move(mv, player)
+        player = -player
+
+
+@pytest.fixture
+def position_file(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    with PositionWriter(path) as w:
+        for seed in range(200):
+            w.write(positions_from_game(random_game(seed)))
+    return path
+
+
+def test_positions_are_labelled_from_the_mover():
+    moves = random_game(0)
+    pos = positions_from_game(moves)
+    assert len(pos) == len(moves)
+    b = Board.start_pos()
+    assert pos[0]['us'] == b.black and pos[0]['them'] == b.white
+    # labels flip sign between the two players unless someone passed
+    assert pos[0]['result'] == -pos[1]['result']
+    with pytest.raises(ValueError):
+        positions_from_game([0])
+
+
+def test_position_file_streams_in_batches(position_file):
+    records = open_positions(position_file)
+    batches = list(iter_position_batches(position_file, batch_size=1000))
+    assert sum(len(b) for b in batches) == len(records)
+    assert max(len(b) for b in batches) == 1000
+    np.testing.assert_array_equal(np.concatenate(batches), records)
+    with PositionWriter(position_file) as w:
+        w.write(positions_from_game(random_game(999)))
+    assert len(open_positions(position_file)) > len(records)
+
+
+def test_fit_reduces_error_and_roundtrips(position_file, tmp_path):
+    records = np.array(open_positions(position_file))
+    base = np.sqrt(np.mean(records['result'].astype(float) ** 2))
+    weights = fit_patterns(position_file, n_phases=4, epochs=3, batch_size=4096)
+    table = to_table(weights)
+    path = str(tmp_path / "patterns.bin")
+    save_pattern_weights(path, table)
+    loaded = load_pattern_weights(path)
+    scores = batch_evaluate(records['us'], records['them'], loaded) / 1000
+    assert np.sqrt(np.mean((scores - records['result']) ** 2)) < 0.8 * base
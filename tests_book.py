@@ -1,14 +1,14 @@
 from board import Board
 from moves_utils import get_moves
 from engine import choose_move, TimeManager, index_to_coord
+from book_utils import OpeningBook
 import io, sys
 
 def test_book_print():
     # Build a minimal draft book mapping the start position to its first move
     start = Board.start_pos()
-    fen0 = start.to_flat_fen()
     mv0 = get_moves(start, 1)[0]
-    book = {fen0: mv0}
+    book = OpeningBook.from_entries({(start.black, start.white): [(mv0, 0, 1)]})
 
     # Capture stdout during choose_move
     timer = TimeManager()
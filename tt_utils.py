@@ -0,0 +1,186 @@
+# tt_utils.py
+
+import numpy as np
+from multiprocessing import shared_memory
+from numba import njit, uint64
+
+DEFAULT_TT_MB = 64
+
+# Each bucket holds two entries of two uint64 words (key ^ data, data):
+# slot 0 is depth-preferred, slot 1 is always-replace. XOR-ing the key with
+# the data lets concurrent readers in other processes detect torn writes
+# without locking; a torn entry simply reads as a miss.
+BUCKET_WORDS = 4
+BUCKET_BYTES = BUCKET_WORDS * 8
+
+EXACT, LOWER, UPPER = 0, 1, 2
+NO_MOVE = 64
+
+# data word layout
+_VALUE_BIAS = 1 << 31
+_DEPTH_SHIFT = uint64(32)
+_FLAG_SHIFT  = uint64(40)
+_MOVE_SHIFT  = uint64(42)
+_GEN_SHIFT   = uint64(49)
+_VALUE_MASK  = uint64(0xFFFFFFFF)
+_DEPTH_MASK  = uint64(0xFF)
+_FLAG_MASK   = uint64(0x3)
+_MOVE_MASK   = uint64(0x7F)
+_GEN_MASK    = uint64(0xFF)
+
+# Zobrist keys per (byte position, byte value): bytes 0–7 of `us`, 8–15 of `them`.
+# Seeded so every process derives the same keys.
+ZOBRIST = np.random.default_rng(0x07E110).integers(
+    0, 2**64 - 1, size=(16, 256), dtype=np.uint64, endpoint=True)
+
+
+@njit("uint64(uint64, uint64)", cache=True)
+def zobrist(us, them):
+    """64-bit Zobrist key of a position, tabulated one byte at a time."""
+    h = uint64(0)
+    for i in range(8):
+        s = uint64(8 * i)
+        h ^= ZOBRIST[i, (us >> s) & uint64(0xFF)]
+        h ^= ZOBRIST[8 + i, (them >> s) & uint64(0xFF)]
+    return h
+
+
+@njit(cache=True)
+def tt_pack(depth, flag, value, move, gen):
+    return (uint64(value + _VALUE_BIAS)
+            | (uint64(depth) << _DEPTH_SHIFT)
+            | (uint64(flag) << _FLAG_SHIFT)
+            | (uint64(move) << _MOVE_SHIFT)
+            | (uint64(gen) << _GEN_SHIFT))
+
+
+@njit(cache=True)
+def tt_value(data):
+    return np.int64(data & _VALUE_MASK) - _VALUE_BIAS
+
+
+@njit(cache=True)
+def tt_depth(data):
+    return np.int64((data >> _DEPTH_SHIFT) & _DEPTH_MASK)
+
+
+@njit(cache=True)
+def tt_flag(data):
+    return np.int64((data >> _FLAG_SHIFT) & _FLAG_MASK)
+
+
+@njit(cache=True)
+def tt_move(data):
+    return np.int64((data >> _MOVE_SHIFT) & _MOVE_MASK)
+
+
+@njit(cache=True)
+def tt_gen(data):
+    return np.int64((data >> _GEN_SHIFT) & _GEN_MASK)
+
+
+@njit(cache=True)
+def tt_probe(tt, key):
+    """Return the data word stored for `key`, or 0 on a miss."""
+    base = (key & uint64(len(tt) // BUCKET_WORDS - 1)) * uint64(BUCKET_WORDS)
+    for slot in range(2):
+        i = base + uint64(2 * slot)
+        check = tt[i]
+        data = tt[i + 1]
+        if data != uint64(0) and check ^ data == key:
+            return data
+    return uint64(0)
+
+
+@njit(cache=True)
+def tt_store(tt, key, depth, flag, value, move, gen):
+    """
+    Store an entry; returns True if a live entry for another position was
+    evicted. Slot 0 keeps the deepest current-generation entry, slot 1 takes
+    whatever slot 0 refuses.
+    """
+    base = (key & uint64(len(tt) // BUCKET_WORDS - 1)) * uint64(BUCKET_WORDS)
+    data = tt[base + 1]
+    old_key = tt[base] ^ data
+    if (data == uint64(0) or old_key == key or tt_gen(data) != gen
+            or depth >= tt_depth(data)):
+        i = base
+    else:
+        i = base + uint64(2)
+        data = tt[i + 1]
+        old_key = tt[i] ^ data
+    if old_key == key and move == NO_MOVE and data != uint64(0):
+        # keep the known best move when re-storing a bound without one
+        move = tt_move(data)
+    new_data = tt_pack(depth, flag, value, move, gen)
+    tt[i] = key ^ new_data
+    tt[i + 1] = new_data
+    return data != uint64(0) and tt_gen(data) == gen and old_key != key
+
+
+class TranspositionTable:
+    """
+    Preallocated, fixed-size transposition table sized in megabytes.
+    With `shared=True` the table lives in a `multiprocessing.shared_memory`
+    block that worker processes open with `attach`.
+    """
+
+    def __init__(self, mb: float = DEFAULT_TT_MB, shared: bool = False):
+        buckets = 1
+        while buckets * 2 * BUCKET_BYTES <= mb * 2**20:
+            buckets *= 2
+        nbytes = buckets * BUCKET_BYTES
+        self.generation = 0
+        self._owner = shared
+        if shared:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.table = np.ndarray(nbytes // 8, dtype=np.uint64, buffer=self.shm.buf)
+            self.table[:] = 0
+        else:
+            self.shm = None
+            self.table = np.zeros(nbytes // 8, dtype=np.uint64)
+
+    @classmethod
+    def attach(cls, name: str, nbytes: int) -> "TranspositionTable":
+        """Open a shared table created by another process."""
+        tt = cls.__new__(cls)
+        tt.generation = 0
+        tt._owner = False
+        # Pool workers share the creator's resource tracker, so attaching
+        # does not take ownership of the block.
+        tt.shm = shared_memory.SharedMemory(name=name)
+        tt.table = np.ndarray(nbytes // 8, dtype=np.uint64, buffer=tt.shm.buf)
+        return tt
+
+    @property
+    def shm_name(self) -> str | None:
+        return self.shm.name if self.shm is not None else None
+
+    def close(self) -> None:
+        """Release the shared block; the creating process also unlinks it."""
+        if self.shm is None:
+            return
+        del self.table
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+        self.shm = None
+
+    @property
+    def size_mb(self) -> float:
+        return self.table.nbytes / 2**20
+
+    def new_search(self) -> None:
+        """Age existing entries so they lose replacement priority."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self) -> None:
+        self.table[:] = 0
+        self.generation = 0
+
+    def hashfull(self, sample: int = 1000) -> float:
+        """Fraction of the first `sample` buckets' slots holding current entries."""
+        words = self.table[:sample * BUCKET_WORDS].reshape(-1, 2)[:, 1]
+        gens = (words >> _GEN_SHIFT) & _GEN_MASK
+        live = (words != 0) & (gens == self.generation)
+        return float(live.mean())
@@ -0,0 +1,63 @@
+# tune_eval.py
+
+import argparse
+import numpy as np
+from batch_utils import batch_pattern_features, batch_phases
+from pattern_utils import N_INST, N_WEIGHTS, save_pattern_weights
+from position_utils import iter_position_batches
+from search_jit import DISC_SCORE
+
+# Fits the pattern weight tables to labelled positions by least squares:
+# each weight's gradient is the summed residual of the positions using it,
+# divided by how many positions did, so rare patterns move as fast as
+# common ones. Positions are streamed from disk one batch at a time.
+
+DEFAULT_PHASES = 12
+
+
+def fit_patterns(path: str, n_phases: int = DEFAULT_PHASES, epochs: int = 4,
+                 batch_size: int = 1 << 16, rate: float = 1.0,
+                 verbose: bool = False) -> np.ndarray:
+    """
+    Fit (n_phases, N_WEIGHTS) float weights predicting the final disc
+    difference of each position in the file at `path`.
+    """
+    weights = np.zeros(n_phases * N_WEIGHTS)
+    size = weights.shape[0]
+    for epoch in range(epochs):
+        sq_err = 0.0
+        n = 0
+        for batch in iter_position_batches(path, batch_size):
+            cols = batch_pattern_features(batch['us'], batch['them'])
+            cols += (batch_phases(batch['us'], batch['them'], n_phases) * N_WEIGHTS)[:, None]
+            err = weights[cols].sum(axis=1) - batch['result']
+            grad = np.bincount(cols.ravel(), np.repeat(err, N_INST), minlength=size)
+            uses = np.bincount(cols.ravel(), minlength=size)
+            hit = uses > 0
+            weights[hit] -= rate * grad[hit] / (uses[hit] * N_INST)
+            sq_err += float(err @ err)
+            n += len(err)
+        if verbose and n:
+            print(f"epoch {epoch + 1}: rms error {np.sqrt(sq_err / n):.3f} discs")
+    return weights.reshape(n_phases, N_WEIGHTS)
+
+
+def to_table(weights: np.ndarray) -> np.ndarray:
+    """Disc-valued float weights as int16 in search units (DISC_SCORE per disc)."""
+    return np.clip(np.rint(weights * DISC_SCORE), -32768, 32767).astype(np.int16)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit pattern weights to a position file.")
+    parser.add_argument("positions", help="labelled position file (position_utils format)")
+    parser.add_argument("-o", "--output", default="patterns.bin")
+    parser.add_argument("--phases", type=int, default=DEFAULT_PHASES)
+    parser.add_argument("--epochs", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1 << 16)
+    parser.add_argument("--rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    w = fit_patterns(args.positions, args.phases, args.epochs, args.batch_size,
+                     args.rate, verbose=True)
+    save_pattern_weights(args.output, to_table(w))
+    print(f"Wrote {args.phases} phases to {args.output}")
@@ -1,33 +1,57 @@
+import queue
+import threading
 import tkinter as tk
 from board import Board
 from moves_utils import get_moves
-from engine import choose_move, TimeManager, load_opening_book
+from engine import choose_move, index_to_coord, TimeManager, load_opening_book
+from search import Iteration, SearchControl, SearchPool
+from generate_book import score_discs
+from ponder_utils import Ponderer
 
 CELL_SIZE = 60
 BOARD_COLOR = '#008000'
 HIGHLIGHT_COLOR = '#ffff00'
+POLL_MS = 50   # how often the event loop drains the search queue
 
 
 class OthelloUI:
-    """Simple Tkinter-based interface to play against the bot."""
+    """
+    Simple Tkinter-based interface to play against the bot. The bot
+    searches on a worker thread that reports each iteration and its final
+    move through a queue, which the event loop polls; "Move now" stops
+    the search and plays the best move found so far.
+    """
 
-    def __init__(self, root: tk.Tk, human_side: int) -> None:
+    def __init__(self, root: tk.Tk, human_side: int, pool: SearchPool) -> None:
         self.root = root
+        self.pool = pool
         self.human_side = human_side
         self.player = 1  # 1 = black, -1 = white
         self.ply = 0
         self.board = Board.start_pos()
         self.timer = TimeManager()
         self.book = load_opening_book()
+        self.ponder = Ponderer(pool)
+
+        self.queue: queue.Queue = queue.Queue()
+        self.control = SearchControl()
+        self.search_thread: threading.Thread | None = None
 
         self.canvas = tk.Canvas(root, width=8 * CELL_SIZE, height=8 * CELL_SIZE)
         self.canvas.pack()
         self.canvas.bind("<Button-1>", self.handle_click)
+        self.status = tk.Label(root, anchor='w', justify='left', font=('TkFixedFont', 10))
+        self.status.pack(fill=tk.X)
+        self.move_now = tk.Button(root, text="Move now", state=tk.DISABLED,
+                                  command=self.stop_search)
+        self.move_now.pack()
 
         self.draw_board()
         if self.player != self.human_side:
             # Bot starts the game
             self.root.after(100, self.bot_move)
+        else:
+            self.ponder.start(self.board, self.player)
 
     def draw_board(self) -> None:
         """Draw the grid and discs."""
@@ -75,6 +99,7 @@ class OthelloUI:
         idx = r * 8 + c
         moves = get_moves(self.board, self.player)
         if idx in moves:
+            self.ponder.stop()
             self.board.apply_move(idx, self.player)
             self.ply += 1
             self.player *= -1
@@ -82,12 +107,65 @@ class OthelloUI:
             self.root.after(100, self.bot_move)
 
     def bot_move(self) -> None:
-        """Let the bot play if it's the bot's turn."""
-        if self.player == self.human_side:
+        """Start the bot's search on a worker thread if it's the bot's turn."""
+        if self.player == self.human_side or self.search_thread is not None:
             return
-        moves = get_moves(self.board, self.player)
-        if moves:
-            mv = choose_move(self.board, self.player, self.ply, self.timer, self.book)
+        if not get_moves(self.board, self.player):
+            self.finish_bot_turn(None)
+            return
+        self.control = SearchControl()
+        board = Board(self.board.black, self.board.white)
+        self.search_thread = threading.Thread(
+            target=self._search, args=(board, self.player, self.ply, self.control),
+            name="search", daemon=True)
+        self.status.config(text="Thinking...")
+        self.move_now.config(state=tk.NORMAL)
+        self.search_thread.start()
+        self.root.after(POLL_MS, self.poll)
+
+    def _search(self, board: Board, player: int, ply: int, control: SearchControl) -> None:
+        """Worker thread: run the bot's search, posting progress to the queue."""
+        try:
+            mv = choose_move(board, player, ply, self.timer, self.book, self.pool,
+                             self.ponder, on_iteration=lambda it: self.queue.put(('iteration', it)),
+                             control=control)
+            self.queue.put(('move', mv))
+        except Exception as exc:
+            self.queue.put(('error', exc))
+
+    def stop_search(self) -> None:
+        """Cut the search short; it still returns its best move so far."""
+        self.control.stop()
+
+    def poll(self) -> None:
+        """Event-loop side of the search: show progress, play the move when it comes."""
+        while True:
+            try:
+                kind, value = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'iteration':
+                self.show_iteration(value)
+                continue
+            self.search_thread.join()
+            self.search_thread = None
+            self.move_now.config(state=tk.DISABLED)
+            if kind == 'error':
+                raise value
+            self.finish_bot_turn(value)
+            return
+        self.root.after(POLL_MS, self.poll)
+
+    def show_iteration(self, it: Iteration) -> None:
+        if not it.completed:
+            return
+        pv = " ".join(index_to_coord(mv) for mv in it.pv)
+        self.status.config(text=f"Depth {it.depth} ({it.kind})  score {score_discs(it.score, it.kind):+.2f}  "
+                                f"{it.nodes:,} nodes  {it.elapsed:.1f}s\nPV {pv}")
+
+    def finish_bot_turn(self, mv: int | None) -> None:
+        """Play the bot's move (None to pass) and hand the turn over."""
+        if mv is not None:
             self.board.apply_move(mv, self.player)
             self.ply += 1
         self.player *= -1
@@ -96,15 +174,31 @@ class OthelloUI:
             self.root.title("Game over")
         elif self.player != self.human_side:
             self.root.after(100, self.bot_move)
+        else:
+            # search on the human's time until they click
+            self.ponder.start(self.board, self.player)
+
+    def close(self) -> None:
+        """Stop any search or ponder thread (call after the main loop exits)."""
+        self.control.stop()
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+        self.ponder.stop()
 
 
 def main() -> None:
     side = input("Play as (b)lack or (w)hite? > ").strip().lower()
     human_side = 1 if side != 'w' else -1
-    root = tk.Tk()
-    root.title("Othello")
-    OthelloUI(root, human_side)
-    root.mainloop()
+    pool = SearchPool()
+    try:
+        root = tk.Tk()
+        root.title("Othello")
+        ui = OthelloUI(root, human_side, pool)
+        root.mainloop()
+        ui.close()
+    finally:
+        pool.shutdown()
 
 
 if __name__ == '__main__':